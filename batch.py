@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#!/usr/bin/env python3
+
+import argparse
+import json
+import sys
+import time
+
+import camping
+from clients.recreation_client import RecreationClient
+from utils.camping_argparser import CampingArgumentParser
+from utils.site_filter import SiteFilter
+
+LOG = camping.LOG
+
+
+def parse_query(spec, index):
+    """
+    Turn one JSON query spec into the arguments `check_park` takes. A spec
+    looks like this, where only `parks`, `start_date` and `end_date` are
+    required:
+
+    {"id": "alice", "parks": [232448, 232450], "start_date": "2023-07-21",
+     "end_date": "2023-09-30", "nights": 2, "weekends_only": true,
+     "campsite_type": "STANDARD NONELECTRIC", "campsite_ids": [18621],
+     "excluded_site_ids": ["79131"], "exclusion_file": "excluded_sites.txt"}
+    """
+    start_date, end_date = camping.validate_dates(
+        CampingArgumentParser.TypeConverter.date(spec["start_date"]),
+        CampingArgumentParser.TypeConverter.date(spec["end_date"]),
+    )
+    excluded_site_ids = [str(s) for s in spec.get("excluded_site_ids", [])]
+    excluded_site_ids += camping.load_excluded_site_ids(spec.get("exclusion_file"))
+    return {
+        "id": spec.get("id", index),
+        # Park IDs from JSON can be numbers or strings, key them the same way
+        "parks": [str(p) for p in spec["parks"]],
+        "start_date": start_date,
+        "end_date": end_date,
+        "nights": spec.get("nights"),
+        "weekends_only": spec.get("weekends_only", False),
+        "campsite_type": spec.get("campsite_type"),
+        "campsite_ids": tuple(int(c) for c in spec.get("campsite_ids", ())),
+        "excluded_site_ids": excluded_site_ids,
+    }
+
+
+def read_queries(lines):
+    queries = []
+    for index, line in enumerate(lines):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        queries.append(parse_query(json.loads(line), index))
+    return queries
+
+
+def fetch_for_queries(queries):
+    """
+    Fetch the union of the (park, month) pairs of all queries, each exactly
+    once.
+    """
+    park_months = [
+        (park_id, month_date)
+        for query in queries
+        for park_id in query["parks"]
+        for month_date in camping.get_months(query["start_date"], query["end_date"])
+    ]
+    LOG.info(
+        f"{len(queries)} queries need {len(set(park_months))} unique park months "
+        f"out of {len(park_months)}"
+    )
+    return RecreationClient.get_months_data(park_months)
+
+
+def run_query(query, month_data_by_pair, name_by_park_id):
+    months = camping.get_months(query["start_date"], query["end_date"])
+    calendar = camping.build_calendar(
+        query["start_date"], query["end_date"], query["nights"], query["weekends_only"]
+    )
+    site_filter = SiteFilter(
+        query["campsite_type"], query["campsite_ids"], query["excluded_site_ids"]
+    )
+    info_by_park_id = {}
+    for park_id in query["parks"]:
+        info_by_park_id[park_id] = camping.check_park(
+            park_id,
+            query["start_date"],
+            query["end_date"],
+            query["campsite_type"],
+            query["campsite_ids"],
+            nights=query["nights"],
+            weekends_only=query["weekends_only"],
+            excluded_site_ids=query["excluded_site_ids"],
+            api_data=[
+                month_data_by_pair[(park_id, m)]
+                for m in months
+                if (park_id, m) in month_data_by_pair
+            ],
+            park_name=name_by_park_id.get(park_id, park_id),
+            calendar=calendar,
+            site_filter=site_filter,
+        )
+    return info_by_park_id
+
+
+def generate_query_output(query, info_by_park_id):
+    parks = {}
+    has_availabilities = False
+    for park_id, (current, maximum, available_dates_by_site_id, park_name) in info_by_park_id.items():
+        has_availabilities = has_availabilities or current > 0
+        parks[park_id] = {
+            "name": park_name,
+            "available": current,
+            "total": maximum,
+            "sites": available_dates_by_site_id,
+        }
+    return json.dumps(
+        {"id": query["id"], "has_availabilities": has_availabilities, "parks": parks}
+    )
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description="Run many availability queries, fetching each park month once"
+    )
+    parser.add_argument(
+        "queries",
+        nargs="?",
+        type=argparse.FileType("r"),
+        default=sys.stdin,
+        help="JSONL file with one query per line (default is stdin)",
+    )
+    CampingArgumentParser.add_client_arguments(parser)
+    return parser
+
+
+def main(args, out=sys.stdout):
+    queries = read_queries(args.queries)
+    camping.configure_client(args)
+    month_data_by_pair, name_by_park_id = fetch_for_queries(queries)
+    camping.save_client_state()
+
+    for query in queries:
+        info_by_park_id = run_query(query, month_data_by_pair, name_by_park_id)
+        print(generate_query_output(query, info_by_park_id), file=out, flush=True)
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    args = build_parser().parse_args()
+
+    main(args)
+    end = time.perf_counter()
+    LOG.info(f"Ran batch in {end-start}s")
+
+"""
+Usage:
+python3 batch.py queries.jsonl > results.jsonl
+"""
@@ -0,0 +1,84 @@
+"""
+Compare the per-site Python evaluation with the vectorized NumPy one.
+
+Usage:
+python3 -m benchmarks.bench_availability_matrix --parks 40 --sites-per-park 300
+"""
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+import camping
+from benchmarks.payloads import generate_parks
+from benchmarks.timing import best_of
+from utils import availability_matrix
+
+
+def decode_loops(api_data_by_park_id, start_date, end_date):
+    return {
+        park_id: camping.get_park_information(
+            park_id, start_date, end_date, api_data=api_data
+        )
+        for park_id, api_data in api_data_by_park_id.items()
+    }
+
+
+def evaluate_loops(park_information_by_park_id, start_date, end_date, nights):
+    return {
+        park_id: camping.get_num_available_sites(
+            park_information, start_date, end_date, nights=nights
+        )
+        for park_id, park_information in park_information_by_park_id.items()
+    }
+
+
+def decode_vectorized(api_data_by_park_id, start_date, end_date):
+    return availability_matrix.decode_parks(api_data_by_park_id, start_date, end_date)
+
+
+def evaluate_vectorized(matrix, start_date, end_date, nights):
+    return availability_matrix.evaluate_matrix(
+        matrix, nights, excluded_dates=camping.load_excluded_dates()
+    )
+
+
+def report(name, decode_time, evaluate_time, baseline=None):
+    total = decode_time + evaluate_time
+    line = f"{name:<16} decode {decode_time:.3f}s  evaluate {evaluate_time:.3f}s  total {total:.3f}s"
+    if baseline:
+        line += "  (evaluate {:.1f}x, total {:.1f}x)".format(
+            baseline[1] / evaluate_time, sum(baseline) / total
+        )
+    print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parks", type=int, default=40)
+    parser.add_argument("--sites-per-park", type=int, default=300)
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--nights", type=int, default=2)
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    camping.LOG.setLevel(logging.ERROR)
+    months = camping.get_months(datetime(2030, 1, 1), datetime(2030, args.months, 1))
+    start_date = months[0]
+    end_date = months[-1] + timedelta(days=27)
+    data = generate_parks(args.parks, months, args.sites_per_park, args.density)
+
+    loops_decode, info = best_of(args.repeat, decode_loops, data, start_date, end_date)
+    loops_evaluate, loops = best_of(args.repeat, evaluate_loops, info, start_date, end_date, args.nights)
+    vectorized_decode, matrix = best_of(args.repeat, decode_vectorized, data, start_date, end_date)
+    vectorized_evaluate, vectorized = best_of(
+        args.repeat, evaluate_vectorized, matrix, start_date, end_date, args.nights
+    )
+
+    assert all(
+        loops[p][:2] == vectorized[p][:2] and dict(loops[p][2]) == dict(vectorized[p][2])
+        for p in data
+    ), "Vectorized results differ from per-site results"
+    print(f"{args.parks * args.sites_per_park} sites, {(end_date - start_date).days} days, {args.nights} night(s)")
+    report("per-site loops", loops_decode, loops_evaluate)
+    report("vectorized", vectorized_decode, vectorized_evaluate, (loops_decode, loops_evaluate))
@@ -0,0 +1,75 @@
+"""
+Measure what the metrics instrumentation costs on the hot paths, with
+metrics disabled (the default) and enabled.
+
+Usage:
+python3 -m benchmarks.bench_metrics --parks 40 --sites-per-park 300
+"""
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+import camping
+from benchmarks.payloads import generate_parks
+from benchmarks.timing import best_of
+from utils import metrics
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def request_instrumentation():
+    # What RecreationClient._get records around each request
+    start = time.perf_counter()
+    elapsed = time.perf_counter() - start
+    metrics.REQUEST_SECONDS.observe(elapsed, endpoint="availability")
+    metrics.REQUESTS.inc(endpoint="availability", status=200)
+
+
+def check_parks(data, start_date, end_date, nights, instrumented):
+    for park_id, api_data in data.items():
+        start = time.perf_counter()
+        info = camping.check_park(
+            park_id, start_date, end_date, None, nights=nights,
+            api_data=api_data, park_name=str(park_id),
+        )
+        if instrumented:
+            metrics.PARK_EVALUATION_SECONDS.set(
+                time.perf_counter() - start, park=park_id
+            )
+            metrics.PARK_SITES_AVAILABLE.set(info[0], park=park_id)
+            metrics.PARK_SITES_TOTAL.set(info[1], park=park_id)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parks", type=int, default=40)
+    parser.add_argument("--sites-per-park", type=int, default=300)
+    parser.add_argument("--nights", type=int, default=2)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    camping.LOG.setLevel(logging.ERROR)
+    months = camping.get_months(datetime(2030, 1, 1), datetime(2030, 2, 1))
+    start_date = months[0]
+    end_date = months[-1] + timedelta(days=27)
+    data = generate_parks(args.parks, months, args.sites_per_park)
+
+    baseline, _ = best_of(args.repeat, check_parks, data, start_date, end_date, args.nights, False)
+    disabled_call = per_call(request_instrumentation, args.calls)
+    disabled, _ = best_of(args.repeat, check_parks, data, start_date, end_date, args.nights, True)
+    metrics.METRICS.enable()
+    enabled_call = per_call(request_instrumentation, args.calls)
+    enabled, _ = best_of(args.repeat, check_parks, data, start_date, end_date, args.nights, True)
+
+    print(f"per request, disabled  {disabled_call * 1e9:8.0f} ns")
+    print(f"per request, enabled   {enabled_call * 1e9:8.0f} ns")
+    print(f"check {args.parks} parks, uninstrumented  {baseline:.4f}s")
+    print(f"check {args.parks} parks, disabled        {disabled:.4f}s ({(disabled / baseline - 1) * 100:+.2f}%)")
+    print(f"check {args.parks} parks, enabled         {enabled:.4f}s ({(enabled / baseline - 1) * 100:+.2f}%)")
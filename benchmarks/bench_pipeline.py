@@ -0,0 +1,208 @@
+"""
+Time each stage of a run on synthetic payloads and write the results as
+JSON, so runs of different versions can be compared.
+
+Usage:
+python3 -m benchmarks.bench_pipeline --parks 40 --sites-per-park 300 --output bench.json
+python3 -m benchmarks.bench_pipeline --compare bench.json
+"""
+import argparse
+import io
+import json
+import logging
+import platform
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import camping
+import notifier
+from benchmarks.payloads import CAMPSITE_TYPES, generate_parks
+from benchmarks.timing import best_of
+from utils import availability_diff, pipe_format
+
+# A stage regresses if it gets this much slower than in the compared run
+REGRESSION_THRESHOLD = 0.2
+
+
+def park_information(data, start_date, end_date):
+    return {
+        park_id: camping.get_park_information(
+            park_id, start_date, end_date, api_data=api_data
+        )
+        for park_id, api_data in data.items()
+    }
+
+
+def available_sites(info_by_park_id, start_date, end_date, nights):
+    return {
+        park_id: camping.get_num_available_sites(
+            info, start_date, end_date, nights=nights
+        )
+        + ("PARK {}".format(park_id),)
+        for park_id, info in info_by_park_id.items()
+    }
+
+
+def consecutive_nights(info_by_park_id, nights):
+    return [
+        camping.consecutive_nights(available, nights)
+        for info in info_by_park_id.values()
+        for available in info.values()
+    ]
+
+
+def human_output(results, start_date, end_date):
+    return camping.generate_human_output(results, start_date, end_date, True)[0]
+
+
+def json_output(results):
+    return camping.generate_json_output(results)[0]
+
+
+def pipe_records(results, start_date, end_date):
+    stream = io.StringIO()
+    camping.write_records(
+        results.items(), start_date, end_date, pipe_format.NDJSON, stream=stream
+    )
+    return stream.getvalue()
+
+
+def notifier_parse_human(output):
+    # As piped into notifier.py, which reads the summary line first
+    stdin = io.StringIO(output + "\n")
+    next(stdin)
+    return notifier.get_availability_data(stdin)
+
+
+def notifier_parse_records(records):
+    return notifier.get_availability_data_from_records(
+        pipe_format.read_ndjson(records.splitlines())
+    )[0]
+
+
+def notifier_diff(new_data, old_data):
+    return availability_diff.diff(new_data, old_data)
+
+
+def drop_every_other_range(availability):
+    # A previous snapshot that differs from the current one in half its ranges
+    return {
+        park: {site: ranges[::2] for site, ranges in sites.items()}
+        for park, sites in availability.items()
+    }
+
+
+def run(args):
+    months = camping.get_months(
+        datetime(2030, 1, 1), datetime(2030, args.months, 1)
+    )
+    start_date = months[0]
+    end_date = months[-1] + timedelta(days=27)
+    data = generate_parks(
+        args.parks, months, args.sites_per_park, args.density, args.campsite_types
+    )
+
+    timings = {}
+
+    def stage(name, fn, *fn_args):
+        timings[name], result = best_of(args.repeat, fn, *fn_args)
+        return result
+
+    info = stage("get_park_information", park_information, data, start_date, end_date)
+    results = stage("get_num_available_sites", available_sites, info, start_date, end_date, args.nights)
+    stage("consecutive_nights", consecutive_nights, info, args.nights)
+    output = stage("generate_human_output", human_output, results, start_date, end_date)
+    stage("generate_json_output", json_output, results)
+    records = stage("write_records", pipe_records, results, start_date, end_date)
+    availability = stage("notifier_parse_human", notifier_parse_human, output)
+    stage("notifier_parse_records", notifier_parse_records, records)
+    stage("notifier_diff", notifier_diff, availability, drop_every_other_range(availability))
+
+    return {
+        "params": {
+            "parks": args.parks,
+            "sites_per_park": args.sites_per_park,
+            "months": args.months,
+            "density": args.density,
+            "nights": args.nights,
+            "campsite_types": list(args.campsite_types),
+            "repeat": args.repeat,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "commit": git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+        },
+        "stages": {
+            name: {"best": best, "runs": args.repeat}
+            for name, best in timings.items()
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Returns the stages that got more than `threshold` slower than in
+    `baseline`, as {stage: <ratio of best times>}.
+    """
+    regressions = {}
+    for name, stage in results["stages"].items():
+        if name not in baseline["stages"]:
+            continue
+        ratio = stage["best"] / baseline["stages"][name]["best"]
+        if ratio > 1 + threshold:
+            regressions[name] = ratio
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--parks", type=int, default=20)
+    parser.add_argument("--sites-per-park", type=int, default=200)
+    parser.add_argument("--months", type=int, default=2)
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument("--nights", type=int, default=2)
+    parser.add_argument(
+        "--campsite-types", nargs="+", default=CAMPSITE_TYPES,
+        help="Campsite types to draw sites from",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        help="Exit with an error if a stage is slower than in this results file",
+    )
+    args = parser.parse_args()
+
+    camping.LOG.setLevel(logging.ERROR)
+    notifier.LOG.setLevel(logging.ERROR)
+    results = run(args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["params"] != results["params"]:
+            print("Warning: comparing runs with different parameters", file=sys.stderr)
+        regressions = compare(results, baseline)
+        for name, ratio in regressions.items():
+            print(f"{name} is {ratio:.2f}x slower than in {args.compare}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,298 @@
+"""
+A local stand-in for the two recreation.gov endpoints RecreationClient
+uses, for tuning concurrency and retries without hitting the real site.
+
+Months are served from a response cache directory when it has them (e.g.
+one filled by a real run), otherwise they are generated. Latency, 429/5xx
+responses and slow bodies can be injected.
+
+Usage:
+python3 -m benchmarks.fake_server --port 8080 --latency lognormal:0.15,0.5 --throttle-rate 0.02
+python3 camping.py --api-url http://127.0.0.1:8080 --no-cache --start-date ... --end-date ... --parks 232447
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.payloads import generate_month
+from clients.campground_store import CampgroundStore
+from clients.response_cache import ResponseCache
+
+LOG = logging.getLogger(__name__)
+
+AVAILABILITY_PATH = re.compile(r"^/api/camps/availability/campground/(\d+)/month$")
+CAMPGROUND_PATH = re.compile(r"^/api/camps/campgrounds/(\d+)$")
+ERROR_STATUS_CODES = (500, 502, 503)
+# Bytes written at a time when streaming a slow body
+CHUNK_SIZE = 4096
+
+
+class LatencyDistribution:
+    """
+    Seconds to wait before responding, from a spec like "fixed:0.05",
+    "uniform:0.01,0.2", "exponential:0.1" (mean) or "lognormal:0.1,0.5"
+    (median, sigma).
+    """
+
+    KINDS = ("fixed", "uniform", "exponential", "lognormal")
+
+    def __init__(self, spec="fixed:0"):
+        kind, _, params = spec.partition(":")
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution {kind!r}")
+        try:
+            self.params = [float(p) for p in params.split(",")] if params else []
+        except ValueError:
+            raise ValueError(f"Invalid latency distribution {spec!r}")
+        expected = 2 if kind in ("uniform", "lognormal") else 1
+        if len(self.params) != expected:
+            raise ValueError(f"{kind} latency takes {expected} parameter(s)")
+        self.kind = kind
+        self.spec = spec
+
+    def sample(self, rng):
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(*self.params)
+        if self.kind == "exponential":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] else 0
+        median, sigma = self.params
+        return rng.lognormvariate(math.log(median), sigma) if median else 0
+
+
+class FakeRecreationServer:
+    """
+    Serves /api/camps/availability/campground/{id}/month and
+    /api/camps/campgrounds/{id} on a ThreadingHTTPServer.
+
+    Each request waits for a latency drawn from `latency`, then gets a 429
+    with `retry_after` with probability `throttle_rate`, a 500/502/503 with
+    probability `error_rate`, or the payload, written at
+    `slow_body_bytes_per_second` with probability `slow_body_rate`.
+    """
+
+    def __init__(
+        self,
+        latency=None,
+        throttle_rate=0,
+        retry_after=1,
+        error_rate=0,
+        slow_body_rate=0,
+        slow_body_bytes_per_second=64 * 1024,
+        sites_per_park=100,
+        density=0.3,
+        cache_dir=None,
+        seed=None,
+    ):
+        self.latency = latency or LatencyDistribution()
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.slow_body_rate = slow_body_rate
+        self.slow_body_bytes_per_second = slow_body_bytes_per_second
+        self.sites_per_park = sites_per_park
+        self.density = density
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.campgrounds = CampgroundStore(cache_dir) if cache_dir else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        # (park_id, "YYYY-MM") -> encoded body
+        self._months = {}
+        self._server = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.status_counts = {}
+            # Seconds from receiving each request to finishing its response
+            self.durations = []
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, port=0, host="127.0.0.1"):
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        LOG.info(f"Fake recreation.gov serving on {self.url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _draw(self):
+        """
+        Latency, and whether to throttle, fail or slow down one request.
+        """
+        with self._lock:
+            rng = self._rng
+            return (
+                self.latency.sample(rng),
+                rng.random() < self.throttle_rate,
+                rng.random() < self.error_rate,
+                rng.random() < self.slow_body_rate,
+                rng.choice(ERROR_STATUS_CODES),
+            )
+
+    def _record(self, status, duration):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+            self.durations.append(duration)
+
+    def month_body(self, park_id, month_date):
+        key = (park_id, month_date.strftime("%Y-%m"))
+        body = self._months.get(key)
+        if body is None:
+            entry = self.cache.get(park_id, month_date) if self.cache else None
+            if entry is not None:
+                month_data = entry["body"]
+            else:
+                month_data = generate_month(
+                    park_id,
+                    month_date,
+                    self.sites_per_park,
+                    self.density,
+                    seed=park_id * 1000000 + month_date.year * 100 + month_date.month,
+                )
+            body = self._months[key] = json.dumps(month_data).encode("utf-8")
+        return body
+
+    def campground_body(self, park_id):
+        name = self.campgrounds.get_name(park_id) if self.campgrounds else None
+        return json.dumps(
+            {"campground": {"facility_name": name or f"PARK {park_id}"}}
+        ).encode("utf-8")
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                start = time.perf_counter()
+                status = self._respond()
+                server._record(status, time.perf_counter() - start)
+
+            def _respond(self):
+                url = urlsplit(self.path)
+                month_match = AVAILABILITY_PATH.match(url.path)
+                campground_match = CAMPGROUND_PATH.match(url.path)
+                if month_match:
+                    start_date = parse_qs(url.query).get("start_date", [""])[0]
+                    try:
+                        month_date = datetime.strptime(start_date[:10], "%Y-%m-%d")
+                    except ValueError:
+                        return self._send_error(400)
+                    body = server.month_body(int(month_match.group(1)), month_date)
+                elif campground_match:
+                    body = server.campground_body(int(campground_match.group(1)))
+                else:
+                    return self._send_error(404)
+
+                latency, throttle, fail, slow, error_status = server._draw()
+                time.sleep(latency)
+                if throttle:
+                    return self._send_error(429, {"Retry-After": str(server.retry_after)})
+                if fail:
+                    return self._send_error(error_status)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not slow:
+                    self.wfile.write(body)
+                    return 200
+                pause = CHUNK_SIZE / server.slow_body_bytes_per_second
+                for i in range(0, len(body), CHUNK_SIZE):
+                    self.wfile.write(body[i:i + CHUNK_SIZE])
+                    self.wfile.flush()
+                    time.sleep(pause)
+                return 200
+
+            def _send_error(self, status, headers=None):
+                body = json.dumps({"error": status}).encode("utf-8")
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return status
+
+            def log_message(self, format, *args):
+                LOG.debug("Fake recreation.gov request: " + format % args)
+
+        return Handler
+
+
+def add_server_arguments(parser):
+    parser.add_argument(
+        "--latency",
+        type=LatencyDistribution,
+        default=LatencyDistribution(),
+        help=(
+            "Response latency in seconds: fixed:S, uniform:MIN,MAX, "
+            "exponential:MEAN or lognormal:MEDIAN,SIGMA (default fixed:0)"
+        ),
+    )
+    parser.add_argument("--throttle-rate", type=float, default=0, help="Fraction of requests answered with a 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with each 429")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with a 500, 502 or 503")
+    parser.add_argument("--slow-body-rate", type=float, default=0, help="Fraction of responses streamed slowly")
+    parser.add_argument(
+        "--slow-body-bytes-per-second", type=int, default=64 * 1024,
+        help="Rate at which slow responses are streamed",
+    )
+    parser.add_argument("--sites-per-park", type=int, default=100)
+    parser.add_argument("--density", type=float, default=0.3)
+    parser.add_argument(
+        "--payload-dir",
+        help="Serve months and names from this cache directory when it has them",
+    )
+    parser.add_argument("--seed", type=int)
+
+
+def server_from_args(args):
+    return FakeRecreationServer(
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        slow_body_rate=args.slow_body_rate,
+        slow_body_bytes_per_second=args.slow_body_bytes_per_second,
+        sites_per_park=args.sites_per_park,
+        density=args.density,
+        cache_dir=args.payload_dir,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    server = server_from_args(args).start(args.port, args.host)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
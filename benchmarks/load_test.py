@@ -0,0 +1,176 @@
+"""
+Run full camping.py sweeps against the fake recreation.gov server and
+report end-to-end throughput and tail latency as JSON.
+
+Usage:
+python3 -m benchmarks.load_test --parks 40 --months 3 --sweeps 20 --concurrency 2 --latency lognormal:0.15,0.5 --throttle-rate 0.02 --max-workers 16
+"""
+import argparse
+import calendar
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from benchmarks.fake_server import add_server_arguments, server_from_args
+
+LOG = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, p):
+    """
+    Nearest-rank percentile of `values`, or None if there are none.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = max(math.ceil(p / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+def summarize(values):
+    summary = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    summary["max"] = max(values) if values else None
+    summary["mean"] = sum(values) / len(values) if values else None
+    return summary
+
+
+def sweep_dates(months, today=None):
+    """
+    From the first day of next month to the last day `months` months later,
+    so camping.py doesn't move the start date.
+    """
+    today = today or date.today()
+    year, month = (today.year + 1, 1) if today.month == 12 else (today.year, today.month + 1)
+    start = date(year, month, 1)
+    month += months - 1
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    end = date(year, month, calendar.monthrange(year, month)[1])
+    return start, end
+
+
+def sweep_command(url, park_ids, start, end, camping_args):
+    return [
+        sys.executable,
+        os.path.join(REPO_DIR, "camping.py"),
+        "--api-url", url,
+        "--no-cache",
+        "--json-output",
+        "--start-date", start.isoformat(),
+        "--end-date", end.isoformat(),
+        *camping_args,
+        "--parks",
+        *[str(park_id) for park_id in park_ids],
+    ]
+
+
+def run_sweep(command, home_dir):
+    start = time.perf_counter()
+    # Keep the sweeps' logs out of the repo
+    env = dict(os.environ, RECREATION_GOV_BOT_HOME=home_dir)
+    result = subprocess.run(command, cwd=REPO_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        LOG.warning(f"Sweep failed: {result.stderr.strip().splitlines()[-1:]}")
+    return time.perf_counter() - start, result.returncode
+
+
+def run(args, camping_args):
+    server = server_from_args(args).start()
+    home_dir = tempfile.TemporaryDirectory()
+    start, end = sweep_dates(args.months)
+    command = sweep_command(
+        server.url, range(1, args.parks + 1), start, end, camping_args
+    )
+    try:
+        if args.warmup:
+            # Warm up the OS caches and the server's generated payloads
+            run_sweep(command, home_dir.name)
+            server.reset_stats()
+
+        durations = []
+        failures = 0
+        lock = threading.Lock()
+
+        def sweep(_):
+            nonlocal failures
+            seconds, returncode = run_sweep(command, home_dir.name)
+            with lock:
+                durations.append(seconds)
+                failures += returncode != 0
+
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(args.concurrency) as executor:
+            list(executor.map(sweep, range(args.sweeps)))
+        wall_seconds = time.perf_counter() - wall_start
+    finally:
+        server.stop()
+        home_dir.cleanup()
+
+    requests = sum(server.status_counts.values())
+    return {
+        "params": {
+            "parks": args.parks,
+            "months": args.months,
+            "sweeps": args.sweeps,
+            "concurrency": args.concurrency,
+            "camping_args": camping_args,
+            "latency": args.latency.spec,
+            "throttle_rate": args.throttle_rate,
+            "error_rate": args.error_rate,
+            "slow_body_rate": args.slow_body_rate,
+            "sites_per_park": args.sites_per_park,
+        },
+        "sweeps": {
+            "completed": len(durations) - failures,
+            "failed": failures,
+            "seconds": summarize(durations),
+        },
+        "throughput": {
+            "sweeps_per_second": len(durations) / wall_seconds,
+            "parks_per_second": len(durations) * args.parks / wall_seconds,
+            "requests_per_second": requests / wall_seconds,
+        },
+        "server": {
+            "requests": requests,
+            "status_counts": {str(k): v for k, v in sorted(server.status_counts.items())},
+            "request_seconds": summarize(server.durations),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        epilog="Any other options, e.g. --max-workers, are passed on to camping.py"
+    )
+    parser.add_argument("--parks", type=int, default=20)
+    parser.add_argument("--months", type=int, default=2)
+    parser.add_argument("--sweeps", type=int, default=10)
+    parser.add_argument(
+        "--concurrency", type=int, default=1, help="Sweeps to run at the same time"
+    )
+    parser.add_argument(
+        "--no-warmup", dest="warmup", action="store_false",
+        help="Don't run an untimed sweep first",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    add_server_arguments(parser)
+    args, camping_args = parser.parse_known_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args, camping_args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
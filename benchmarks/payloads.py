@@ -0,0 +1,73 @@
+"""
+Synthetic recreation.gov month payloads, shaped like other/sample.json.
+"""
+import calendar
+import random
+from datetime import datetime
+
+from enums.date_format import DateFormat
+
+CAMPSITE_TYPES = (
+    "STANDARD NONELECTRIC",
+    "STANDARD ELECTRIC",
+    "TENT ONLY NONELECTRIC",
+    "RV NONELECTRIC",
+    "GROUP STANDARD NONELECTRIC",
+    "WALK TO",
+)
+
+
+def generate_month(park_id, month_date, num_sites=100, density=0.3, campsite_types=CAMPSITE_TYPES, seed=None):
+    """
+    Generate the `month` availability payload of one park. Each night of
+    each site is "Available" with probability `density`, otherwise
+    "Reserved". Campsite IDs are stable for a given park_id, so months of
+    the same park describe the same sites.
+    """
+    rng = random.Random(seed if seed is not None else hash((park_id, month_date)))
+    days_in_month = calendar.monthrange(month_date.year, month_date.month)[1]
+    date_strs = [
+        datetime(month_date.year, month_date.month, day).strftime(
+            DateFormat.ISO_DATE_FORMAT_RESPONSE.value
+        )
+        for day in range(1, days_in_month + 1)
+    ]
+
+    campsites = {}
+    for site in range(num_sites):
+        campsite_id = str(int(park_id) * 10000 + site)
+        type_rng = random.Random(campsite_id)
+        campsites[campsite_id] = {
+            "availabilities": {
+                d: "Available" if rng.random() < density else "Reserved"
+                for d in date_strs
+            },
+            "campsite_id": campsite_id,
+            "campsite_reserve_type": "Site-Specific",
+            "campsite_type": type_rng.choice(campsite_types),
+            "capacity_rating": "Single",
+            "loop": "LOOP {}".format(site // 50),
+            "max_num_people": type_rng.choice((1, 6, 8)),
+            "min_num_people": 1,
+            "quantities": None,
+            "site": str(site),
+            "type_of_use": "Overnight",
+        }
+    return {"campsites": campsites, "count": num_sites}
+
+
+def generate_parks(num_parks, month_dates, sites_per_park=100, density=0.3, campsite_types=CAMPSITE_TYPES):
+    """
+    Generate `{park_id: [<month_data>, ...]}` for `num_parks` parks, the
+    same shape as `RecreationClient.get_parks_data` returns.
+    """
+    return {
+        park_id: [
+            generate_month(
+                park_id, m, sites_per_park, density, campsite_types,
+                seed=park_id * 100 + i,
+            )
+            for i, m in enumerate(month_dates)
+        ]
+        for park_id in range(1, num_parks + 1)
+    }
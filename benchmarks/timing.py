@@ -0,0 +1,18 @@
+"""
+Timing helpers shared by the benchmarks.
+"""
+import time
+
+
+def best_of(repeat, fn, *args):
+    """
+    Call `fn(*args)` `repeat` times. Returns the fastest call's time in
+    seconds and the result of the last call.
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
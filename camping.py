@@ -1,25 +1,38 @@
 # -*- coding: utf-8 -*-
 #!/usr/bin/env python3
 
+import cProfile
 import os, os.path
 import json
 import logging
+import signal
 import sys
-from collections import defaultdict
-from datetime import datetime, timedelta
-from itertools import count, groupby
+from collections import Counter
+from datetime import date, datetime, timedelta
 import time
 
 from dateutil import rrule
 
+from clients.campground_store import CampgroundStore
 from clients.recreation_client import RecreationClient
+from clients.request_archive import RequestArchive
+from clients.response_cache import ResponseCache
 from enums.date_format import DateFormat
 from enums.emoji import Emoji
-from utils import formatter
+from utils import availability_bitset, availability_matrix, formatter, metrics, pipe_format, site_model
 from utils.camping_argparser import CampingArgumentParser
+from utils.history_store import HistoryStore
+from utils.incremental_evaluation import IncrementalEvaluator
+from utils.profiler import PROFILER
+from utils.query_calendar import QueryCalendar
+from utils.site_filter import SiteFilter
+from utils.scheduler import PollScheduler
 
 script_path_list = os.path.normpath(__file__).split(os.sep)
-HOME_DIR = os.path.join("/", script_path_list[1], script_path_list[2])
+# The logs and caches go under $RECREATION_GOV_BOT_HOME/recreation-gov-bot if set
+HOME_DIR = os.environ.get("RECREATION_GOV_BOT_HOME") or os.path.join(
+    "/", script_path_list[1], script_path_list[2]
+)
 
 EXCLUDED_DATES_FILE = "excluded_dates.txt"
 LOG_PATH = f"{HOME_DIR}/recreation-gov-bot/log/"
@@ -28,6 +41,8 @@ if not os.path.exists(LOG_PATH):
     os.makedirs(LOG_PATH)
     
 LOG_FILE_TEMPLATE = "bot_camping_{}.log"
+CACHE_DIR = f"{HOME_DIR}/recreation-gov-bot/cache/"
+HISTORY_FILE = "history.db"
 
 LOG = logging.getLogger(__name__)
 LOG.setLevel(logging.DEBUG)
@@ -42,8 +57,19 @@ fileHandler = logging.FileHandler(LOG_PATH + LOG_FILE_TEMPLATE.format(datetime.u
 fileHandler.setFormatter(log_formatter)
 LOG.addHandler(fileHandler)
 
+def get_months(start_date, end_date):
+    """
+    Get each first of the month for months in the range we care about.
+    """
+    start_of_month = datetime(start_date.year, start_date.month, 1)
+    return list(
+        rrule.rrule(rrule.MONTHLY, dtstart=start_of_month, until=end_date)
+    )
+
+
 def get_park_information(
-    park_id, start_date, end_date, campsite_type=None, campsite_ids=(), excluded_site_ids=[]
+    park_id, start_date, end_date, campsite_type=None, campsite_ids=(), excluded_site_ids=[], api_data=None,
+    campsites=None, site_filter=None,
 ):
     """
     This function consumes the user intent, collects the necessary information
@@ -65,148 +91,148 @@ def get_park_information(
 
     Notably, the output doesn't tell you which sites are available. The rest of
     the script doesn't need to know this to determine whether sites are available.
+
+    If `api_data` (the list of month payloads for this park) has already been
+    fetched, e.g. by `RecreationClient.get_parks_data`, it is used as is
+    instead of hitting the API again.
+
+    `campsites` maps campsite IDs to their stored details (see
+    `CampgroundStore`); the site filters use those instead of the fields
+    repeated in every month payload.
+
+    `site_filter` is the query's `SiteFilter`, built from `campsite_type`,
+    `campsite_ids` and `excluded_site_ids` if not given. Each site is judged
+    once, and filtered out sites are counted by reason rather than logged.
     """
 
     LOG.info(f"Getting info for park {park_id}...")
 
-    # Get each first of the month for months in the range we care about.
-    start_of_month = datetime(start_date.year, start_date.month, 1)
-    months = list(
-        rrule.rrule(rrule.MONTHLY, dtstart=start_of_month, until=end_date)
-    )
-
     # Get data for each month.
-    api_data = []
-    for month_date in months:
-        month_data = RecreationClient.get_availability(park_id, month_date)
-        if month_data:
-            api_data.append(month_data)
+    if api_data is None:
+        api_data = RecreationClient.get_availabilities(
+            park_id, get_months(start_date, end_date)
+        )
 
     # Collapse the data into the described output format.
     # Filter by campsite_type if necessary.
+    if site_filter is None:
+        site_filter = SiteFilter(campsite_type, campsite_ids, excluded_site_ids)
     data = {}
+    campsites = campsites or {}
+    # campsite_id -> whether its dates are wanted, or None if it is filtered out
+    wanted_by_campsite_id = {}
+    rejected = Counter()
 
+    start = time.perf_counter() if PROFILER.enabled else None
     for month_data in api_data:
         for campsite_id, campsite_data in month_data["campsites"].items():
-            if campsite_id in excluded_site_ids:
-                continue
-            # Filter out sites that don't accept enough people
-            if ("max_num_people" in campsite_data and campsite_data["max_num_people"] < 2):
-                LOG.warning(f"Skipping site {campsite_id}, accepts {campsite_data['max_num_people']} people max")
-                continue
-
-            # Filter out sites that are day use only
-            if ("type_of_use" in campsite_data and campsite_data["type_of_use"].lower() != "overnight"):
-                LOG.warning(f"Skipping site {campsite_id}, use type is {campsite_data['type_of_use']}")
+            if campsite_id in wanted_by_campsite_id:
+                wanted = wanted_by_campsite_id[campsite_id]
+            else:
+                # Prefer the stored campsite details over the month payload's
+                reason = site_filter.reject_reason(
+                    campsite_id, campsites.get(campsite_id, campsite_data)
+                )
+                if reason is None:
+                    wanted = site_filter.wants_dates(campsite_data)
+                else:
+                    rejected[reason] += 1
+                    wanted = None
+                wanted_by_campsite_id[campsite_id] = wanted
+            if wanted is None:
                 continue
 
-            # Filter out group, walk-in, and management sites, and other types that don't match requested
-            if (
-                campsite_type
-                and (campsite_type != campsite_data["campsite_type"])
-            ):
-                LOG.warning(f"Skipping site {campsite_id}, type is {campsite_data['campsite_type']}")
-                continue
-        
-            if (campsite_data["campsite_type"] and ("group" in campsite_data["campsite_type"].lower()
-                        or "management" in campsite_data["campsite_type"].lower()
-                        or "walk" in campsite_data["campsite_type"].lower()
-                        or "hike" in campsite_data["campsite_type"].lower())):
-                LOG.warning(f"Skipping site {campsite_id}, type is {campsite_data['campsite_type']}")
-                continue
-            
-            if (campsite_id == "79131"):
-                LOG.info("walk in site")
-
-            available = []
-            a = data.setdefault(campsite_id, [])
-            for date, availability_value in campsite_data[
-                "availabilities"
-            ].items():
-                if availability_value != "Available":
-                    continue
-
-                if (
-                    len(campsite_ids) > 0
-                    and int(campsite_data["campsite_id"]) not in campsite_ids
-                ):
-                    continue
-
-                available.append(date)
-            if available:
-                a += available
+            dates = data.setdefault(campsite_id, [])
+            if wanted:
+                dates += [
+                    date
+                    for date, availability_value in campsite_data["availabilities"].items()
+                    if availability_value == "Available"
+                ]
+    if start is not None:
+        PROFILER.add_time("filter sites", time.perf_counter() - start, park_id)
+        # Each site once, however many months it appears in
+        PROFILER.count("sites scanned", len(wanted_by_campsite_id))
+    if rejected:
+        for reason, count in rejected.items():
+            PROFILER.count(f"sites filtered ({reason})", count)
+        LOG.info(
+            f"Skipped {sum(rejected.values())} sites at park {park_id}: "
+            + ", ".join(f"{count} ({reason})" for reason, count in rejected.items())
+        )
 
     return data
 
-def is_weekend(date):
-    weekday = date.weekday()
-
-    return weekday == 4 or weekday == 5
-
-
-def get_num_available_sites(
-    park_information, start_date, end_date, nights=None, weekends_only=False,
-):
-    maximum = len(park_information)
-
-    num_available = 0
-    num_days = (end_date - start_date).days
-    dates = [end_date - timedelta(days=i) for i in range(1, num_days + 1)]
 
-    # account for any excluded dates in excluded_dates.txt
-    excluded_dates = {}
+def load_excluded_dates():
+    # account for any excluded dates in excluded_dates.txt, as `date`s
     try:
         with open(EXCLUDED_DATES_FILE, "r") as f:
             excluded_dates_strs = {l.strip() for l in f.read().split("\n")}
-            if excluded_dates_strs:
-                LOG.warning(f"Excluding results for the following dates: {', '.join(excluded_dates_strs)}")
-                # convert dates to %Y-%m-%d format to do comparison with exclusion set
-                dates = [d for d in dates if d.strftime(DateFormat.INPUT_DATE_FORMAT.value) not in excluded_dates_strs]
     except FileNotFoundError:
-        pass
+        return set()
+    excluded_dates_strs.discard("")
+    excluded_dates = set()
+    for excluded_date_str in sorted(excluded_dates_strs):
+        try:
+            excluded_dates.add(
+                datetime.strptime(excluded_date_str, DateFormat.INPUT_DATE_FORMAT.value).date()
+            )
+        except ValueError:
+            LOG.warning(f"Ignoring {excluded_date_str!r} in {EXCLUDED_DATES_FILE}, it isn't a date")
+    if excluded_dates:
+        LOG.warning(
+            "Excluding results for the following dates: "
+            + ", ".join(sorted(d.strftime(DateFormat.INPUT_DATE_FORMAT.value) for d in excluded_dates))
+        )
+    return excluded_dates
 
-    if weekends_only:
-        dates = filter(is_weekend, dates)
 
-    dates = set(
-        formatter.format_date(
-            i, format_string=DateFormat.ISO_DATE_FORMAT_RESPONSE.value
-        )
-        for i in dates
+def build_calendar(start_date, end_date, nights=None, weekends_only=False):
+    """
+    Compile the nights of a query, with the dates in excluded_dates.txt, once
+    for all the parks it is checked against.
+    """
+    return QueryCalendar(
+        start_date, end_date, nights, weekends_only, excluded_dates=load_excluded_dates()
     )
 
-    if nights not in range(1, num_days + 1):
-        nights = num_days
-        LOG.debug("Setting number of nights to {}.".format(nights))
-
-    available_dates_by_campsite_id = defaultdict(list)
-    for site, availabilities in park_information.items():
-        # List of dates that are in the desired range for this site.
-        desired_available = []
 
-        for date in availabilities:
-            if date not in dates:
-                continue
-            desired_available.append(date)
+def get_num_available_sites(
+    park_information, start_date, end_date, nights=None, weekends_only=False, calendar=None,
+):
+    """
+    `calendar` is the `QueryCalendar` of the query, built from the other
+    arguments if not given.
+    """
+    if calendar is None:
+        calendar = build_calendar(start_date, end_date, nights, weekends_only)
+    with PROFILER.stage("available sites"):
+        campsites = get_available_campsites(park_information, calendar)
+    return len(campsites), len(park_information), site_model.ranges_by_site_id(campsites)
 
-        if not desired_available:
-            continue
 
-        appropriate_consecutive_ranges = consecutive_nights(
-            desired_available, nights
+def get_available_campsites(park_information, calendar):
+    """
+    A compact `site_model.Campsite` for each site of `park_information` with
+    enough consecutive nights available, in the same order.
+    """
+    if PROFILER.enabled:
+        PROFILER.count(
+            "dates evaluated", sum(len(a) for a in park_information.values())
         )
 
-        if appropriate_consecutive_ranges:
-            num_available += 1
-            LOG.debug("Available site {}: {}".format(num_available, site))
+    campsites = []
+    for site, availabilities in park_information.items():
+        # Offsets from which enough nights are available and in the desired range
+        starts = calendar.run_starts(availabilities)
+        if not starts:
+            continue
 
-        for r in appropriate_consecutive_ranges:
-            start, end = r
-            available_dates_by_campsite_id[int(site)].append(
-                {"start": start, "end": end}
-            )
+        LOG.debug("Available site {}: {}".format(len(campsites) + 1, site))
+        campsites.append(site_model.Campsite.from_run_starts(site, calendar, starts))
 
-    return num_available, maximum, available_dates_by_campsite_id
+    return campsites
 
 
 def consecutive_nights(available, nights):
@@ -217,104 +243,196 @@ def consecutive_nights(available, nights):
     If there is one or more entries in this list, there is at least one
     date range for this site that is available.
     """
-    ordinal_dates = [
-        datetime.strptime(
-            dstr, DateFormat.ISO_DATE_FORMAT_RESPONSE.value
-        ).toordinal()
-        for dstr in available
-    ]
-    c = count()
-
-    consecutive_ranges = list(
-        list(g) for _, g in groupby(ordinal_dates, lambda x: x - next(c))
-    )
+    if not available:
+        return []
+    ordinals = [date.fromisoformat(dstr[:10]).toordinal() for dstr in available]
+    first_ordinal = min(ordinals)
+    mask = 0
+    for ordinal in ordinals:
+        mask |= 1 << (ordinal - first_ordinal)
 
     long_enough_consecutive_ranges = []
-    for r in consecutive_ranges:
-        # Skip ranges that are too short.
-        if len(r) < nights:
-            continue
-        for start_index in range(0, len(r) - nights + 1):
-            start_nice = formatter.format_date(
-                datetime.fromordinal(r[start_index]),
-                format_string=DateFormat.INPUT_DATE_FORMAT.value,
-            )
-            end_nice = formatter.format_date(
-                datetime.fromordinal(r[start_index + nights - 1] + 1),
-                format_string=DateFormat.INPUT_DATE_FORMAT.value,
-            )
-            long_enough_consecutive_ranges.append((start_nice, end_nice))
+    for offset in availability_bitset.iter_offsets(
+        availability_bitset.run_starts(mask, nights)
+    ):
+        start_nice = formatter.format_date(
+            datetime.fromordinal(first_ordinal + offset),
+            format_string=DateFormat.INPUT_DATE_FORMAT.value,
+        )
+        end_nice = formatter.format_date(
+            datetime.fromordinal(first_ordinal + offset + nights),
+            format_string=DateFormat.INPUT_DATE_FORMAT.value,
+        )
+        long_enough_consecutive_ranges.append((start_nice, end_nice))
 
     return long_enough_consecutive_ranges
 
 
 def check_park(
     park_id, start_date, end_date, campsite_type, campsite_ids=(), nights=None, weekends_only=False, excluded_site_ids=[],
+    api_data=None, park_name=None, evaluator=None, calendar=None, site_filter=None, compact=False,
 ):
-    park_information = get_park_information(
-        park_id, start_date, end_date, campsite_type, campsite_ids, excluded_site_ids=excluded_site_ids,
-    )
-    # LOG.debug(
-    #     "Information for park {}: {}".format(
-    #         park_id, json.dumps(park_information, indent=2)
-    #     )
-    # )
-    park_name = RecreationClient.get_park_name(park_id)
-    current, maximum, availabilities_filtered = get_num_available_sites(
-        park_information, start_date, end_date, nights=nights, weekends_only=weekends_only,
-    )
+    """
+    With an `IncrementalEvaluator` (and `api_data`), only the sites whose
+    data changed since the park was last checked are evaluated again.
+    Pass the query's `calendar` (see `build_calendar`) and `site_filter`
+    when checking several parks, so they are only built once.
+
+    With `compact`, the available sites are a list of `site_model.Campsite`
+    records rather than the usual dict of date ranges; see
+    `site_model.expand_info` to output them.
+    """
+    if calendar is None:
+        calendar = build_calendar(start_date, end_date, nights, weekends_only)
+    if site_filter is None:
+        site_filter = SiteFilter(campsite_type, campsite_ids, excluded_site_ids)
+    metadata = RecreationClient.metadata
+    campsites = metadata.get_campsites(park_id) if metadata else None
+
+    def evaluate(api_data):
+        park_information = get_park_information(
+            park_id, start_date, end_date, campsite_type, campsite_ids, excluded_site_ids=excluded_site_ids,
+            api_data=api_data,
+            campsites=campsites,
+            site_filter=site_filter,
+        )
+        # LOG.debug(
+        #     "Information for park {}: {}".format(
+        #         park_id, json.dumps(park_information, indent=2)
+        #     )
+        # )
+        with PROFILER.stage("available sites", park_id):
+            return park_information, get_available_campsites(park_information, calendar)
+
+    if evaluator is not None and api_data is not None:
+        query = (calendar.key, site_filter.key)
+        current, maximum, available_campsites = evaluator.evaluate(
+            park_id, api_data, query, evaluate, campsites
+        )
+    else:
+        park_information, available_campsites = evaluate(api_data)
+        current, maximum = len(available_campsites), len(park_information)
+    if compact:
+        availabilities_filtered = available_campsites
+    else:
+        availabilities_filtered = site_model.ranges_by_site_id(available_campsites)
+
+    if park_name is None and metadata is not None:
+        park_name = metadata.get_name(park_id)
+    if park_name is None:
+        park_name = RecreationClient.get_park_name(park_id)
     return current, maximum, availabilities_filtered, park_name
 
 
+def check_parks_vectorized(
+    park_ids, start_date, end_date, campsite_type, campsite_ids=(), nights=None, weekends_only=False, excluded_site_ids=[],
+    api_data_by_park_id=None, name_by_park_id=None,
+):
+    """
+    Same as calling `check_park` for every park, but evaluates all of them
+    at once on a NumPy sites x days matrix. Needs the month payloads and
+    names fetched up front by `RecreationClient.get_parks_data`.
+    """
+    metadata = RecreationClient.metadata
+    with PROFILER.stage("vectorized evaluation"):
+        results = availability_matrix.evaluate_parks(
+            {park_id: api_data_by_park_id[park_id] for park_id in park_ids},
+            start_date,
+            end_date,
+            campsite_type,
+            campsite_ids,
+            excluded_site_ids,
+            nights=nights,
+            weekends_only=weekends_only,
+            excluded_dates=load_excluded_dates(),
+            campsites_by_park_id={
+                park_id: metadata.get_campsites(park_id) for park_id in park_ids
+            } if metadata else None,
+        )
+    return {
+        park_id: results[park_id] + (name_by_park_id.get(park_id, str(park_id)),)
+        for park_id in park_ids
+    }
+
+
 def generate_human_output(
     info_by_park_id, start_date, end_date, gen_campsite_info=False
 ):
     out = []
     has_availabilities = False
     for park_id, info in info_by_park_id.items():
-        current, maximum, available_dates_by_site_id, park_name = info
-        if current:
-            emoji = Emoji.SUCCESS.value
+        if info[0]:
             has_availabilities = True
-        else:
-            emoji = Emoji.FAILURE.value
-
-        out.append(
-            "{emoji} {park_name} ({park_id}): {current} site(s) available out of {maximum} site(s)".format(
-                emoji=emoji,
-                park_name=park_name,
-                park_id=park_id,
-                current=current,
-                maximum=maximum,
-            )
+        out += generate_human_park_lines(park_id, info, gen_campsite_info)
+
+    out.insert(0, generate_human_header(has_availabilities, start_date, end_date))
+    return "\n".join(out), has_availabilities
+
+
+def generate_human_header(has_availabilities, start_date, end_date):
+    if has_availabilities:
+        return "There are campsites available from {start} to {end}!!!\nGo to https://www.recreation.gov/camping/campsites/<siteNumber> to reserve".format(
+            start=start_date.strftime(DateFormat.INPUT_DATE_FORMAT.value),
+            end=end_date.strftime(DateFormat.INPUT_DATE_FORMAT.value),
         )
+    return "There are no campsites available :("
+
 
-        # Displays campsite ID and availability dates.
-        if gen_campsite_info and available_dates_by_site_id:
-            for site_id, dates in available_dates_by_site_id.items():
+def generate_human_park_lines(park_id, info, gen_campsite_info=False):
+    current, maximum, available_dates_by_site_id, park_name = info
+    if current:
+        emoji = Emoji.SUCCESS.value
+    else:
+        emoji = Emoji.FAILURE.value
+
+    out = [
+        "{emoji} {park_name} ({park_id}): {current} site(s) available out of {maximum} site(s)".format(
+            emoji=emoji,
+            park_name=park_name,
+            park_id=park_id,
+            current=current,
+            maximum=maximum,
+        )
+    ]
+
+    # Displays campsite ID and availability dates.
+    if gen_campsite_info and available_dates_by_site_id:
+        for site_id, dates in available_dates_by_site_id.items():
+            out.append(
+                "  * Site {site_id} is available on the following dates:".format(
+                    site_id=site_id
+                )
+            )
+            for date in dates:
                 out.append(
-                    "  * Site {site_id} is available on the following dates:".format(
-                        site_id=site_id
+                    "    * {start} -> {end}".format(
+                        start=date["start"], end=date["end"]
                     )
                 )
-                for date in dates:
-                    out.append(
-                        "    * {start} -> {end}".format(
-                            start=date["start"], end=date["end"]
-                        )
-                    )
+    return out
 
-    if has_availabilities:
-        out.insert(
-            0,
-            "There are campsites available from {start} to {end}!!!\nGo to https://www.recreation.gov/camping/campsites/<siteNumber> to reserve".format(
-                start=start_date.strftime(DateFormat.INPUT_DATE_FORMAT.value),
-                end=end_date.strftime(DateFormat.INPUT_DATE_FORMAT.value),
-            ),
-        )
-    else:
-        out.insert(0, "There are no campsites available :(")
-    return "\n".join(out), has_availabilities
+
+def write_human_output(
+    park_infos, start_date, end_date, gen_campsite_info=False, stream=None
+):
+    """
+    Write the lines for each (park_id, info) pair as soon as it is produced.
+    The header depends on every park, so it is written last as a trailer.
+    Returns whether any park has availabilities.
+    """
+    stream = stream or sys.stdout
+    has_availabilities = False
+    for park_id, info in park_infos:
+        has_availabilities = has_availabilities or bool(info[0])
+        with PROFILER.stage("render", park_id):
+            lines = generate_human_park_lines(park_id, info, gen_campsite_info)
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+    header = generate_human_header(has_availabilities, start_date, end_date)
+    stream.write(header + "\n")
+    stream.flush()
+    LOG.info(header)
+    return has_availabilities
 
 
 def generate_json_output(info_by_park_id):
@@ -329,6 +447,53 @@ def generate_json_output(info_by_park_id):
     return json.dumps(availabilities_by_park_id), has_availabilities
 
 
+def write_json_output(park_infos, stream=None):
+    """
+    Stream the same JSON object as `generate_json_output`, writing each park
+    with availabilities as soon as it is produced.
+    Returns whether any park has availabilities.
+    """
+    stream = stream or sys.stdout
+    has_availabilities = False
+    stream.write("{")
+    for park_id, info in park_infos:
+        current, _, available_dates_by_site_id, _ = info
+        if not current:
+            continue
+        if has_availabilities:
+            stream.write(", ")
+        with PROFILER.stage("render", park_id):
+            # Strip the braces to get the `"<park_id>": {...}` member
+            stream.write(json.dumps({park_id: available_dates_by_site_id})[1:-1])
+            stream.flush()
+        has_availabilities = True
+    stream.write("}\n")
+    stream.flush()
+    return has_availabilities
+
+
+def write_records(park_infos, start_date, end_date, fmt, stream=None):
+    """
+    Write a pipe record for each (park_id, info) pair as soon as it is
+    produced, then a summary record carrying the human output's header.
+    Returns whether any park has availabilities.
+    """
+    stream = stream or sys.stdout
+    has_availabilities = False
+    for park_id, info in park_infos:
+        has_availabilities = has_availabilities or bool(info[0])
+        with PROFILER.stage("render", park_id):
+            pipe_format.write_record(
+                stream, pipe_format.park_record(park_id, info), fmt
+            )
+    header = generate_human_header(has_availabilities, start_date, end_date)
+    pipe_format.write_record(
+        stream, pipe_format.summary_record(has_availabilities, header), fmt
+    )
+    LOG.info(header)
+    return has_availabilities
+
+
 def remove_comments(lines: list[str]) -> list[str]:
     new_lines = []
     for line in lines:
@@ -358,41 +523,277 @@ def validate_dates(start_date : datetime, end_date: datetime):
     return (start_date, end_date)
 
 
-def main(parks, json_output=False):
-    excluded_site_ids = []
+def load_excluded_site_ids(exclusion_file):
+    if not exclusion_file:
+        return []
+    with open(exclusion_file, "r") as f:
+        excluded_site_ids = f.readlines()
+        excluded_site_ids = [l.strip() for l in excluded_site_ids]
+        return remove_comments(excluded_site_ids)
 
-    if args.exclusion_file:
-        with open(args.exclusion_file, "r") as f:
-            excluded_site_ids = f.readlines()
-            excluded_site_ids = [l.strip() for l in excluded_site_ids]
-            excluded_site_ids = remove_comments(excluded_site_ids)
 
-    validated_start_date, validated_end_date = validate_dates(args.start_date, args.end_date)
+def configure_client(args):
+    """
+    Set up RecreationClient from the concurrency, timeout and cache options.
+    """
+    RecreationClient.configure(
+        max_workers=args.max_workers,
+        read_timeout=args.request_timeout,
+        requests_per_second=args.requests_per_second,
+        base_url=args.api_url,
+        streaming_decode=args.streaming_decode,
+    )
+    RecreationClient.set_deadline(args.deadline)
+    if args.record:
+        RecreationClient.use_recorder(RequestArchive(args.record))
+    if args.replay:
+        RecreationClient.use_replay(RequestArchive(args.replay), args.replay_timing)
+    if args.record_history:
+        RecreationClient.use_history_store(
+            HistoryStore(os.path.join(args.cache_dir or CACHE_DIR, HISTORY_FILE))
+        )
+    if args.cache:
+        cache = ResponseCache(args.cache_dir or CACHE_DIR)
+        cache.prune()
+        RecreationClient.use_cache(cache)
+    if not args.no_cache:
+        RecreationClient.use_metadata_store(
+            CampgroundStore(args.cache_dir or CACHE_DIR)
+        )
+
+
+def save_client_state():
+    LOG.info(f"Requests: {RecreationClient.rate_limiter.stats}")
+    if RecreationClient.recorder is not None:
+        RecreationClient.recorder.flush()
+    if RecreationClient.cache is not None:
+        LOG.info(f"Month cache: {RecreationClient.cache.stats}")
+    if RecreationClient.metadata is not None:
+        RecreationClient.metadata.save()
+
+
+def watch(parks, json_output=False):
+    """
+    Long-running alternative to running `main` from cron: the client, its
+    caches and the latest results stay in memory, each park is re-polled on
+    its own schedule, and changes are notified (or printed) directly.
+    """
+    excluded_site_ids = load_excluded_site_ids(args.exclusion_file)
+    configure_client(args)
+
+    notify = None
+    if args.notify:
+        # Only the daemon needs the notifier and its dependencies
+        import notifier
+
+        notification_method = (
+            notifier.NotificationMethod.EMAIL if args.email else notifier.NotificationMethod.TWITTER
+        )
+        users = notifier.parse_users(args.notify, notification_method)
+        tc = notifier.load_credentials() if notification_method == notifier.NotificationMethod.TWITTER else None
+
+        def notify(info_by_park_id, first_line):
+            notifier.notify(
+                notifier.get_availability_data_from_info(info_by_park_id),
+                first_line,
+                users,
+                notification_method,
+                tc,
+            )
+            notifier.cleanup_files()
 
     info_by_park_id = {}
-    for park_id in parks:
-        info_by_park_id[park_id] = check_park(
+    evaluator = IncrementalEvaluator()
+    site_filter = SiteFilter(args.campsite_type, args.campsite_ids, excluded_site_ids)
+
+    def poll(park_ids):
+        validated_start_date, validated_end_date = validate_dates(args.start_date, args.end_date)
+        RecreationClient.set_deadline(args.deadline)
+        api_data_by_park_id, name_by_park_id = RecreationClient.get_parks_data(
+            park_ids, get_months(validated_start_date, validated_end_date)
+        )
+        changed_park_ids = []
+        evaluated = dict(evaluator.stats)
+        calendar = build_calendar(
+            validated_start_date, validated_end_date, args.nights, args.weekends_only
+        )
+        for park_id in park_ids:
+            start = time.perf_counter()
+            info = check_park(
+                park_id,
+                validated_start_date,
+                validated_end_date,
+                args.campsite_type,
+                args.campsite_ids,
+                nights=args.nights,
+                weekends_only=args.weekends_only,
+                excluded_site_ids=excluded_site_ids,
+                api_data=api_data_by_park_id[park_id],
+                park_name=name_by_park_id.get(park_id, str(park_id)),
+                evaluator=evaluator,
+                calendar=calendar,
+                site_filter=site_filter,
+                compact=True,
+            )
+            metrics.PARK_EVALUATION_SECONDS.set(
+                time.perf_counter() - start, park=park_id
+            )
+            metrics.PARK_SITES_AVAILABLE.set(info[0], park=park_id)
+            metrics.PARK_SITES_TOTAL.set(info[1], park=park_id)
+            if info != info_by_park_id.get(park_id):
+                changed_park_ids.append(park_id)
+            info_by_park_id[park_id] = info
+        recomputed = evaluator.stats["recomputed"] - evaluated["recomputed"]
+        reused = evaluator.stats["reused"] - evaluated["reused"]
+        LOG.info(f"Sites recomputed: {recomputed}, reused: {reused}")
+        save_client_state()
+        if not changed_park_ids:
+            LOG.debug(f"No changes for parks {park_ids}")
+            return changed_park_ids
+
+        expanded_info_by_park_id = {
+            park_id: site_model.expand_info(info)
+            for park_id, info in info_by_park_id.items()
+        }
+        if json_output and notify is None:
+            output, _ = generate_json_output(expanded_info_by_park_id)
+        else:
+            output, _ = generate_human_output(
+                expanded_info_by_park_id,
+                validated_start_date,
+                validated_end_date,
+                args.show_campsite_info,
+            )
+        if notify is None:
+            print(output, flush=True)
+        else:
+            # Same summary line the piped notifier would have read first.
+            # Called even without availabilities, so the notifier's snapshot
+            # forgets the ranges that closed.
+            notify(expanded_info_by_park_id, output.split("\n")[0])
+        return changed_park_ids
+
+    scheduler = PollScheduler(
+        parks,
+        args.poll_interval,
+        min_interval=args.min_poll_interval,
+        max_interval=args.max_poll_interval,
+    )
+    # Log the scheduler's interval changes, and why, with ours
+    scheduler_log = logging.getLogger(PollScheduler.__module__)
+    scheduler_log.setLevel(logging.INFO)
+    for handler in LOG.handlers:
+        scheduler_log.addHandler(handler)
+    def log_status(*_):
+        LOG.info("Poll schedule:\n" + scheduler.format_schedule())
+        if PROFILER.enabled:
+            LOG.info("Profile:\n" + PROFILER.report())
+
+    if hasattr(signal, "SIGUSR1"):
+        # `kill -USR1 <pid>` logs why each park is polled at its rate
+        signal.signal(signal.SIGUSR1, log_status)
+    if args.metrics_port:
+        metrics.METRICS.enable()
+        metrics.METRICS.serve(args.metrics_port)
+    LOG.info(f"Watching {len(parks)} parks every {args.poll_interval}s")
+    scheduler.run(poll)
+
+
+def iter_park_infos(parks, start_date, end_date, excluded_site_ids):
+    """
+    Yield (park_id, info) for each park as soon as its data has been fetched
+    and checked, in the order the parks finish. With --vectorized, every park
+    is fetched and evaluated together before the first one is yielded.
+    """
+    month_dates = get_months(start_date, end_date)
+    if args.vectorized:
+        api_data_by_park_id, name_by_park_id = RecreationClient.get_parks_data(
+            parks, month_dates
+        )
+        yield from check_parks_vectorized(
+            parks,
+            start_date,
+            end_date,
+            args.campsite_type,
+            args.campsite_ids,
+            nights=args.nights,
+            weekends_only=args.weekends_only,
+            excluded_site_ids=excluded_site_ids,
+            api_data_by_park_id=api_data_by_park_id,
+            name_by_park_id=name_by_park_id,
+        ).items()
+        return
+
+    calendar = build_calendar(start_date, end_date, args.nights, args.weekends_only)
+    site_filter = SiteFilter(args.campsite_type, args.campsite_ids, excluded_site_ids)
+    for park_id, api_data, park_name in RecreationClient.iter_parks_data(
+        parks, month_dates
+    ):
+        yield park_id, check_park(
             park_id,
-            validated_start_date,
-            validated_end_date,
+            start_date,
+            end_date,
             args.campsite_type,
             args.campsite_ids,
             nights=args.nights,
             weekends_only=args.weekends_only,
             excluded_site_ids=excluded_site_ids,
+            api_data=api_data,
+            # Fall back to the ID if the name didn't arrive before the deadline
+            park_name=park_name or str(park_id),
+            calendar=calendar,
+            site_filter=site_filter,
         )
 
-    if json_output:
-        output, has_availabilities = generate_json_output(info_by_park_id)
-    else:
-        output, has_availabilities = generate_human_output(
-            info_by_park_id,
+
+def main(parks, json_output=False):
+    excluded_site_ids = load_excluded_site_ids(args.exclusion_file)
+
+    validated_start_date, validated_end_date = validate_dates(args.start_date, args.end_date)
+
+    configure_client(args)
+
+    # Every park x month request is sent up front and runs concurrently;
+    # parks are checked as their data arrives.
+    park_infos = iter_park_infos(
+        parks, validated_start_date, validated_end_date, excluded_site_ids
+    )
+
+    if args.pipe_format:
+        has_availabilities = write_records(
+            park_infos, validated_start_date, validated_end_date, args.pipe_format
+        )
+    elif args.stream and json_output:
+        has_availabilities = write_json_output(park_infos)
+    elif args.stream:
+        has_availabilities = write_human_output(
+            park_infos,
             validated_start_date,
             validated_end_date,
             args.show_campsite_info,
         )
-    LOG.info(output)
-    print(output)
+    else:
+        # The header comes first, so wait for every park and keep their order
+        info_by_park_id = dict(park_infos)
+        info_by_park_id = {
+            park_id: info_by_park_id[park_id]
+            for park_id in parks
+            if park_id in info_by_park_id
+        }
+        with PROFILER.stage("render"):
+            if json_output:
+                output, has_availabilities = generate_json_output(info_by_park_id)
+            else:
+                output, has_availabilities = generate_human_output(
+                    info_by_park_id,
+                    validated_start_date,
+                    validated_end_date,
+                    args.show_campsite_info,
+                )
+        LOG.info(output)
+        print(output)
+
+    save_client_state()
     return has_availabilities
 
 
@@ -404,10 +805,26 @@ if __name__ == "__main__":
     # if args.debug:
     #     LOG.setLevel(logging.DEBUG)
 
-    main(args.parks, json_output=args.json_output)
+    if args.profile:
+        PROFILER.enable()
+    profile = cProfile.Profile() if args.profile_output else None
+    if profile:
+        profile.enable()
+
+    if args.watch:
+        watch(args.parks, json_output=args.json_output)
+    else:
+        main(args.parks, json_output=args.json_output)
     end = time.perf_counter()
     LOG.info(f"Found campsites in {end-start}s")
 
+    if profile:
+        profile.disable()
+        profile.dump_stats(args.profile_output)
+    if args.profile:
+        # stdout may be piped into the notifier
+        print(PROFILER.report(), file=sys.stderr)
+
 """
 Usage:
 python3 camping.py --start-date 2023-07-21 --end-date 2023-09-30 --stdin < parks.txt --weekends-only --nights 2 --show-campsite-info
@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import timedelta
+
+LOG = logging.getLogger(__name__)
+
+CAMPGROUNDS_FILE = "campgrounds.json"
+# Campground names and campsite lists almost never change
+METADATA_TTL = timedelta(days=7)
+CAMPSITE_FIELDS = ("campsite_type", "max_num_people", "type_of_use")
+
+
+class CampgroundStore:
+    """
+    Local store of campground metadata, so the campground name and the
+    details of each campsite don't have to be fetched on every run.
+
+    The store is a single JSON file that looks like this:
+
+    {"<park_id>": {"name": <name>, "updated_at": <timestamp>,
+                   "campsites": {"<campsite_id>": {"campsite_type": ...,
+                                                   "max_num_people": ...,
+                                                   "type_of_use": ...}}}}
+    """
+
+    def __init__(self, cache_dir, ttl=METADATA_TTL):
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self.path = os.path.join(cache_dir, CAMPGROUNDS_FILE)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r") as f:
+                self.campgrounds = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.campgrounds = {}
+
+    def get(self, park_id):
+        return self.campgrounds.get(str(park_id))
+
+    def get_name(self, park_id):
+        campground = self.get(park_id)
+        return campground["name"] if campground else None
+
+    def get_campsites(self, park_id):
+        campground = self.get(park_id)
+        return campground["campsites"] if campground else {}
+
+    def is_stale(self, park_id):
+        campground = self.get(park_id)
+        if campground is None:
+            return True
+        return time.time() - campground["updated_at"] > self.ttl.total_seconds()
+
+    def update(self, park_id, name, month_data_list):
+        """
+        Refresh a campground from its name and month availability payloads,
+        which carry the details of every campsite. Without any month data
+        the campground is left as is, so it is refreshed again next run.
+        """
+        if not month_data_list:
+            return
+        campsites = {}
+        for month_data in month_data_list:
+            for campsite_id, campsite_data in month_data["campsites"].items():
+                campsites[campsite_id] = {
+                    field: campsite_data[field]
+                    for field in CAMPSITE_FIELDS
+                    if field in campsite_data
+                }
+        with self._lock:
+            self.campgrounds[str(park_id)] = {
+                "name": name,
+                "updated_at": time.time(),
+                "campsites": campsites,
+            }
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.campgrounds, f)
+            os.replace(tmp_path, self.path)
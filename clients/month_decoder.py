@@ -0,0 +1,132 @@
+"""
+Incremental decoding of month availability payloads.
+
+A month payload is `{"campsites": {"<id>": {...}, ...}, "count": N}`, and
+most of each campsite is fields we don't use and nights that aren't
+available. Rather than materializing the whole document, the body is read
+chunk by chunk and each campsite is decoded on its own (with the C JSON
+decoder), cut down to the fields the site filters need and its available
+nights, and dropped. Only one campsite and one chunk are held undecoded.
+"""
+import codecs
+import json
+import re
+
+# Fields kept for each campsite; the first is what --campsite-ids matches,
+# the others are CampgroundStore.CAMPSITE_FIELDS
+SITE_FIELDS = ("campsite_id", "campsite_type", "max_num_people", "type_of_use")
+AVAILABLE = "Available"
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+def compact_site(site):
+    compact = {field: site[field] for field in SITE_FIELDS if field in site}
+    compact["availabilities"] = {
+        date: value
+        for date, value in site.get("availabilities", {}).items()
+        if value == AVAILABLE
+    }
+    return compact
+
+
+class _Reader:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        """
+        Append the next chunk to the buffer. Returns False at the end.
+        """
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.buf += self._utf8.decode(b"", final=True)
+            return False
+        if self.pos > len(self.buf) // 2:
+            # Drop what has been consumed before it grows the buffer
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += self._utf8.decode(chunk)
+        return True
+
+    def peek(self):
+        """
+        The next non-whitespace character, without consuming it.
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read():
+                raise ValueError("Unexpected end of month payload")
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(
+                f"Expected {char!r} at {self.pos} of month payload, got {self.buf[self.pos]!r}"
+            )
+        self.pos += 1
+
+    def value(self):
+        """
+        Decode the next JSON value, reading more of the body until it is
+        complete.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._read():
+                    raise
+                continue
+            if end == len(self.buf) and not self.eof and not isinstance(value, (dict, list, str)):
+                # A number at the end of the buffer may continue in the next chunk
+                if self._read():
+                    continue
+            self.pos = end
+            return value
+
+    def members(self):
+        """
+        Iterate over the keys of an object, leaving each value to be read.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("}")
+            return
+
+
+def decode_month(chunks):
+    """
+    Decode a month payload from an iterable of byte chunks, e.g.
+    `resp.iter_content(...)`, keeping only `SITE_FIELDS` and the available
+    nights of each campsite.
+    """
+    reader = _Reader(chunks)
+    month = {}
+    for key in reader.members():
+        if key == "campsites" and reader.peek() == "{":
+            campsites = month["campsites"] = {}
+            for campsite_id in reader.members():
+                campsites[campsite_id] = compact_site(reader.value())
+        else:
+            month[key] = reader.value()
+    return month
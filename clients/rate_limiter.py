@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+LOG = logging.getLogger(__name__)
+
+# Pause used when the server throttles us without saying for how long
+DEFAULT_THROTTLE_PAUSE = 5
+
+
+class RateLimitWaitTooLong(Exception):
+    pass
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every request of the client, so concurrent
+    workers together send at most `rate` requests per second, with bursts
+    of up to `burst` requests. Without a rate only server throttling is
+    enforced.
+
+    When the server throttles us (429, or 503 with Retry-After) the whole
+    client pauses until the server says we can retry, instead of every
+    worker backing off on its own.
+    """
+
+    def __init__(self, rate=None, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst or (max(1, int(rate)) if rate else 1)
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        # Earliest time the next token is free (generic cell rate algorithm)
+        self._next_token = 0.0
+        self._paused_until = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "waited": 0.0}
+
+    def acquire(self, max_wait=None):
+        """
+        Block until a request may be sent. Raises RateLimitWaitTooLong
+        instead if that would take longer than `max_wait` seconds.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                start = max(now, self._paused_until)
+                if self.rate:
+                    interval = 1.0 / self.rate
+                    tolerance = (self.burst - 1) * interval
+                    start = max(start, self._next_token - tolerance)
+                    wait = start - now
+                    if max_wait is not None and waited + wait > max_wait:
+                        raise RateLimitWaitTooLong()
+                    self._next_token = max(self._next_token, start) + interval
+                else:
+                    wait = start - now
+                    if max_wait is not None and waited + wait > max_wait:
+                        raise RateLimitWaitTooLong()
+            if wait > 0:
+                self.sleep(wait)
+                waited += wait
+            # A throttle signal may have come in while we were waiting
+            with self._lock:
+                if self.clock() >= self._paused_until:
+                    self.stats["requests"] += 1
+                    self.stats["waited"] += waited
+                    return waited
+
+    def throttle(self, retry_after=None):
+        """
+        Pause every request after the server signalled throttling.
+        `retry_after` is the raw Retry-After header, if any.
+        """
+        pause = parse_retry_after(retry_after)
+        if pause is None:
+            pause = DEFAULT_THROTTLE_PAUSE
+        with self._lock:
+            self.stats["throttled"] += 1
+            self._paused_until = max(self._paused_until, self.clock() + pause)
+        LOG.warning(f"Throttled by the server, pausing all requests for {pause}s")
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a Retry-After header, which is either a number of
+    seconds or an HTTP date. Returns None if it can't be parsed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
@@ -1,25 +1,182 @@
 import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
 import requests
 import user_agent
 import backoff
+from requests.adapters import HTTPAdapter
 
+from clients import month_decoder
+from clients.rate_limiter import RateLimiter, RateLimitWaitTooLong
+from clients.request_archive import ReplayMiss, ReplaySession
 from utils import formatter
+from utils.metrics import REQUEST_ERRORS, REQUEST_SECONDS, REQUESTS, THROTTLED
+from utils.profiler import PROFILER
 
 LOG = logging.getLogger(__name__)
 MAX_RETRIES = 5
+MAX_WORKERS = 8
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+# Bytes read at a time when month payloads are decoded as they stream in
+STREAM_CHUNK_SIZE = 64 * 1024
+# Status codes the server uses to throttle us
+THROTTLE_STATUS_CODES = (429, 503)
+DEFAULT_BASE_URL = "https://www.recreation.gov"
+AVAILABILITY_PATH = "/api/camps/availability/campground/{park_id}/month"
+MAIN_PAGE_PATH = "/api/camps/campgrounds/{park_id}"
+
+
+class DeadlineExceeded(RuntimeError):
+    pass
+
+
+class Throttled(RuntimeError):
+    pass
+
+
+def _on_backoff(details):
+    PROFILER.count("retries")
+    PROFILER.add_time("retry backoff", details["wait"])
 
 
 class RecreationClient:
 
-    BASE_URL = "https://www.recreation.gov"
-    AVAILABILITY_ENDPOINT = (
-        BASE_URL + "/api/camps/availability/campground/{park_id}/month"
-    )
-    MAIN_PAGE_ENDPOINT = BASE_URL + "/api/camps/campgrounds/{park_id}"
+    BASE_URL = DEFAULT_BASE_URL
+    AVAILABILITY_ENDPOINT = BASE_URL + AVAILABILITY_PATH
+    MAIN_PAGE_ENDPOINT = BASE_URL + MAIN_PAGE_PATH
 
     headers = {"User-Agent": user_agent.generate_user_agent() }
-    
+    max_workers = MAX_WORKERS
+    connect_timeout = CONNECT_TIMEOUT
+    read_timeout = READ_TIMEOUT
+    streaming_decode = False
+
+    _session = None
+    _session_lock = threading.Lock()
+    _deadline = None
+    rate_limiter = RateLimiter()
+    cache = None
+    metadata = None
+    history = None
+    recorder = None
+    _replay = None
+
+    @classmethod
+    def configure(
+        cls,
+        max_workers=None,
+        connect_timeout=None,
+        read_timeout=None,
+        requests_per_second=None,
+        base_url=None,
+        streaming_decode=None,
+    ):
+        """
+        Change the concurrency, timeouts and request rate used by the client,
+        or the server it talks to (e.g. a local fake for load testing).
+        With `streaming_decode`, month payloads are decoded as they are read
+        (see `clients.month_decoder`). The pooled session is recreated so
+        that its connection pool matches the number of workers.
+        """
+        if max_workers:
+            cls.max_workers = max_workers
+        if connect_timeout:
+            cls.connect_timeout = connect_timeout
+        if read_timeout:
+            cls.read_timeout = read_timeout
+        if requests_per_second:
+            cls.rate_limiter = RateLimiter(requests_per_second)
+        if base_url:
+            cls.BASE_URL = base_url.rstrip("/")
+            cls.AVAILABILITY_ENDPOINT = cls.BASE_URL + AVAILABILITY_PATH
+            cls.MAIN_PAGE_ENDPOINT = cls.BASE_URL + MAIN_PAGE_PATH
+        if streaming_decode is not None:
+            cls.streaming_decode = streaming_decode
+        cls.close()
+
+    @classmethod
+    def set_deadline(cls, seconds):
+        """
+        Set a deadline for the whole run, `seconds` from now. Once it has
+        passed, no new requests are sent and outstanding ones are abandoned.
+        Pass None to remove the deadline.
+        """
+        cls._deadline = None if seconds is None else time.monotonic() + seconds
+
+    @classmethod
+    def use_cache(cls, cache):
+        """
+        Serve month availability through a `ResponseCache`, or pass None to
+        always hit the API.
+        """
+        cls.cache = cache
+
+    @classmethod
+    def use_metadata_store(cls, store):
+        """
+        Read campground names from a `CampgroundStore` and only fetch them
+        when the stored metadata is stale. Pass None to always fetch names.
+        """
+        cls.metadata = store
+
+    @classmethod
+    def use_history_store(cls, store):
+        """
+        Record the site-day state changes in every fetched month to a
+        `HistoryStore`, or pass None to stop recording.
+        """
+        cls.history = store
+
+    @classmethod
+    def use_recorder(cls, archive):
+        """
+        Record every response to a `RequestArchive`, or pass None to stop
+        recording.
+        """
+        cls.recorder = archive
+
+    @classmethod
+    def use_replay(cls, archive, timing=False):
+        """
+        Answer requests from a `RequestArchive` instead of the network. With
+        `timing`, each response takes as long as it did when recorded. Pass
+        None to go back to the network.
+        """
+        cls._replay = None if archive is None else ReplaySession(archive, timing)
+
+    @classmethod
+    def get_session(cls):
+        """
+        Get the shared session, creating it if needed. Its connection pool is
+        sized to `max_workers` so every worker can keep a connection alive.
+        """
+        if cls._replay is not None:
+            return cls._replay
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=cls.max_workers,
+                    pool_maxsize=cls.max_workers,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(cls.headers)
+                cls._session = session
+            return cls._session
+
+    @classmethod
+    def close(cls):
+        with cls._session_lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
+
     @classmethod
     def get_availability(cls, park_id, month_date):
         params = {"start_date": formatter.format_date(month_date)}
@@ -29,27 +186,426 @@ class RecreationClient:
         url = cls.AVAILABILITY_ENDPOINT.format(park_id=park_id)
         resp = None
         try:
-            resp = cls._send_request(url, params)
+            with PROFILER.stage("fetch", park_id):
+                if cls.cache is None:
+                    resp = cls._send_month_request(url, params)
+                else:
+                    resp = cls._get_cached(park_id, month_date, url, params)
+        except DeadlineExceeded:
+            LOG.debug("Deadline reached...returning no data")
         except RuntimeError:
             LOG.debug("GET request failed for 5 retries...returning no data")
         return resp
 
     @classmethod
-    def get_park_name(cls, park_id):
-        resp = cls._send_request(
-            cls.MAIN_PAGE_ENDPOINT.format(park_id=park_id), {}
+    def _get_cached(cls, park_id, month_date, url, params):
+        """
+        Return the cached month if it is still fresh. Otherwise revalidate it
+        with a conditional request, falling back to a full fetch when the
+        server doesn't support validators or the month has changed.
+
+        With streaming decode on, a fetched month is decoded as it is read
+        and cached in that cut-down form, which is only reused by runs that
+        don't need the whole payload.
+        """
+        stream = cls._streams_months()
+        entry = cls.cache.get(park_id, month_date)
+        if entry is not None and entry.get("compact") and not stream:
+            # Lacks the unavailable nights that e.g. the history records
+            entry = None
+        if entry is not None and cls.cache.is_fresh(entry, month_date):
+            LOG.debug(f"Using cached data for {park_id} {params}")
+            cls.cache.record("fresh")
+            return entry["body"]
+
+        resp = cls._get(url, params, cls.cache.conditional_headers(entry), stream=stream)
+        try:
+            if resp.status_code == 304 and entry is not None:
+                cls.cache.refresh(park_id, month_date, entry)
+                cls.cache.record("revalidated")
+                return entry["body"]
+
+            if stream:
+                body = cls._decode_streamed_month(resp, url, park_id)
+            else:
+                with PROFILER.stage("decode", park_id):
+                    body = resp.json()
+        finally:
+            resp.close()
+        cls.cache.put(
+            park_id,
+            month_date,
+            body,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            compact=stream,
         )
+        cls.cache.record("fetched")
+        return body
+
+    @classmethod
+    def get_park_name(cls, park_id):
+        with PROFILER.stage("fetch name", park_id):
+            resp = cls._send_request(
+                cls.MAIN_PAGE_ENDPOINT.format(park_id=park_id), {}
+            )
         return resp["campground"]["facility_name"]
 
+    @classmethod
+    def get_availabilities(cls, park_id, month_dates, max_workers=None):
+        """
+        Fetch the availability of a single park for several months
+        concurrently. Months that could not be fetched are left out.
+        """
+        results = cls._run_concurrently(
+            [(cls.get_availability, (park_id, m)) for m in month_dates],
+            max_workers,
+        )
+        return [month_data for month_data in results if month_data]
+
+    @classmethod
+    def get_parks_data(cls, park_ids, month_dates, max_workers=None):
+        """
+        Fetch the availability for every park x month pair, plus the name of
+        every park, concurrently. All requests are scheduled up front and run
+        on a pool of at most `max_workers` threads, so a sweep takes roughly
+        as long as its slowest requests rather than the sum of all of them.
+
+        Returns a tuple of two dicts keyed by park ID:
+
+        ({<park_id>: [<month_data>, ...]}, {<park_id>: <park_name>})
+
+        Month payloads are kept in the order of `month_dates`; months that
+        could not be fetched are left out, just like `get_availability`
+        returning no data. Parks whose name could not be fetched before the
+        deadline are missing from the second dict.
+
+        With a metadata store, names are only fetched for parks whose stored
+        metadata is stale, and those parks are refreshed in the store.
+        """
+        month_data_by_pair, name_by_park_id = cls.get_months_data(
+            [
+                (park_id, month_date)
+                for park_id in park_ids
+                for month_date in month_dates
+            ],
+            max_workers,
+        )
+        month_data_by_park_id = {
+            park_id: [
+                month_data_by_pair[(park_id, month_date)]
+                for month_date in month_dates
+                if (park_id, month_date) in month_data_by_pair
+            ]
+            for park_id in park_ids
+        }
+        return month_data_by_park_id, name_by_park_id
+
+    @classmethod
+    def get_months_data(cls, park_months, max_workers=None):
+        """
+        Fetch the availability for a list of (park_id, month_date) pairs,
+        plus the names of their parks, concurrently. Each pair and each park
+        is requested once however often it appears in `park_months`.
+
+        Returns a tuple of two dicts:
+
+        ({(<park_id>, <month_date>): <month_data>}, {<park_id>: <park_name>})
+
+        Pairs that could not be fetched are left out. See `get_parks_data`
+        for how names are read from the metadata store.
+        """
+        park_months = list(dict.fromkeys(park_months))
+        park_ids = list(dict.fromkeys(park_id for park_id, _ in park_months))
+        jobs = [
+            (cls.get_availability, (park_id, month_date))
+            for park_id, month_date in park_months
+        ]
+        stale_park_ids = [
+            park_id
+            for park_id in park_ids
+            if cls.metadata is None or cls.metadata.is_stale(park_id)
+        ]
+        jobs += [(cls.get_park_name, (park_id,)) for park_id in stale_park_ids]
+        results = cls._run_concurrently(jobs, max_workers)
+
+        month_data_by_pair = {}
+        name_by_park_id = {}
+        for (fn, fn_args), result in zip(jobs, results):
+            if fn == cls.get_park_name:
+                if result is not None:
+                    name_by_park_id[fn_args[0]] = result
+            elif result:
+                month_data_by_pair[fn_args] = result
+
+        for park_id in park_ids:
+            month_data_list = [
+                month_data
+                for (p, _), month_data in month_data_by_pair.items()
+                if p == park_id
+            ]
+            cls._record_history(park_id, month_data_list)
+            name = cls._resolve_park_name(
+                park_id, name_by_park_id.get(park_id), month_data_list
+            )
+            if name is not None:
+                name_by_park_id[park_id] = name
+        return month_data_by_pair, name_by_park_id
+
+    @classmethod
+    def iter_parks_data(cls, park_ids, month_dates, max_workers=None):
+        """
+        Like `get_parks_data`, but yield a `(park_id, [<month_data>, ...],
+        park_name)` tuple for each park as soon as all of its requests have
+        finished, so callers can handle fast parks without waiting for slow
+        ones. Parks come out in the order they finish.
+
+        The park name is None if it could not be fetched before the deadline
+        and isn't in the metadata store.
+        """
+        park_ids = list(dict.fromkeys(park_ids))
+        jobs = [
+            (cls.get_availability, (park_id, month_date))
+            for park_id in park_ids
+            for month_date in month_dates
+        ]
+        jobs += [
+            (cls.get_park_name, (park_id,))
+            for park_id in park_ids
+            if cls.metadata is None or cls.metadata.is_stale(park_id)
+        ]
+        pending_by_park_id = Counter(fn_args[0] for _, fn_args in jobs)
+
+        month_data_by_pair = {}
+        name_by_park_id = {}
+        for i, result in cls._iter_concurrently(jobs, max_workers):
+            fn, fn_args = jobs[i]
+            park_id = fn_args[0]
+            if fn == cls.get_park_name:
+                if result is not None:
+                    name_by_park_id[park_id] = result
+            elif result:
+                month_data_by_pair[fn_args] = result
+
+            pending_by_park_id[park_id] -= 1
+            if pending_by_park_id[park_id]:
+                continue
+            month_data = [
+                month_data_by_pair.pop((park_id, month_date))
+                for month_date in month_dates
+                if (park_id, month_date) in month_data_by_pair
+            ]
+            cls._record_history(park_id, month_data)
+            yield park_id, month_data, cls._resolve_park_name(
+                park_id, name_by_park_id.pop(park_id, None), month_data
+            )
+
+    @classmethod
+    def _resolve_park_name(cls, park_id, name, month_data_list):
+        """
+        Store a freshly fetched park name (and the campsites in its months) in
+        the metadata store, or fall back to the stored name if it wasn't
+        fetched. Returns the name, or None if there is none.
+        """
+        if cls.metadata is None:
+            return name
+        if name is not None:
+            cls.metadata.update(park_id, name, month_data_list)
+            return name
+        return cls.metadata.get_name(park_id)
+
+    @classmethod
+    def _record_history(cls, park_id, month_data_list):
+        if cls.history is None:
+            return
+        num_changes = sum(
+            cls.history.record_month(park_id, month_data)
+            for month_data in month_data_list
+        )
+        if num_changes:
+            LOG.debug(f"Recorded {num_changes} site-day change(s) for {park_id}")
+
+    @classmethod
+    def _run_concurrently(cls, jobs, max_workers=None):
+        """
+        Run a list of `(fn, args)` jobs on a thread pool and return their
+        results in the same order as the jobs. Exceptions are re-raised.
+
+        If the run deadline passes first, the jobs that didn't finish are
+        cancelled and their result is None.
+        """
+        results = [None] * len(jobs)
+        for i, result in cls._iter_concurrently(jobs, max_workers):
+            results[i] = result
+        return results
+
+    @classmethod
+    def _iter_concurrently(cls, jobs, max_workers=None):
+        """
+        Run a list of `(fn, args)` jobs on a thread pool and yield
+        `(job_index, result)` pairs as the jobs finish. Exceptions are
+        re-raised.
+
+        If the run deadline passes first, the jobs that didn't finish are
+        cancelled and yielded last with a None result.
+        """
+        if not jobs:
+            return
+        max_workers = min(max_workers or cls.max_workers, len(jobs))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            index_by_future = {
+                executor.submit(fn, *fn_args): i
+                for i, (fn, fn_args) in enumerate(jobs)
+            }
+            not_done = set(index_by_future)
+            try:
+                for f in as_completed(index_by_future, timeout=cls._remaining_time()):
+                    not_done.discard(f)
+                    try:
+                        result = f.result()
+                    except DeadlineExceeded:
+                        result = None
+                    yield index_by_future[f], result
+            except FuturesTimeoutError:
+                LOG.warning(
+                    f"Deadline reached, {len(not_done)} of {len(index_by_future)} "
+                    "requests did not finish; results are partial"
+                )
+                for f in sorted(not_done, key=index_by_future.get):
+                    f.cancel()
+                    yield index_by_future[f], None
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _remaining_time(cls):
+        if cls._deadline is None:
+            return None
+        return max(cls._deadline - time.monotonic(), 0)
+
+    @classmethod
+    def _get_timeout(cls):
+        """
+        Connect/read timeouts for one request, capped to the time left before
+        the run deadline.
+        """
+        remaining = cls._remaining_time()
+        if remaining is None:
+            return (cls.connect_timeout, cls.read_timeout)
+        if remaining <= 0:
+            raise DeadlineExceeded("deadlineExceeded", "ERROR, run deadline reached")
+        return (
+            min(cls.connect_timeout, remaining),
+            min(cls.read_timeout, remaining),
+        )
+
+    @classmethod
+    def _send_request(cls, url, params):
+        resp = cls._get(url, params)
+        with PROFILER.stage("decode"):
+            return resp.json()
+
+    @classmethod
+    def _send_month_request(cls, url, params):
+        """
+        Like `_send_request`, but with streaming decode on, the month is
+        decoded chunk by chunk as it is read, keeping only what the checker
+        uses (see `month_decoder.decode_month`). Not used while responses or
+        history are recorded, since those need the whole payload. A failure
+        while reading the body isn't retried.
+        """
+        if not cls._streams_months():
+            return cls._send_request(url, params)
+        resp = cls._get(url, params, stream=True)
+        try:
+            return cls._decode_streamed_month(resp, url)
+        finally:
+            resp.close()
+
+    @classmethod
+    def _streams_months(cls):
+        return cls.streaming_decode and cls.recorder is None and cls.history is None
+
+    @classmethod
+    def _decode_streamed_month(cls, resp, url, park_id=None):
+        try:
+            with PROFILER.stage("decode", park_id):
+                return month_decoder.decode_month(resp.iter_content(STREAM_CHUNK_SIZE))
+        except (requests.RequestException, ValueError) as e:
+            LOG.debug("Reading month payload failed")
+            raise RuntimeError(
+                "failedRequest",
+                "ERROR, reading the response from {url} failed: {error}".format(url=url, error=e),
+            )
+
+    @classmethod
+    def _acquire(cls):
+        """
+        Wait for the shared rate limiter to let a request through, unless
+        that would take us past the run deadline.
+        """
+        try:
+            cls.rate_limiter.acquire(max_wait=cls._remaining_time())
+        except RateLimitWaitTooLong:
+            raise DeadlineExceeded("deadlineExceeded", "ERROR, run deadline reached")
+
     @classmethod
     @backoff.on_exception(backoff.expo,
                           RuntimeError,
                           max_tries=5,
                           max_time=30,
-                          jitter=None)
-    def _send_request(cls, url, params):
-        resp = requests.get(url, params=params, headers=cls.headers)
+                          giveup=lambda e: isinstance(e, (DeadlineExceeded, ReplayMiss)),
+                          on_backoff=_on_backoff)
+    def _get(cls, url, params, headers=None, stream=False):
+        """
+        Send a GET request, retrying failures. Returns the response, which is
+        either a 200 or, for conditional requests, a 304. With `stream`, the
+        body is left to be read by the caller.
+
+        Every attempt goes through the shared rate limiter. When the server
+        throttles us, all workers pause for its Retry-After rather than
+        backing off independently.
+        """
+        cls._acquire()
+        timeout = cls._get_timeout()
+        endpoint = "availability" if url.endswith("/month") else "campground"
+        PROFILER.count("http requests")
+        start = time.perf_counter()
+        try:
+            resp = cls.get_session().get(
+                url, params=params, headers=headers, timeout=timeout, stream=stream
+            )
+        except requests.RequestException as e:
+            REQUEST_ERRORS.inc(endpoint=endpoint, reason=type(e).__name__)
+            LOG.debug("GET request failed")
+            raise RuntimeError(
+                "failedRequest",
+                "ERROR, request to {url} failed: {error}".format(url=url, error=e),
+            )
+        finally:
+            elapsed = time.perf_counter() - start
+            PROFILER.add_time("http request", elapsed)
+            REQUEST_SECONDS.observe(elapsed, endpoint=endpoint)
+        REQUESTS.inc(endpoint=endpoint, status=resp.status_code)
+        if cls.recorder is not None:
+            cls.recorder.record(url, params, resp, elapsed)
+        if resp.status_code == 304 and headers:
+            return resp
+        retry_after = resp.headers.get("Retry-After")
+        if resp.status_code == 429 or (
+            resp.status_code in THROTTLE_STATUS_CODES and retry_after
+        ):
+            THROTTLED.inc(endpoint=endpoint)
+            cls.rate_limiter.throttle(retry_after)
+            raise Throttled(
+                "throttled",
+                "ERROR, {status_code} code received from {url}".format(
+                    status_code=resp.status_code, url=url
+                ),
+            )
         if resp.status_code != 200:
+            REQUEST_ERRORS.inc(endpoint=endpoint, reason="status")
             LOG.debug("GET request failed")
             raise RuntimeError(
                 "failedRequest",
@@ -57,4 +613,4 @@ class RecreationClient:
                     status_code=resp.status_code, url=url, resp_text=resp.text
                 ),
             )
-        return resp.json()
+        return resp
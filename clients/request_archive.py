@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+LOG = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    request TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    body BLOB NOT NULL,
+    elapsed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_request ON responses (request, id);
+"""
+# Recorded responses are committed in batches of this many
+COMMIT_EVERY = 100
+
+
+class ReplayMiss(RuntimeError):
+    """
+    A request that isn't in the archive being replayed. Not worth retrying.
+    """
+
+
+def request_key(url, params):
+    # Without the host, so a run recorded against one server replays
+    # whatever --api-url is set to
+    return urlsplit(url).path + "?" + json.dumps(params or {}, sort_keys=True)
+
+
+class RequestArchive:
+    """
+    Every request/response pair of a run, in a SQLite file with one row per
+    response: the request (URL and parameters), status, headers, the
+    zlib-compressed body and how long the response took.
+
+    Responses to the same request are kept in the order they were received,
+    so retries and repeated polls replay the same way.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        archive_dir = os.path.dirname(path)
+        if archive_dir and not os.path.exists(archive_dir):
+            os.makedirs(archive_dir)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._uncommitted = 0
+
+    def flush(self):
+        with self._lock:
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def record(self, url, params, resp, elapsed):
+        row = (
+            request_key(url, params),
+            resp.status_code,
+            json.dumps(dict(resp.headers)),
+            zlib.compress(resp.content),
+            elapsed,
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO responses (request, status, headers, body, elapsed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                row,
+            )
+            self._uncommitted += 1
+            if self._uncommitted >= COMMIT_EVERY:
+                self._conn.commit()
+                self._uncommitted = 0
+
+    def load_index(self):
+        """
+        {request: [row id, ...]} in the order the responses were recorded.
+        """
+        index = defaultdict(list)
+        with self._lock:
+            for row_id, request in self._conn.execute(
+                "SELECT id, request FROM responses ORDER BY id"
+            ):
+                index[request].append(row_id)
+        return index
+
+    def get(self, row_id):
+        """
+        (status, headers, body, elapsed) of one recorded response.
+        """
+        with self._lock:
+            status, headers, body, elapsed = self._conn.execute(
+                "SELECT status, headers, body, elapsed FROM responses WHERE id = ?",
+                (row_id,),
+            ).fetchone()
+        return status, json.loads(headers), zlib.decompress(body), elapsed
+
+
+class ReplaySession:
+    """
+    Stands in for the client's requests.Session, answering each request
+    with the next response recorded for it. The last response is repeated
+    once they run out. With `timing`, each response takes as long as it
+    originally did.
+
+    Only the index of the archive is loaded up front; bodies are read and
+    decompressed as they are requested.
+    """
+
+    def __init__(self, archive, timing=False, sleep=time.sleep):
+        self.archive = archive
+        self.timing = timing
+        self.sleep = sleep
+        self._index = archive.load_index()
+        self._next = defaultdict(int)
+        self._lock = threading.Lock()
+        LOG.info(f"Replaying {sum(map(len, self._index.values()))} responses from {archive.path}")
+
+    def get(self, url, params=None, headers=None, timeout=None, stream=False):
+        key = request_key(url, params)
+        row_ids = self._index.get(key)
+        if not row_ids:
+            raise ReplayMiss("replayMiss", f"ERROR, {key} is not in {self.archive.path}")
+        with self._lock:
+            i = self._next[key]
+            self._next[key] = min(i + 1, len(row_ids) - 1)
+        status, response_headers, body, elapsed = self.archive.get(row_ids[i])
+        if self.timing:
+            self.sleep(elapsed)
+
+        resp = requests.Response()
+        resp.status_code = status
+        resp.headers = CaseInsensitiveDict(response_headers)
+        resp._content = body
+        # The body is already read, so iter_content() slices it
+        resp._content_consumed = True
+        resp.encoding = "utf-8"
+        resp.url = url
+        return resp
+
+    def close(self):
+        pass
@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+from utils.metrics import CACHE_LOOKUPS
+
+LOG = logging.getLogger(__name__)
+
+CACHE_FILE_TEMPLATE = "month_{park_id}_{month}.json"
+CACHE_FILE_PATTERN = re.compile(r"month_[^_]+_(\d{4}-\d{2})\.json$")
+# How long a cached month stays fresh, depending on how close it is. Past
+# months can't change any more, months far in the future rarely do.
+PAST_MONTH_TTL = timedelta(days=30)
+CURRENT_MONTH_TTL = timedelta(minutes=1)
+NEAR_MONTH_TTL = timedelta(minutes=4)
+FAR_MONTH_TTL = timedelta(hours=1)
+NEAR_MONTHS = 2
+# Entries not written for this long, e.g. of parks no longer checked, are
+# pruned
+MAX_ENTRY_AGE = timedelta(days=7)
+
+
+class ResponseCache:
+    """
+    Persistent cache of month availability payloads, keyed by
+    (park_id, month). Each entry is a small JSON file holding the payload,
+    when it was fetched, and the ETag/Last-Modified validators the server
+    sent with it so a stale entry can be revalidated with a conditional
+    request instead of downloaded again.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        self._lock = threading.Lock()
+        self.stats = {"fresh": 0, "revalidated": 0, "fetched": 0}
+
+    def get(self, park_id, month_date):
+        try:
+            with open(self._path(park_id, month_date), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, park_id, month_date, body, etag=None, last_modified=None, compact=False):
+        """
+        `compact` marks a body cut down by `month_decoder.decode_month`.
+        """
+        entry = {
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+            "compact": compact,
+        }
+        self._write(park_id, month_date, entry)
+        return entry
+
+    def refresh(self, park_id, month_date, entry):
+        """
+        Mark an entry as fresh again after the server confirmed it is
+        unchanged.
+        """
+        entry["fetched_at"] = time.time()
+        self._write(park_id, month_date, entry)
+        return entry
+
+    def is_fresh(self, entry, month_date, today=None):
+        age = time.time() - entry["fetched_at"]
+        return age < self.ttl(month_date, today).total_seconds()
+
+    @staticmethod
+    def ttl(month_date, today=None):
+        today = today or datetime.today()
+        months_ahead = (month_date.year - today.year) * 12 + (
+            month_date.month - today.month
+        )
+        if months_ahead < 0:
+            return PAST_MONTH_TTL
+        if months_ahead == 0:
+            return CURRENT_MONTH_TTL
+        if months_ahead <= NEAR_MONTHS:
+            return NEAR_MONTH_TTL
+        return FAR_MONTH_TTL
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, outcome):
+        """
+        Count how a lookup was served: "fresh", "revalidated" or "fetched".
+        """
+        with self._lock:
+            self.stats[outcome] += 1
+        CACHE_LOOKUPS.inc(outcome=outcome)
+
+    def prune(self, today=None):
+        """
+        Delete the entries of past months, which are never queried again,
+        and entries that haven't been written for `MAX_ENTRY_AGE`. Returns
+        the number of entries deleted.
+        """
+        current_month = (today or datetime.today()).strftime("%Y-%m")
+        oldest = time.time() - MAX_ENTRY_AGE.total_seconds()
+        pruned = 0
+        for name in os.listdir(self.cache_dir):
+            match = CACHE_FILE_PATTERN.match(name)
+            if match is None:
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if match.group(1) < current_month or os.path.getmtime(path) < oldest:
+                    os.remove(path)
+                    pruned += 1
+            except FileNotFoundError:
+                # Pruned by another run
+                continue
+        if pruned:
+            LOG.debug(f"Pruned {pruned} cached month(s) from {self.cache_dir}")
+        return pruned
+
+    def _path(self, park_id, month_date):
+        return os.path.join(
+            self.cache_dir,
+            CACHE_FILE_TEMPLATE.format(
+                park_id=park_id, month=month_date.strftime("%Y-%m")
+            ),
+        )
+
+    def _write(self, park_id, month_date, entry):
+        # Write to a temporary file first so readers never see a partial entry
+        path = self._path(park_id, month_date)
+        tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
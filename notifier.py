@@ -6,6 +6,7 @@ import time
 from hashlib import md5
 from os import isatty, environ, path, makedirs, remove, sep
 import glob
+import itertools
 import logging
 from enum import Enum
 from datetime import datetime, timedelta
@@ -15,27 +16,46 @@ import yagmail
 
 from enums.emoji import Emoji
 from enums.date_format import DateFormat
+from utils import availability_diff, pipe_format
+from utils.metrics import NOTIFICATION_FAILURES, NOTIFICATION_SECONDS
+from utils.profiler import PROFILER
+from utils.snapshot_store import SnapshotStore
 
 script_path_list = path.normpath(__file__).split(sep)
-HOME_DIR = path.join("/", script_path_list[1], script_path_list[2])
+# Same as camping.py's
+HOME_DIR = environ.get("RECREATION_GOV_BOT_HOME") or path.join(
+    "/", script_path_list[1], script_path_list[2]
+)
 
 MAX_TWEET_LENGTH = 279
 DELAY_FILE_TEMPLATE = "next_{}.txt"
 DELAY_TIME = 120
 CREDENTIALS_FILE = "twitter_credentials.json"
+# Files written before the snapshot store, only still cleaned up
 LAST_AVAILABILITY_FILE_PREFIX = "last_availability_data_"
-LAST_AVAILABILITY_FILE_SUFFIX = ".txt"
+SNAPSHOT_FILE = "last_availability.db"
 LAST_AVAILABILITY_DATA_TTL = timedelta(hours=12)
 LOG_PATH = f"{HOME_DIR}/recreation-gov-bot/log/"
 # create log dir if missing
 if not path.exists(LOG_PATH):
     makedirs(LOG_PATH)
 LOG_FILE_TEMPLATE = "bot_notifier_{}.log"
+# How camping.py's summary line starts, whether or not there are campsites
+SUMMARY_LINE_PREFIX = "There are "
+
+_snapshot_store = None
 
 class NotificationMethod:
     TWITTER = 1
     EMAIL = 2
 
+# What `notify` did
+class NotifyResult:
+    SENT = "sent"
+    TOO_SOON = "too soon"
+    NOTHING_NEW = "nothing new"
+    NOTHING_AVAILABLE = "nothing available"
+
 LOG = logging.getLogger(__name__)
 log_formatter = logging.Formatter(
     "%(asctime)s - %(process)s - %(levelname)s - %(message)s"
@@ -95,6 +115,7 @@ def _post_tweet(tweet, api: Api, reply_tweet_id=None):
                                 reply_in_reply_to_tweet_id=reply_tweet_id,
                                 reply_exclude_reply_user_ids=[])
     except PyTwitterError as e:
+        NOTIFICATION_FAILURES.inc(method="twitter")
         LOG.error(f"Posting tweet failed with exception: {e.message}")
 
     LOG.info("Tweet:\n")
@@ -127,9 +148,19 @@ def split_tweet(tweet):
         tweets.append(tweet)
     return tweets
 
-def main(args, stdin):
+def load_credentials():
     with open(CREDENTIALS_FILE) as f:
-        tc = json.load(f)
+        return json.load(f)
+
+def parse_users(users, notification_method):
+    if notification_method == NotificationMethod.EMAIL:
+        if "@gmail.com" not in users:
+            raise RuntimeError("Email address must contain @gmail.com")
+        return users
+    return users.replace("@", "").split(",")
+
+def main(args, stdin):
+    tc = load_credentials()
 
     # Janky simple argument parsing:
     #   python3 notifier.py <usernameToNotify>
@@ -139,69 +170,152 @@ def main(args, stdin):
 
     notification_method = NotificationMethod.TWITTER
 
-    users = args[1]
+    if "--email" in args[2:]:
+        notification_method = NotificationMethod.EMAIL
+
+    users = parse_users(args[1], notification_method)
 
-    if len(args) == 3:
-        if args[2] == "--email":
-            notification_method = NotificationMethod.EMAIL
-            if "@gmail.com" not in users:
-                raise RuntimeError("Email address must contain @gmail.com")
+    if "--profile" in args[2:]:
+        PROFILER.enable()
 
-    if (notification_method == NotificationMethod.TWITTER):
-        users = args[1].replace("@", "")
-        users = users.split(",")
+    if "--binary" in args[2:]:
+        return notify_from_records(
+            pipe_format.read_records(stdin, pipe_format.BINARY),
+            users, notification_method, tc,
+        )
 
     first_line = next(stdin)
-    first_line_hash = md5(first_line.encode("utf-8")).hexdigest()
 
-    delay_file = DELAY_FILE_TEMPLATE.format(first_line_hash)
-    try:
-        with open(delay_file, "r") as f:
-            call_time = int(f.read().rstrip())
-    except:
-        call_time = 0
-
-    if call_time + random.randint(DELAY_TIME - 30, DELAY_TIME + 30) > int(
-        time.time()
-    ):
-        LOG.warning("It is too soon to notify again")
-        exit(0)
+    # NDJSON records from camping.py --pipe-format ndjson
+    if first_line.startswith("{"):
+        return notify_from_records(
+            pipe_format.read_ndjson(itertools.chain([first_line], stdin)),
+            users, notification_method, tc,
+        )
+
+    if Emoji.SUCCESS.value in first_line or Emoji.FAILURE.value in first_line:
+        # camping.py --stream writes each park as soon as it is checked and
+        # the summary line last
+        stdin = [first_line] + list(stdin)
+        first_line = get_trailing_summary_line(stdin)
+        if first_line is None:
+            _create_tweet("{}, I'm broken! Please help :'(".format(format_user_mentions(users)), tc)
+            exit()
 
     if "Something went wrong" in first_line:
         _create_tweet("{}, I'm broken! Please help :'(".format(format_user_mentions(users)), tc)
         exit()
 
-    availability = get_availability_data(stdin)
-    available_site_strings = generate_availability_strings_concise(availability)
+    with PROFILER.stage("notifier: parse"):
+        availability = get_availability_data(stdin)
+    result = notify(availability, first_line, users, notification_method, tc)
+    # Only a run with no campsites available at all is a failure
+    exit(1 if result == NotifyResult.NOTHING_AVAILABLE else 0)
+
+def notify_from_records(records, users, notification_method, tc):
+    """
+    Notify from the records written by camping.py --pipe-format. Each park
+    is diffed and notified as soon as its record arrives, so fast parks
+    aren't held up by slow ones; a park's notification starts with its own
+    line of the human output rather than the run's summary line. Exits with
+    1 if no park has campsites available.
+    """
+    available = False
+    finished = False
+    for record in records:
+        if record["type"] == pipe_format.SUMMARY_RECORD:
+            finished = True
+            continue
+        with PROFILER.stage("notifier: parse"):
+            availability, _ = get_availability_data_from_records([record])
+        if record["available"]:
+            available = True
+            notify(availability, get_park_line(record), users, notification_method, tc)
+        else:
+            # Nothing to notify, but the park's sites are gone from the snapshot
+            persist_availability(availability)
 
-    last_availability = load_last_availability()
+    # No summary record means camping.py died before finishing
+    if not finished:
+        _create_tweet("{}, I'm broken! Please help :'(".format(format_user_mentions(users)), tc)
+        exit()
+    exit(0 if available else 1)
 
-    persist_availability(availability)
+def notify(availability, first_line, users, notification_method, tc):
+    """
+    Tweet or email `users` about the date ranges in `availability`
+    (park->site->[(start, end)]) that opened since the last notification.
+    `first_line` is the summary line the notification starts with.
 
-    if not has_new_availability(availability, last_availability):
+    Returns a `NotifyResult`.
+    """
+    if is_too_soon(first_line):
+        LOG.warning("It is too soon to notify again")
+        return NotifyResult.TOO_SOON
+
+    with PROFILER.stage("notifier: diff"):
+        changed = persist_availability(availability)
+        opened, closed = availability_diff.diff(
+            *get_changed_availability(availability, changed)
+        )
+    LOG.info(f"{len(opened)} date range(s) opened, {len(closed)} closed")
+
+    if not opened:
+        if not any(availability.values()):
+            LOG.warning("No campsites available, not notifying 😞")
+            return NotifyResult.NOTHING_AVAILABLE
         LOG.warning("No new campsites available, not notifying 😞")
-        exit(0)
+        return NotifyResult.NOTHING_NEW
+
+    # Only tell users about what opened up since the last notification
+    available_site_strings = generate_availability_strings_concise(
+        availability_diff.group_ranges(opened)
+    )
 
     if available_site_strings:
         notification_str = generate_tweet_str(available_site_strings, first_line, users)
 
         LOG.info("Notification (ignoring char limit): \n" + notification_str)
 
-        if notification_method == NotificationMethod.TWITTER:
-            _create_tweet(notification_str, tc)
-        else:
-            send_email(notification_str)
+        start = time.perf_counter()
+        with PROFILER.stage("notifier: send"):
+            if notification_method == NotificationMethod.TWITTER:
+                _create_tweet(notification_str, tc)
+            else:
+                try:
+                    send_email(notification_str)
+                except Exception:
+                    NOTIFICATION_FAILURES.inc(method="email")
+                    raise
+        NOTIFICATION_SECONDS.observe(time.perf_counter() - start)
 
-        with open(delay_file, "w") as f:
+        with open(get_delay_file(first_line), "w") as f:
             f.write(str(int(time.time())))
 
-        exit(0)
+        return NotifyResult.SENT
     else:
         LOG.warning("No campsites available, not notifying 😞")
-        exit(1)
+        return NotifyResult.NOTHING_AVAILABLE
+
+def get_delay_file(first_line):
+    first_line_hash = md5(first_line.encode("utf-8")).hexdigest()
+    return DELAY_FILE_TEMPLATE.format(first_line_hash)
+
+def is_too_soon(first_line):
+    try:
+        with open(get_delay_file(first_line), "r") as f:
+            call_time = int(f.read().rstrip())
+    except:
+        call_time = 0
+
+    return call_time + random.randint(DELAY_TIME - 30, DELAY_TIME + 30) > int(
+        time.time()
+    )
 
 def exit(exit_code=0):
     cleanup_files()
+    if PROFILER.enabled:
+        print(PROFILER.report(), file=sys.stderr)
     sys.exit(exit_code)
 
 def generate_tweet_str(available_site_strings, first_line, users):
@@ -253,6 +367,51 @@ def generate_availability_strings_concise(availability_data):
         strs.append("\n")
     return strs
     
+# Get availability data as park->site->[(start, end)] straight from camping.py's
+# info_by_park_id, without going through the human output. Parks without
+# availability map to no sites, so they are cleared from the snapshot.
+def get_availability_data_from_info(info_by_park_id):
+    availability_by_park = {}
+    for park_id, (current, _, available_dates_by_site_id, park_name) in info_by_park_id.items():
+        if not current:
+            availability_by_park[f"{park_name} ({park_id})"] = {}
+            continue
+        availability_by_park[f"{park_name} ({park_id})"] = {
+            str(site_id): [(d["start"], d["end"]) for d in dates]
+            for site_id, dates in available_dates_by_site_id.items()
+        }
+    return availability_by_park
+
+# Get availability data as park->site->[(start, end)] and the summary line
+# from camping.py's pipe records. The summary line is None if it never came.
+def get_availability_data_from_records(records):
+    availability_by_park = {}
+    first_line = None
+    for record in records:
+        if record["type"] == pipe_format.PARK_RECORD:
+            availability_by_park[f"{record['name']} ({record['park_id']})"] = {
+                site_id: [tuple(r) for r in date_ranges]
+                for site_id, date_ranges in record["sites"].items()
+            } if record["available"] else {}
+        elif record["type"] == pipe_format.SUMMARY_RECORD:
+            first_line = record["message"].split("\n")[0] + "\n"
+    return availability_by_park, first_line
+
+# The line camping.py's human output has for a park record
+def get_park_line(record):
+    return "{emoji} {name} ({park_id}): {available} site(s) available out of {total} site(s)\n".format(
+        emoji=Emoji.SUCCESS.value if record["available"] else Emoji.FAILURE.value,
+        **record,
+    )
+
+# The summary line of camping.py --stream output, which comes after the
+# parks, or None if camping.py died before writing it
+def get_trailing_summary_line(lines):
+    for line in reversed(lines):
+        if line.startswith(SUMMARY_LINE_PREFIX):
+            return line
+    return None
+
 # Get availability data as park->site->[(start, end)] from list of input lines
 def get_availability_data(stdin):
     # go through stdin to get all lines in a list
@@ -264,10 +423,14 @@ def get_availability_data(stdin):
     i = 0
     while i < len(inputs):
         line = inputs[i]
-        if Emoji.SUCCESS.value in line:
+        if Emoji.FAILURE.value in line:
+            # No sites, so the park is cleared from the snapshot
+            park_name_and_id = " ".join(line.strip().split(":")[0].split(" ")[1:])
+            availability_by_park[park_name_and_id] = {}
+        elif Emoji.SUCCESS.value in line:
             line = line.strip()
             park_name_and_id = " ".join(line.split(":")[0].split(" ")[1:])
-            num_available = int(line.split(":")[1][1].split(" ")[0])
+            num_available = int(line.split(":")[1].split()[0])
             sites_availability = {}
 
             # get the availability dates for each site
@@ -283,7 +446,7 @@ def get_availability_data(stdin):
                 except:
                     LOG.warning("Expected <Site #> in line <{line}>")
                 
-                while "->" in inputs[i+1]:
+                while i + 1 < len(inputs) and "->" in inputs[i+1]:
                     try:
                         i += 1
                         line = inputs[i].strip()
@@ -299,81 +462,29 @@ def get_availability_data(stdin):
         i += 1
     return availability_by_park
 
-def get_last_availability_file_name_and_time():
-    # find most recent availability file
-    availability_files = glob.glob(f"./{LAST_AVAILABILITY_FILE_PREFIX}*")
-    if not availability_files:
-        return None, datetime.min
-    last_availability_file = max(availability_files, key=path.getctime)
-
-    # get timestamp out of filename ./last_availability_data_<timestamp>.txt
-    last_availability_time_str = last_availability_file.split("/")[-1].split(".")[0].split("_")[3]
-    last_availability_time: datetime = datetime.utcnow()
-    try:
-        last_availability_time = datetime.strptime(last_availability_time_str, "%Y%m%d-%H%M%S")
-    except:
-        LOG.warning(f"Unable to parse datetime from <{last_availability_time_str}>")
-
-    return last_availability_file, last_availability_time
+def get_snapshot_store():
+    global _snapshot_store
+    if _snapshot_store is None:
+        _snapshot_store = SnapshotStore(SNAPSHOT_FILE, LAST_AVAILABILITY_DATA_TTL)
+    return _snapshot_store
 
+# Save availability as the last notified snapshot. Only changed sites are
+# written; returns {(park, site): previous ranges or None} for those sites
 def persist_availability(availability_by_park):
-    data = json.dumps(availability_by_park)
-
-    # look for a previous availability file within TTL
-    # If exists, update it (keeping same time)
-    last_availability_file, last_availability_time = get_last_availability_file_name_and_time()
-    last_availability_delta = datetime.utcnow() - last_availability_time
-    availability_file_to_write = last_availability_file
-    if last_availability_delta > LAST_AVAILABILITY_DATA_TTL:
-        availability_file_to_write = LAST_AVAILABILITY_FILE_PREFIX + datetime.utcnow().strftime("%Y%m%d-%H%M%S") + LAST_AVAILABILITY_FILE_SUFFIX
-    else:
-        LOG.info(f"Will update last availability data from {last_availability_delta.total_seconds() / 60} minutes ago")
-
-    with open(availability_file_to_write, "w+") as f:
-        f.write(data)
-
-def load_last_availability():
-    try:
-        last_availability_file, last_availability_time = get_last_availability_file_name_and_time()
-
-        # if last availability data is past TTL, ignore it
-        last_availability_delta = datetime.utcnow() - last_availability_time
-        if last_availability_delta > LAST_AVAILABILITY_DATA_TTL:
-            return {}
-        else:
-            LOG.info(f"Found last availability data from {last_availability_delta.total_seconds() / 60} minutes ago")
-
-        with open(last_availability_file, "r") as f:
-            last_availability = json.loads(f.read())
-            # need to convert lists to tuples to be hashable
-            for p, sites in last_availability.items():
-                for s, date_ranges in sites.items():
-                    sites[s] = tuple(tuple(r) for r in date_ranges)
-            return last_availability
-    except FileNotFoundError:
-        return {}
-    
-# Compare availabiltiy by park->site->dates to see if any new availability has come up
-def has_new_availability(new_data, old_data):
-    LOG.debug("New availability:\n" + str(new_data))
-    LOG.debug("Old availability:\n" + str(old_data))
-    for p, sites in new_data.items():
-        if p not in old_data:
-            LOG.debug(f"New availability due to new park {p}")
-            return True
-        for s, date_ranges in sites.items():
-            # if new has any new sites for a park
-            if s not in old_data[p]:
-                LOG.debug(f"New availability due to new site {s}")
-                return True
-            new_dates = set(date_ranges)
-            old_dates = set(old_data[p][s])
-            # if new has any new dates for a site
-            if len(new_dates - old_dates) > 0:
-                LOG.debug(f"New availability due to new dates in site {s}")
-                return True
-    LOG.debug("No new availability")
-    return False
+    return get_snapshot_store().update(availability_by_park)
+
+# Narrow new availability and the previous snapshot down to the changed sites
+def get_changed_availability(availability_by_park, changed):
+    new_data = {}
+    old_data = {}
+    for (p, s), previous in changed.items():
+        if s in availability_by_park.get(p, {}):
+            new_data.setdefault(p, {})[s] = tuple(
+                tuple(r) for r in availability_by_park[p][s]
+            )
+        if previous is not None:
+            old_data.setdefault(p, {})[s] = previous
+    return new_data, old_data
 
 def cleanup_files(older_than=timedelta(hours=24)):
     # Cleanup old last availability and next call files
@@ -389,6 +500,10 @@ def cleanup_files(older_than=timedelta(hours=24)):
             LOG.info(f"Cleaning up old file {f}")
             remove(f)
 
+    expired = get_snapshot_store().expire()
+    if expired:
+        LOG.info(f"Expired {expired} site(s) from the last availability snapshot")
+
 if __name__ == "__main__":
     LOG.setLevel(logging.DEBUG)
     main(sys.argv, sys.stdin)
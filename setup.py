@@ -2,6 +2,7 @@ from setuptools import find_packages, setup
 
 README_FILE = "README.md"
 REQUIREMENTS_FILE = "requirements.txt"
+OPTIONAL_REQUIREMENTS_FILE = "requirements-optional.txt"
 
 
 setup(
@@ -13,5 +14,12 @@ setup(
     url="https://github.com/banool/recreation-gov-campsite-checker",
     author="Daniel Porteous and contributors",
     install_requires=open(REQUIREMENTS_FILE).read().splitlines(),
+    extras_require={
+        "vectorized": [
+            line
+            for line in open(OPTIONAL_REQUIREMENTS_FILE).read().splitlines()
+            if line and not line.startswith("#")
+        ],
+    },
     include_package_data=True,
 )
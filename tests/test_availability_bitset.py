@@ -0,0 +1,32 @@
+import unittest
+from datetime import date
+
+from utils import availability_bitset
+
+
+class TestAvailabilityBitset(unittest.TestCase):
+    def testDatesToMask_IgnoresDatesOutsideRange(self):
+        mask = availability_bitset.dates_to_mask(
+            [date(2022, 6, 21), date(2022, 6, 22), date(2022, 6, 24), date(2022, 6, 30)],
+            date(2022, 6, 22),
+            5,
+        )
+        self.assertEqual(0b00101, mask)
+
+    def testWeekdayMask_FridaysAndSaturdays(self):
+        # 2022-06-22 is a Wednesday
+        mask = availability_bitset.weekday_mask(date(2022, 6, 22), 10, (4, 5))
+        self.assertEqual(0b1000001100, mask)
+
+    def testRunStarts_FindsEveryStartOfLongEnoughRuns(self):
+        self.assertEqual(0b0000111, availability_bitset.run_starts(0b0011111, 3))
+        self.assertEqual(0b0001000, availability_bitset.run_starts(0b1111000, 4))
+        self.assertEqual(0, availability_bitset.run_starts(0b1101101, 3))
+        self.assertEqual(0b1101101, availability_bitset.run_starts(0b1101101, 1))
+
+    def testIterOffsets_LowestFirst(self):
+        self.assertEqual([0, 3, 64], list(availability_bitset.iter_offsets((1 << 64) | 0b1001)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from utils import availability_diff
+
+
+class TestAvailabilityDiff(unittest.TestCase):
+    def testDiff_ReturnsOpenedAndClosedRanges(self):
+        old_data = {
+            "SOME PARK (1000)": {
+                "10": [("2022-06-22", "2022-06-23"), ("2022-06-25", "2022-06-26")],
+                "11": [("2022-06-22", "2022-06-24")],
+            }
+        }
+        new_data = {
+            "SOME PARK (1000)": {
+                "10": [("2022-06-22", "2022-06-23"), ("2022-06-27", "2022-06-28")],
+            },
+            "OTHER PARK (2000)": {"20": [("2022-06-22", "2022-06-23")]},
+        }
+
+        opened, closed = availability_diff.diff(new_data, old_data)
+
+        self.assertEqual(
+            [
+                ("OTHER PARK (2000)", "20", "2022-06-22", "2022-06-23"),
+                ("SOME PARK (1000)", "10", "2022-06-27", "2022-06-28"),
+            ],
+            opened,
+        )
+        self.assertEqual(
+            [
+                ("SOME PARK (1000)", "10", "2022-06-25", "2022-06-26"),
+                ("SOME PARK (1000)", "11", "2022-06-22", "2022-06-24"),
+            ],
+            closed,
+        )
+
+    def testDiff_NoChanges(self):
+        data = {"SOME PARK (1000)": {10: [("2022-06-22", "2022-06-23")]}}
+        self.assertEqual(([], []), availability_diff.diff(data, data))
+
+    def testGroupRanges_InvertsToRanges(self):
+        data = {
+            "SOME PARK (1000)": {
+                "10": [("2022-06-22", "2022-06-23"), ("2022-06-25", "2022-06-26")],
+            }
+        }
+        self.assertEqual(
+            data,
+            availability_diff.group_ranges(sorted(availability_diff.to_ranges(data))),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from datetime import datetime
+
+import camping
+from benchmarks.payloads import generate_parks
+from utils import availability_matrix
+
+
+@unittest.skipIf(availability_matrix.np is None, "numpy is not installed")
+class TestAvailabilityMatrix(unittest.TestCase):
+    def setUp(self):
+        self.months = [datetime(2030, 6, 1), datetime(2030, 7, 1)]
+        self.data = generate_parks(3, self.months, sites_per_park=40, density=0.5)
+
+    def assertSameAsPerSiteEvaluation(self, start_date, end_date, **kwargs):
+        campsite_type = kwargs.pop("campsite_type", None)
+        excluded_dates = kwargs.pop("excluded_dates", ())
+        results = availability_matrix.evaluate_parks(
+            self.data, start_date, end_date, campsite_type, excluded_dates=excluded_dates, **kwargs
+        )
+        for park_id, api_data in self.data.items():
+            park_information = camping.get_park_information(
+                park_id, start_date, end_date, campsite_type, api_data=api_data
+            )
+            current, maximum, available_dates = camping.get_num_available_sites(
+                park_information,
+                start_date,
+                end_date,
+                nights=kwargs.get("nights"),
+                weekends_only=kwargs.get("weekends_only", False),
+            )
+            self.assertEqual((current, maximum), results[park_id][:2])
+            self.assertEqual(dict(available_dates), dict(results[park_id][2]))
+
+    def testEvaluateParks_MatchesPerSiteEvaluation(self):
+        self.assertSameAsPerSiteEvaluation(
+            datetime(2030, 6, 10), datetime(2030, 7, 20), nights=3,
+            excluded_dates=camping.load_excluded_dates(),
+        )
+
+    def testEvaluateParks_WeekendsAndCampsiteType(self):
+        self.assertSameAsPerSiteEvaluation(
+            datetime(2030, 6, 1), datetime(2030, 7, 31), nights=2, weekends_only=True,
+            campsite_type="STANDARD ELECTRIC", excluded_dates=camping.load_excluded_dates(),
+        )
+
+    def testWindowStarts_CumulativeSum(self):
+        matrix = availability_matrix.AvailabilityMatrix.from_month_data({}, datetime(2030, 6, 1).date(), 0)
+        available = availability_matrix.np.array([[1, 1, 1, 0, 1, 1]], dtype=bool)
+        self.assertEqual(
+            [[True, True, False, False, True]],
+            matrix.window_starts(available, 2).tolist(),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
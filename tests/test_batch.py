@@ -0,0 +1,71 @@
+import io
+import json
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import batch
+from benchmarks.payloads import generate_month
+from clients.recreation_client import RecreationClient
+
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.lines = [
+            '{"id": "a", "parks": [1, 2], "start_date": "2030-06-10", "end_date": "2030-07-05", "nights": 2}',
+            "# comments and blank lines are skipped",
+            "",
+            '{"parks": ["2"], "start_date": "2030-06-20", "end_date": "2030-06-25", "campsite_ids": [20003]}',
+        ]
+
+    def testReadQueries_NormalizesSpecs(self):
+        queries = batch.read_queries(self.lines)
+
+        self.assertEqual(["a", 3], [q["id"] for q in queries])
+        self.assertEqual(["2"], queries[1]["parks"])
+        self.assertEqual((20003,), queries[1]["campsite_ids"])
+        self.assertEqual(datetime(2030, 6, 20), queries[1]["start_date"])
+
+    def testFetchForQueries_FetchesEachParkMonthOnce(self):
+        queries = batch.read_queries(self.lines)
+        with mock.patch.object(
+            RecreationClient, "get_availability", side_effect=lambda p, m: generate_month(p, m, 5)
+        ) as get_availability, mock.patch.object(
+            RecreationClient, "get_park_name", side_effect=lambda p: f"PARK {p}"
+        ) as get_park_name:
+            month_data_by_pair, names = batch.fetch_for_queries(queries)
+
+        self.assertEqual(4, get_availability.call_count)
+        self.assertEqual(2, get_park_name.call_count)
+        self.assertIn(("2", datetime(2030, 6, 1)), month_data_by_pair)
+
+        outputs = [
+            json.loads(batch.generate_query_output(q, batch.run_query(q, month_data_by_pair, names)))
+            for q in queries
+        ]
+        self.assertEqual({"1", "2"}, set(outputs[0]["parks"]))
+        # Both queries are evaluated against the same park 2 data
+        self.assertEqual(
+            outputs[0]["parks"]["2"]["total"], outputs[1]["parks"]["2"]["total"]
+        )
+        self.assertTrue(
+            set(outputs[1]["parks"]["2"]["sites"]) <= {"20003"}
+        )
+
+    def testMain_WritesOneResultPerQuery(self):
+        args = batch.build_parser().parse_args(["--no-cache"])
+        args.queries = self.lines
+        out = io.StringIO()
+        with mock.patch.object(
+            RecreationClient, "get_availability", side_effect=lambda p, m: generate_month(p, m, 5)
+        ), mock.patch.object(
+            RecreationClient, "get_park_name", side_effect=lambda p: f"PARK {p}"
+        ):
+            batch.main(args, out)
+
+        results = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(["a", 3], [r["id"] for r in results])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+from argparse import Namespace
+
+from benchmarks import bench_pipeline
+from benchmarks.payloads import CAMPSITE_TYPES
+
+
+class TestBenchPipeline(unittest.TestCase):
+    def testRun_TimesEveryStage(self):
+        args = Namespace(
+            parks=2, sites_per_park=10, months=1, density=0.5, nights=1,
+            campsite_types=CAMPSITE_TYPES, repeat=1,
+        )
+        results = bench_pipeline.run(args)
+        self.assertEqual(results["params"]["parks"], 2)
+        self.assertIn("get_park_information", results["stages"])
+        self.assertIn("notifier_diff", results["stages"])
+        for stage in results["stages"].values():
+            self.assertEqual(stage["runs"], 1)
+            self.assertGreaterEqual(stage["best"], 0)
+
+    def testCompare_FlagsStagesSlowerThanThreshold(self):
+        baseline = {"stages": {"a": {"best": 1.0}, "b": {"best": 1.0}}}
+        results = {"stages": {"a": {"best": 1.1}, "b": {"best": 1.5}, "c": {"best": 9}}}
+        self.assertEqual(bench_pipeline.compare(results, baseline, threshold=0.2), {"b": 1.5})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import camping
+from clients.campground_store import CampgroundStore
+from clients.recreation_client import RecreationClient
+
+
+class TestCampgroundStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = CampgroundStore(self.tmp_dir.name)
+        self.month_data = {
+            "campsites": {
+                "10": {
+                    "campsite_id": "10",
+                    "campsite_type": "STANDARD NONELECTRIC",
+                    "max_num_people": 6,
+                    "type_of_use": "Overnight",
+                    "availabilities": {"2022-06-22T00:00:00Z": "Available"},
+                },
+            }
+        }
+
+    def tearDown(self):
+        RecreationClient.use_metadata_store(None)
+        self.tmp_dir.cleanup()
+
+    def testUpdate_PersistsNameAndCampsiteDetails(self):
+        self.store.update(1, "SOME PARK", [self.month_data])
+        self.store.save()
+
+        store = CampgroundStore(self.tmp_dir.name)
+        self.assertFalse(store.is_stale(1))
+        self.assertEqual("SOME PARK", store.get_name("1"))
+        self.assertEqual(
+            {
+                "10": {
+                    "campsite_type": "STANDARD NONELECTRIC",
+                    "max_num_people": 6,
+                    "type_of_use": "Overnight",
+                }
+            },
+            store.get_campsites(1),
+        )
+
+    def testIsStale_AfterTtl(self):
+        store = CampgroundStore(self.tmp_dir.name, ttl=timedelta(seconds=-1))
+        store.update(1, "SOME PARK", [self.month_data])
+        self.assertTrue(store.is_stale(1))
+        self.assertTrue(store.is_stale(2))
+
+    def testGetParksData_OnlyFetchesNamesOfStaleParks(self):
+        self.store.update(1, "SOME PARK", [self.month_data])
+        RecreationClient.use_metadata_store(self.store)
+        with mock.patch.object(
+            RecreationClient, "get_availability", return_value=self.month_data
+        ), mock.patch.object(
+            RecreationClient, "get_park_name", return_value="OTHER PARK"
+        ) as get_park_name:
+            _, names = RecreationClient.get_parks_data(
+                [1, 2], [datetime(2022, 6, 1)]
+            )
+
+        get_park_name.assert_called_once_with(2)
+        self.assertEqual({1: "SOME PARK", 2: "OTHER PARK"}, names)
+        self.assertFalse(self.store.is_stale(2))
+
+    def testGetParkInformation_FiltersOnStoredDetails(self):
+        campsites = {"10": {"campsite_type": "GROUP STANDARD NONELECTRIC"}}
+        park_information = camping.get_park_information(
+            1,
+            datetime(2022, 6, 1),
+            datetime(2022, 6, 30),
+            api_data=[self.month_data],
+            campsites=campsites,
+        )
+        self.assertEqual({}, park_information)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,9 @@
+import io
+import os
+import tempfile
 import unittest
+from datetime import date
+from unittest import mock
 
 import camping
 from enums.date_format import DateFormat
@@ -181,6 +186,47 @@ class TestCamping(unittest.TestCase):
         )
         self.assertEqual(output, expected)
 
+    def testWriteHumanOutput_HeaderIsTrailer(self):
+        info_by_park_id = {
+            1000: (0, 3, {}, "SOME PARK"),
+            2000: (1, 2, {7: [{"start": "2022-06-22", "end": "2022-06-23"}]}, "OTHER PARK"),
+        }
+        start_date = CampingArgumentParser.TypeConverter.date("2022-06-22")
+        end_date = CampingArgumentParser.TypeConverter.date("2022-06-24")
+        stream = io.StringIO()
+
+        has_availabilities = camping.write_human_output(
+            info_by_park_id.items(), start_date, end_date, stream=stream
+        )
+
+        output, _ = camping.generate_human_output(info_by_park_id, start_date, end_date)
+        header, go_to, *park_lines = output.split("\n")
+        self.assertTrue(has_availabilities)
+        self.assertEqual(park_lines + [header, go_to], stream.getvalue().splitlines())
+
+    def testWriteJsonOutput_MatchesGeneratedJson(self):
+        info_by_park_id = {
+            "1000": (0, 3, {}, "SOME PARK"),
+            "2000": (1, 2, {7: [{"start": "2022-06-22", "end": "2022-06-23"}]}, "OTHER PARK"),
+            "3000": (1, 2, {8: [{"start": "2022-06-23", "end": "2022-06-24"}]}, "THIRD PARK"),
+        }
+        stream = io.StringIO()
+
+        camping.write_json_output(info_by_park_id.items(), stream=stream)
+
+        output, _ = camping.generate_json_output(info_by_park_id)
+        self.assertEqual(output + "\n", stream.getvalue())
+
+    def testLoadExcludedDates_SkipsLinesThatAreNotDates(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "excluded_dates.txt")
+            with open(path, "w") as f:
+                f.write("2022-06-25\nnext friday\n\n2022-07-04\n")
+            with mock.patch.object(camping, "EXCLUDED_DATES_FILE", path):
+                excluded_dates = camping.load_excluded_dates()
+
+        self.assertEqual({date(2022, 6, 25), date(2022, 7, 4)}, excluded_dates)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,75 @@
+import json
+import random
+import unittest
+import urllib.error
+import urllib.request
+from datetime import date, datetime
+
+from benchmarks.fake_server import FakeRecreationServer, LatencyDistribution
+from benchmarks.load_test import percentile, sweep_dates
+from clients.recreation_client import DEFAULT_BASE_URL, RecreationClient
+
+
+class TestFakeServer(unittest.TestCase):
+    def startServer(self, **kwargs):
+        server = FakeRecreationServer(seed=1, sites_per_park=5, **kwargs).start()
+        self.addCleanup(server.stop)
+        return server
+
+    def testClient_FetchesMonthAndNameFromServer(self):
+        server = self.startServer()
+        RecreationClient.configure(base_url=server.url)
+        self.addCleanup(RecreationClient.configure, base_url=DEFAULT_BASE_URL)
+
+        month = RecreationClient.get_availability(1000, datetime(2030, 1, 1))
+        self.assertEqual(5, len(month["campsites"]))
+        self.assertIn(
+            "2030-01-31T00:00:00Z", month["campsites"]["10000000"]["availabilities"]
+        )
+        self.assertEqual("PARK 1000", RecreationClient.get_park_name(1000))
+        self.assertEqual({200: 2}, server.status_counts)
+
+    def testThrottleRate_Sends429WithRetryAfter(self):
+        server = self.startServer(throttle_rate=1, retry_after=7)
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(server.url + "/api/camps/campgrounds/1")
+        self.assertEqual(429, e.exception.code)
+        self.assertEqual("7", e.exception.headers["Retry-After"])
+
+    def testSlowBody_StillSendsWholePayload(self):
+        server = self.startServer(slow_body_rate=1, slow_body_bytes_per_second=10 ** 7)
+        url = server.url + "/api/camps/availability/campground/1/month?start_date=2030-02-01T00:00:00.000Z"
+        with urllib.request.urlopen(url) as resp:
+            month = json.load(resp)
+        self.assertEqual(5, month["count"])
+
+    def testLatencyDistribution_ParsesSpecs(self):
+        rng = random.Random(1)
+        self.assertEqual(0.25, LatencyDistribution("fixed:0.25").sample(rng))
+        self.assertTrue(0.1 <= LatencyDistribution("uniform:0.1,0.2").sample(rng) <= 0.2)
+        self.assertGreater(LatencyDistribution("lognormal:0.1,0.5").sample(rng), 0)
+        with self.assertRaises(ValueError):
+            LatencyDistribution("normal:1")
+        with self.assertRaises(ValueError):
+            LatencyDistribution("uniform:0.1")
+
+
+class TestLoadTest(unittest.TestCase):
+    def testPercentile_NearestRank(self):
+        values = list(range(1, 101))
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(99, percentile(values, 99))
+        self.assertEqual(3, percentile([3], 99))
+        self.assertIsNone(percentile([], 50))
+
+    def testSweepDates_WholeMonthsFromNextMonth(self):
+        self.assertEqual(
+            (date(2027, 1, 1), date(2027, 2, 28)), sweep_dates(2, date(2026, 12, 15))
+        )
+        self.assertEqual(
+            (date(2026, 11, 1), date(2026, 11, 30)), sweep_dates(1, date(2026, 10, 17))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+
+from utils.history_store import HistoryStore
+
+
+def month_data(states_by_site):
+    return {
+        "campsites": {
+            site_id: {
+                "availabilities": {
+                    f"2022-06-{i + 1:02d}T00:00:00Z": state
+                    for i, state in enumerate(states)
+                }
+            }
+            for site_id, states in states_by_site.items()
+        }
+    }
+
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.now = datetime(2022, 5, 1, 7, 30).timestamp()
+        self.store = HistoryStore(
+            os.path.join(self.tmp_dir.name, "history.db"), clock=lambda: self.now
+        )
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def testRecordMonth_FirstObservationIsNotAChange(self):
+        self.assertEqual(
+            0, self.store.record_month(1000, month_data({"10": ["Reserved"] * 3}))
+        )
+        self.assertEqual([], list(self.store.get_changes()))
+
+    def testRecordMonth_AppendsOnlyChangedSiteDays(self):
+        self.store.record_month(
+            1000, month_data({"10": ["Reserved"] * 3, "11": ["Available"] * 3})
+        )
+        self.now += 3600
+
+        num_changes = self.store.record_month(
+            1000,
+            month_data(
+                {
+                    "10": ["Reserved", "Available", "Reserved"],
+                    "11": ["Available", "Available", "Reserved"],
+                }
+            ),
+        )
+
+        self.assertEqual(2, num_changes)
+        self.assertEqual(
+            [
+                (
+                    datetime(2022, 5, 1, 8, 30),
+                    1000,
+                    10,
+                    date(2022, 6, 2),
+                    "Reserved",
+                    "Available",
+                )
+            ],
+            list(self.store.get_changes(site_id="10", start_date=date(2022, 6, 2))),
+        )
+        self.assertEqual(
+            [], list(self.store.get_changes(park_id=2000))
+        )
+
+    def testCancellationHours_CountsChangesToAvailableByHour(self):
+        self.store.record_month(1000, month_data({"10": ["Reserved"] * 3}))
+        self.store.record_month(1000, month_data({"10": ["Available"] * 3}))
+        self.now += 3600
+        self.store.record_month(1000, month_data({"10": ["Reserved"] * 3}))
+        self.store.record_month(1000, month_data({"10": ["Reserved", "Available", "Reserved"]}))
+
+        hours = self.store.cancellation_hours(1000)
+
+        self.assertEqual(24, len(hours))
+        self.assertEqual(3, hours[7])
+        self.assertEqual(1, hours[8])
+        self.assertEqual(4, sum(hours))
+
+
+if __name__ == "__main__":
+    unittest.main()
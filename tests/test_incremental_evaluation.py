@@ -0,0 +1,60 @@
+import copy
+import unittest
+from datetime import datetime
+
+import camping
+from benchmarks.payloads import generate_parks
+from utils.incremental_evaluation import IncrementalEvaluator
+
+
+class TestIncrementalEvaluation(unittest.TestCase):
+    def setUp(self):
+        months = [datetime(2030, 6, 1), datetime(2030, 7, 1)]
+        self.api_data = generate_parks(1, months, sites_per_park=40, density=0.5)[1]
+        self.evaluator = IncrementalEvaluator()
+
+    def check(self, api_data, evaluator=None, **kwargs):
+        return camping.check_park(
+            1, datetime(2030, 6, 10), datetime(2030, 7, 20), None,
+            nights=kwargs.pop("nights", 2), api_data=api_data, park_name="PARK",
+            evaluator=evaluator, **kwargs,
+        )
+
+    def assertSameAsFullEvaluation(self, api_data, **kwargs):
+        incremental = self.check(api_data, self.evaluator, **kwargs)
+        full = self.check(api_data, **kwargs)
+        self.assertEqual(full, incremental)
+        self.assertEqual(list(full[2]), list(incremental[2]))
+
+    def testEvaluate_OnlyRecomputesChangedSites(self):
+        self.assertSameAsFullEvaluation(self.api_data)
+        self.assertEqual({"recomputed": 40, "reused": 0}, self.evaluator.stats)
+
+        polled = copy.deepcopy(self.api_data)
+        self.assertSameAsFullEvaluation(polled)
+        self.assertEqual({"recomputed": 40, "reused": 40}, self.evaluator.stats)
+
+        availabilities = polled[1]["campsites"]["10003"]["availabilities"]
+        for date in list(availabilities)[:10]:
+            availabilities[date] = "Available"
+        polled[0]["campsites"]["10005"]["availabilities"]["2030-06-15T00:00:00Z"] = "Reserved"
+        self.assertSameAsFullEvaluation(polled)
+        self.assertEqual({"recomputed": 42, "reused": 78}, self.evaluator.stats)
+
+    def testEvaluate_RecomputesEverythingWhenQueryChanges(self):
+        self.assertSameAsFullEvaluation(self.api_data)
+        self.assertSameAsFullEvaluation(self.api_data, nights=3)
+        self.assertEqual({"recomputed": 80, "reused": 0}, self.evaluator.stats)
+
+    def testEvaluate_SiteDetailsChangeRecomputesSite(self):
+        self.assertSameAsFullEvaluation(self.api_data)
+        polled = copy.deepcopy(self.api_data)
+        for month_data in polled:
+            month_data["campsites"]["10001"]["max_num_people"] = 1
+        del polled[1]["campsites"]["10002"]
+        self.assertSameAsFullEvaluation(polled)
+        self.assertEqual({"recomputed": 42, "reused": 38}, self.evaluator.stats)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import urllib.request
+
+from utils.metrics import MetricsRegistry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(prefix="test_")
+        self.requests = self.registry.counter("requests_total", "Requests")
+        self.latency = self.registry.histogram(
+            "latency_seconds", "Latency", buckets=(0.1, 1)
+        )
+        self.available = self.registry.gauge("sites_available", "Sites")
+
+    def testDisabled_RecordsNothing(self):
+        self.requests.inc(status=200)
+        self.latency.observe(0.5)
+        self.assertNotIn("test_requests_total{", self.registry.render())
+
+    def testRender_PrometheusTextFormat(self):
+        self.registry.enable()
+        self.requests.inc(endpoint="availability", status=200)
+        self.requests.inc(endpoint="availability", status=200)
+        self.latency.observe(0.05)
+        self.latency.observe(0.5)
+        self.latency.observe(5)
+        self.available.set(3, park="232447")
+
+        lines = self.registry.render().splitlines()
+
+        self.assertIn("# TYPE test_requests_total counter", lines)
+        self.assertIn(
+            'test_requests_total{endpoint="availability",status="200"} 2', lines
+        )
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 2', lines)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn("test_latency_seconds_sum 5.55", lines)
+        self.assertIn("test_latency_seconds_count 3", lines)
+        self.assertIn('test_sites_available{park="232447"} 3', lines)
+
+    def testServe_ExposesMetrics(self):
+        self.registry.enable()
+        self.requests.inc(status=200)
+        server = self.registry.serve(0)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/metrics"
+            with urllib.request.urlopen(url) as resp:
+                body = resp.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn('test_requests_total{status="200"} 1', body)
+
+
+if __name__ == "__main__":
+    unittest.main()
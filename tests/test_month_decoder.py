@@ -0,0 +1,85 @@
+import json
+import unittest
+from datetime import datetime
+
+from benchmarks.fake_server import FakeRecreationServer
+from benchmarks.payloads import generate_month
+from clients.month_decoder import compact_site, decode_month
+from clients.recreation_client import DEFAULT_BASE_URL, RecreationClient
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestMonthDecoder(unittest.TestCase):
+    def setUp(self):
+        self.month = generate_month(1, datetime(2030, 6, 1), 20)
+        self.expected = {
+            "campsites": {
+                campsite_id: compact_site(site)
+                for campsite_id, site in self.month["campsites"].items()
+            },
+            "count": self.month["count"],
+        }
+
+    def testDecodeMonth_SameAsFullDecodeForAnyChunkSize(self):
+        body = json.dumps(self.month).encode()
+        for size in (1, 3, 7, 100, len(body)):
+            with self.subTest(size=size):
+                self.assertEqual(self.expected, decode_month(chunked(body, size)))
+
+    def testDecodeMonth_KeepsOnlySiteFieldsAndAvailableNights(self):
+        campsites = decode_month([json.dumps(self.month).encode()])["campsites"]
+        for campsite_id, site in campsites.items():
+            self.assertEqual(
+                {"availabilities", "campsite_id", "campsite_type", "max_num_people", "type_of_use"},
+                set(site),
+            )
+            self.assertEqual(
+                [
+                    date
+                    for date, value in self.month["campsites"][campsite_id]["availabilities"].items()
+                    if value == "Available"
+                ],
+                list(site["availabilities"]),
+            )
+
+    def testDecodeMonth_NumberSplitAcrossChunks(self):
+        self.assertEqual(
+            {"campsites": {}, "count": 12345},
+            decode_month([b'{"campsites": {}, "count": 12', b"345}"]),
+        )
+
+    def testDecodeMonth_MultibyteCharacterSplitAcrossChunks(self):
+        body = json.dumps(
+            {"campsites": {"1": {"campsite_id": "1", "campsite_type": "CAMPING ÑÜ"}}},
+            ensure_ascii=False,
+        ).encode()
+        decoded = decode_month(chunked(body, 1))
+        self.assertEqual("CAMPING ÑÜ", decoded["campsites"]["1"]["campsite_type"])
+
+    def testDecodeMonth_TruncatedPayloadRaises(self):
+        body = json.dumps(self.month).encode()
+        with self.assertRaises(ValueError):
+            decode_month(chunked(body[:len(body) // 2], 100))
+
+
+class TestStreamingDecode(unittest.TestCase):
+    def testClient_StreamingDecodeFromServer(self):
+        server = FakeRecreationServer(seed=1, sites_per_park=5).start()
+        self.addCleanup(server.stop)
+        RecreationClient.configure(base_url=server.url)
+        self.addCleanup(RecreationClient.configure, base_url=DEFAULT_BASE_URL, streaming_decode=False)
+
+        full = RecreationClient.get_availability(1000, datetime(2030, 1, 1))
+        RecreationClient.configure(streaming_decode=True)
+        streamed = RecreationClient.get_availability(1000, datetime(2030, 1, 1))
+        self.assertEqual(
+            {campsite_id: compact_site(site) for campsite_id, site in full["campsites"].items()},
+            streamed["campsites"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,13 @@
+import os
+import tempfile
 import unittest
+from datetime import timedelta
+from unittest import mock
 
 import camping
 import notifier
 from utils.camping_argparser import CampingArgumentParser
+from utils.snapshot_store import SnapshotStore
 
 
 class TestNotifier(unittest.TestCase):
@@ -66,6 +71,52 @@ class TestNotifier(unittest.TestCase):
         ]
         self.assertEqual(expected, availability_strings)
 
+    def testGetAvailabilityData_TwoDigitSiteCountAtEndOfOutput(self):
+        dates_by_site_id = {
+            site_id: [{"start": "2022-06-22", "end": "2022-06-23"}]
+            for site_id in range(18600, 18612)
+        }
+        output, _ = camping.generate_human_output(
+            {1000: (12, 12, dates_by_site_id, "SOME PARK")},
+            CampingArgumentParser.TypeConverter.date("2022-06-22"),
+            CampingArgumentParser.TypeConverter.date("2022-06-24"),
+            True
+        )
+
+        availability = notifier.get_availability_data(output.split("\n")[2:])
+        self.assertEqual(12, len(availability["SOME PARK (1000)"]))
+        self.assertEqual(
+            [("2022-06-22", "2022-06-23")], availability["SOME PARK (1000)"]["18611"]
+        )
+
+    def testNotify_ResultSaysWhyNothingWasSent(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        store = SnapshotStore(os.path.join(tmp_dir.name, "snapshot.db"), timedelta(hours=12))
+        self.addCleanup(store.close)
+        available = {"SOME PARK (1000)": {"18621": [("2022-06-22", "2022-06-23")]}}
+        closed = {"SOME PARK (1000)": {}}
+
+        def notify(availability):
+            return notifier.notify(
+                availability, "There are campsites available\n", ["@user"],
+                notifier.NotificationMethod.TWITTER, None,
+            )
+
+        with mock.patch.object(notifier, "_snapshot_store", store), \
+                mock.patch.object(notifier, "is_too_soon", return_value=False), \
+                mock.patch.object(notifier, "_create_tweet") as create_tweet, \
+                mock.patch.object(
+                    notifier, "get_delay_file",
+                    return_value=os.path.join(tmp_dir.name, "next.txt"),
+                ):
+            self.assertEqual(notifier.NotifyResult.SENT, notify(available))
+            self.assertEqual(notifier.NotifyResult.NOTHING_NEW, notify(available))
+            self.assertEqual(notifier.NotifyResult.NOTHING_AVAILABLE, notify(closed))
+            # The closed range was forgotten, so its reopening is news
+            self.assertEqual(notifier.NotifyResult.SENT, notify(available))
+        self.assertEqual(2, create_tweet.call_count)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,124 @@
+import io
+import unittest
+from unittest import mock
+
+import camping
+import notifier
+from utils import pipe_format
+from utils.camping_argparser import CampingArgumentParser
+
+
+class TestPipeFormat(unittest.TestCase):
+    def setUp(self):
+        self.info_by_park_id = {
+            "1000": (
+                2,
+                3,
+                {
+                    18621: [{"start": "2022-06-22", "end": "2022-06-23"}],
+                    18654: [
+                        {"start": "2022-06-22", "end": "2022-06-23"},
+                        {"start": "2022-06-25", "end": "2022-06-26"},
+                    ],
+                },
+                "SOME PARK",
+            ),
+            "2000": (0, 5, {}, "OTHER PARK"),
+        }
+        self.start_date = CampingArgumentParser.TypeConverter.date("2022-06-22")
+        self.end_date = CampingArgumentParser.TypeConverter.date("2022-06-27")
+
+    def writeRecords(self, stream, fmt):
+        return camping.write_records(
+            self.info_by_park_id.items(),
+            self.start_date,
+            self.end_date,
+            fmt,
+            stream=stream,
+        )
+
+    def testNdjson_RoundTripsToNotifierAvailability(self):
+        stream = io.StringIO()
+        self.assertTrue(self.writeRecords(stream, pipe_format.NDJSON))
+        lines = stream.getvalue().splitlines()
+        # One record per park plus the summary
+        self.assertEqual(3, len(lines))
+
+        availability, first_line = notifier.get_availability_data_from_records(
+            pipe_format.read_ndjson(lines)
+        )
+        self.assertEqual(
+            notifier.get_availability_data_from_info(self.info_by_park_id),
+            availability,
+        )
+        human_output, _ = camping.generate_human_output(
+            self.info_by_park_id, self.start_date, self.end_date
+        )
+        self.assertEqual(human_output.split("\n")[0] + "\n", first_line)
+
+    def testBinary_RoundTripsRecords(self):
+        stream = io.BytesIO()
+        self.writeRecords(stream, pipe_format.BINARY)
+        stream.seek(0)
+        records = list(pipe_format.read_records(stream, pipe_format.BINARY))
+        self.assertEqual(
+            [pipe_format.PARK_RECORD, pipe_format.PARK_RECORD, pipe_format.SUMMARY_RECORD],
+            [r["type"] for r in records],
+        )
+        self.assertEqual(
+            [["2022-06-22", "2022-06-23"], ["2022-06-25", "2022-06-26"]],
+            records[0]["sites"]["18654"],
+        )
+
+    def testBinary_RaisesOnTruncatedFrame(self):
+        frame = pipe_format.encode({"type": "park"}, pipe_format.BINARY)
+        with self.assertRaises(ValueError):
+            list(pipe_format.read_binary(io.BytesIO(frame[:-1])))
+
+    def testNotifyFromRecords_NotifiesEachParkAsItArrives(self):
+        consumed = []
+
+        def records():
+            for park_id, info in self.info_by_park_id.items():
+                consumed.append(park_id)
+                yield pipe_format.park_record(park_id, info)
+            consumed.append("summary")
+            yield pipe_format.summary_record(True, "There are campsites available")
+
+        notified = []
+        with mock.patch.object(
+            notifier, "notify", side_effect=lambda availability, first_line, *_: notified.append(
+                (list(consumed), list(availability), first_line)
+            ) or notifier.NotifyResult.SENT
+        ), mock.patch.object(notifier, "persist_availability") as persist, \
+                mock.patch.object(notifier, "exit") as exit_:
+            notifier.notify_from_records(records(), ["user"], notifier.NotificationMethod.TWITTER, None)
+
+        self.assertEqual(
+            [(["1000"], ["SOME PARK (1000)"], "🏕 SOME PARK (1000): 2 site(s) available out of 3 site(s)\n")],
+            notified,
+        )
+        persist.assert_called_once_with({"OTHER PARK (2000)": {}})
+        exit_.assert_called_once_with(0)
+
+    def testTrailingSummaryLine_FoundAfterStreamedParks(self):
+        stream = io.StringIO()
+        camping.write_human_output(
+            self.info_by_park_id.items(), self.start_date, self.end_date, stream=stream
+        )
+        lines = io.StringIO(stream.getvalue()).readlines()
+        self.assertFalse(lines[0].startswith(notifier.SUMMARY_LINE_PREFIX))
+        self.assertEqual(
+            "There are campsites available from 2022-06-22 to 2022-06-27!!!\n",
+            notifier.get_trailing_summary_line(lines),
+        )
+        self.assertIsNone(notifier.get_trailing_summary_line(lines[:2]))
+
+    def testRecords_MissingSummaryGivesNoFirstLine(self):
+        records = [pipe_format.park_record("1000", self.info_by_park_id["1000"])]
+        _, first_line = notifier.get_availability_data_from_records(records)
+        self.assertIsNone(first_line)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from datetime import datetime
+from unittest import mock
+
+import camping
+from utils.profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def testDisabled_RecordsNothing(self):
+        profiler = Profiler()
+        with profiler.stage("fetch", 1000):
+            pass
+        profiler.count("sites scanned", 10)
+
+        self.assertEqual({}, dict(profiler.stages))
+        self.assertEqual({}, dict(profiler.counters))
+
+    def testStage_RecordsTimesPerStageAndPark(self):
+        profiler = Profiler()
+        profiler.enable()
+        with profiler.stage("fetch", 1000):
+            pass
+        profiler.add_time("fetch", 0.5, 2000)
+        profiler.add_time("render", 0.25)
+        profiler.count("sites scanned", 10)
+        profiler.count("sites scanned", 5)
+
+        self.assertEqual(2, profiler.stages["fetch"][0])
+        self.assertGreaterEqual(profiler.stages["fetch"][1], 0.5)
+        self.assertEqual({"fetch": 0.5}, dict(profiler.park_stages[2000]))
+        self.assertEqual(15, profiler.counters["sites scanned"])
+
+        report = profiler.report()
+        # Slowest stage first
+        self.assertLess(report.index("fetch"), report.index("render"))
+        self.assertIn("sites scanned: 15", report)
+
+    def testGetParkInformation_CountsEachSiteScannedOnce(self):
+        profiler = Profiler()
+        profiler.enable()
+        month = {
+            "campsites": {
+                "1": {"campsite_type": "STANDARD NONELECTRIC", "availabilities": {}},
+                "2": {"campsite_type": "STANDARD NONELECTRIC", "availabilities": {}},
+            }
+        }
+        with mock.patch.object(camping, "PROFILER", profiler):
+            camping.get_park_information(
+                1000, datetime(2022, 6, 1), datetime(2022, 7, 31), api_data=[month, month]
+            )
+
+        self.assertEqual(2, profiler.counters["sites scanned"])
+        self.assertIn("filter sites", profiler.stages)
+
+
+if __name__ == "__main__":
+    unittest.main()
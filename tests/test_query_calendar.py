@@ -0,0 +1,48 @@
+import unittest
+from datetime import date, datetime
+
+from utils.query_calendar import QueryCalendar
+
+
+class TestQueryCalendar(unittest.TestCase):
+    def setUp(self):
+        # 2022-06-20 is a Monday
+        self.start = datetime(2022, 6, 20)
+        self.end = datetime(2022, 6, 30)
+
+    def testMask_ApiAndPlainDatesInRange(self):
+        calendar = QueryCalendar(self.start, self.end, nights=1)
+        self.assertEqual(
+            0b101,
+            calendar.mask(["2022-06-20T00:00:00Z", "2022-06-22", "2022-06-30T00:00:00Z", "2022-06-19"]),
+        )
+
+    def testAllowed_WeekendsAndExcludedDates(self):
+        calendar = QueryCalendar(
+            self.start, self.end, nights=1, weekends_only=True, excluded_dates={date(2022, 6, 25)}
+        )
+        # Friday 24th only, Saturday 25th is excluded
+        self.assertEqual(1 << 4, calendar.allowed)
+
+    def testRanges_RunsOfNights(self):
+        calendar = QueryCalendar(self.start, self.end, nights=2)
+        starts = calendar.run_starts(
+            ["2022-06-21T00:00:00Z", "2022-06-22T00:00:00Z", "2022-06-23T00:00:00Z", "2022-06-26T00:00:00Z"]
+        )
+        self.assertEqual(
+            [
+                {"start": "2022-06-21", "end": "2022-06-23"},
+                {"start": "2022-06-22", "end": "2022-06-24"},
+            ],
+            calendar.ranges(starts),
+        )
+
+    def testNights_DefaultsToWholeRange(self):
+        calendar = QueryCalendar(self.start, self.end)
+        self.assertEqual(10, calendar.nights)
+        self.assertEqual(calendar.key, QueryCalendar(self.start, self.end, nights=10).key)
+        self.assertNotEqual(calendar.key, QueryCalendar(self.start, self.end, nights=3).key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from clients.rate_limiter import (
+    DEFAULT_THROTTLE_PAUSE,
+    RateLimiter,
+    RateLimitWaitTooLong,
+    parse_retry_after,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def makeLimiter(self, rate=None, burst=None):
+        return RateLimiter(rate, burst, clock=self.clock, sleep=self.clock.sleep)
+
+    def testAcquire_SpacesRequestsAfterBurst(self):
+        limiter = self.makeLimiter(rate=2, burst=2)
+        times = []
+        for _ in range(5):
+            limiter.acquire()
+            times.append(self.clock.now)
+        self.assertEqual([0.0, 0.0, 0.5, 1.0, 1.5], times)
+        self.assertEqual(5, limiter.stats["requests"])
+
+    def testAcquire_UnlimitedWithoutRate(self):
+        limiter = self.makeLimiter()
+        for _ in range(100):
+            limiter.acquire()
+        self.assertEqual(0.0, self.clock.now)
+
+    def testThrottle_PausesEveryRequest(self):
+        limiter = self.makeLimiter()
+        limiter.throttle("3")
+        limiter.acquire()
+        self.assertEqual(3.0, self.clock.now)
+        self.assertEqual(1, limiter.stats["throttled"])
+
+    def testThrottle_DefaultPauseWithoutRetryAfter(self):
+        limiter = self.makeLimiter()
+        limiter.throttle(None)
+        limiter.acquire()
+        self.assertEqual(DEFAULT_THROTTLE_PAUSE, self.clock.now)
+
+    def testAcquire_RaisesWhenWaitExceedsMaxWait(self):
+        limiter = self.makeLimiter()
+        limiter.throttle("10")
+        with self.assertRaises(RateLimitWaitTooLong):
+            limiter.acquire(max_wait=5)
+        self.assertEqual(0.0, self.clock.now)
+
+    def testParseRetryAfter_SecondsAndHttpDate(self):
+        self.assertEqual(120.0, parse_retry_after("120"))
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+        self.assertAlmostEqual(
+            60, parse_retry_after(format_datetime(retry_at, usegmt=True)), delta=2
+        )
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
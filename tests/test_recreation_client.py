@@ -0,0 +1,92 @@
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from clients.recreation_client import DeadlineExceeded, RecreationClient
+
+
+class TestRecreationClient(unittest.TestCase):
+    def setUp(self):
+        self.months = [datetime(2022, 6, 1), datetime(2022, 7, 1)]
+
+    def tearDown(self):
+        RecreationClient.set_deadline(None)
+        RecreationClient.configure(max_workers=8)
+
+    def fakeGetAvailability(self, park_id, month_date):
+        if park_id == 2 and month_date.month == 7:
+            return None
+        return {"park": park_id, "month": month_date.month}
+
+    def testGetParksData_ReturnsMonthsInOrderPerPark(self):
+        with mock.patch.object(
+            RecreationClient, "get_availability", side_effect=self.fakeGetAvailability
+        ), mock.patch.object(
+            RecreationClient, "get_park_name", side_effect=lambda p: f"PARK {p}"
+        ):
+            month_data, names = RecreationClient.get_parks_data(
+                [1, 2], self.months, max_workers=4
+            )
+
+        self.assertEqual(
+            [{"park": 1, "month": 6}, {"park": 1, "month": 7}], month_data[1]
+        )
+        # Months that failed to fetch are left out
+        self.assertEqual([{"park": 2, "month": 6}], month_data[2])
+        self.assertEqual({1: "PARK 1", 2: "PARK 2"}, names)
+
+    def testGetAvailabilities_SkipsEmptyMonths(self):
+        with mock.patch.object(
+            RecreationClient, "get_availability", side_effect=self.fakeGetAvailability
+        ):
+            month_data = RecreationClient.get_availabilities(2, self.months)
+
+        self.assertEqual([{"park": 2, "month": 6}], month_data)
+
+    def testRunConcurrently_DeadlineReturnsPartialResults(self):
+        RecreationClient.set_deadline(0.2)
+        jobs = [(lambda: "fast", ()), (time.sleep, (1,))]
+
+        start = time.monotonic()
+        results = RecreationClient._run_concurrently(jobs)
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(["fast", None], results)
+
+    def testIterParksData_YieldsFastParksFirst(self):
+        def slowGetAvailability(park_id, month_date):
+            if park_id == 1:
+                time.sleep(0.2)
+            return self.fakeGetAvailability(park_id, month_date)
+
+        with mock.patch.object(
+            RecreationClient, "get_availability", side_effect=slowGetAvailability
+        ), mock.patch.object(
+            RecreationClient, "get_park_name", side_effect=lambda p: f"PARK {p}"
+        ):
+            parks = list(RecreationClient.iter_parks_data([1, 2], self.months))
+
+        self.assertEqual(
+            [
+                (2, [{"park": 2, "month": 6}], "PARK 2"),
+                (1, [{"park": 1, "month": 6}, {"park": 1, "month": 7}], "PARK 1"),
+            ],
+            parks,
+        )
+
+    def testSendRequest_RaisesOncePastDeadline(self):
+        RecreationClient.set_deadline(0)
+        with self.assertRaises(DeadlineExceeded):
+            RecreationClient._send_request("http://localhost", {})
+
+    def testGetSession_PoolSizedToWorkers(self):
+        RecreationClient.configure(max_workers=3)
+        session = RecreationClient.get_session()
+
+        self.assertIs(session, RecreationClient.get_session())
+        self.assertEqual(3, session.get_adapter("https://").__dict__["_pool_maxsize"])
+
+
+if __name__ == "__main__":
+    unittest.main()
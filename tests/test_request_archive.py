@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+import requests
+
+from clients.recreation_client import RecreationClient
+from clients.request_archive import ReplayMiss, ReplaySession, RequestArchive
+
+MONTH_URL = "https://www.recreation.gov/api/camps/availability/campground/1/month"
+MONTH_PARAMS = {"start_date": "2030-01-01T00:00:00.000Z"}
+
+
+def make_response(status, content, headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = content
+    resp.headers.update(headers or {})
+    return resp
+
+
+class TestRequestArchive(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive = RequestArchive(os.path.join(tmp.name, "run.db"))
+        self.addCleanup(self.archive.close)
+
+    def testReplay_ResponsesInRecordedOrderThenRepeatsLast(self):
+        self.archive.record(MONTH_URL, MONTH_PARAMS, make_response(429, b"", {"Retry-After": "3"}), 0.1)
+        self.archive.record(MONTH_URL, MONTH_PARAMS, make_response(200, b'{"campsites": {}}'), 0.2)
+        self.archive.flush()
+
+        session = ReplaySession(self.archive)
+        first = session.get("http://127.0.0.1:8080/api/camps/availability/campground/1/month", params=MONTH_PARAMS)
+        self.assertEqual(429, first.status_code)
+        self.assertEqual("3", first.headers["retry-after"])
+        self.assertEqual({"campsites": {}}, session.get(MONTH_URL, params=MONTH_PARAMS).json())
+        self.assertEqual(200, session.get(MONTH_URL, params=MONTH_PARAMS).status_code)
+
+    def testReplay_MissingRequestRaises(self):
+        session = ReplaySession(self.archive)
+        with self.assertRaises(ReplayMiss):
+            session.get(MONTH_URL, params=MONTH_PARAMS)
+
+    def testReplay_WithTimingSleepsForRecordedDuration(self):
+        self.archive.record(MONTH_URL, MONTH_PARAMS, make_response(200, b"{}"), 0.25)
+        slept = []
+        ReplaySession(self.archive, timing=True, sleep=slept.append).get(MONTH_URL, params=MONTH_PARAMS)
+        self.assertEqual([0.25], slept)
+
+    def testClient_RecordsThenReplays(self):
+        body = b'{"campsites": {"1": {"availabilities": {}}}}'
+        self.archive.record(MONTH_URL, MONTH_PARAMS, make_response(200, body), 0.1)
+        RecreationClient.use_replay(self.archive)
+        self.addCleanup(RecreationClient.use_replay, None)
+
+        other = RequestArchive(os.path.join(os.path.dirname(self.archive.path), "copy.db"))
+        self.addCleanup(other.close)
+        RecreationClient.use_recorder(other)
+        self.addCleanup(RecreationClient.use_recorder, None)
+
+        month = RecreationClient.get_availability(1, datetime(2030, 1, 1))
+        self.assertEqual({"campsites": {"1": {"availabilities": {}}}}, month)
+        self.assertEqual(
+            body, ReplaySession(other).get(MONTH_URL, params=MONTH_PARAMS).content
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
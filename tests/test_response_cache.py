@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from clients import response_cache
+from clients.recreation_client import RecreationClient
+from clients.response_cache import ResponseCache
+
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(self.tmp_dir.name)
+        self.month = datetime(2022, 7, 1)
+        self.today = datetime(2022, 7, 15)
+        RecreationClient.use_cache(self.cache)
+
+    def tearDown(self):
+        RecreationClient.use_cache(None)
+        self.tmp_dir.cleanup()
+
+    def fakeResponse(self, status_code, body=None, headers=None):
+        resp = mock.Mock(status_code=status_code, headers=headers or {})
+        resp.json.return_value = body
+        return resp
+
+    def testTtl_DependsOnHowCloseTheMonthIs(self):
+        self.assertEqual(
+            response_cache.PAST_MONTH_TTL,
+            ResponseCache.ttl(datetime(2022, 6, 1), self.today),
+        )
+        self.assertEqual(
+            response_cache.CURRENT_MONTH_TTL,
+            ResponseCache.ttl(self.month, self.today),
+        )
+        self.assertEqual(
+            response_cache.NEAR_MONTH_TTL,
+            ResponseCache.ttl(datetime(2022, 9, 1), self.today),
+        )
+        self.assertEqual(
+            response_cache.FAR_MONTH_TTL,
+            ResponseCache.ttl(datetime(2023, 1, 1), self.today),
+        )
+
+    def testGetAvailability_FreshEntrySkipsNetwork(self):
+        self.cache.put(1, self.month, {"campsites": {}})
+        with mock.patch.object(ResponseCache, "is_fresh", return_value=True), \
+                mock.patch.object(RecreationClient, "_get") as get:
+            data = RecreationClient.get_availability(1, self.month)
+
+        get.assert_not_called()
+        self.assertEqual({"campsites": {}}, data)
+        self.assertEqual(1, self.cache.stats["fresh"])
+
+    def testGetAvailability_StaleEntryRevalidatedWithEtag(self):
+        self.cache.put(1, self.month, {"campsites": {}}, etag='"abc"')
+        with mock.patch.object(ResponseCache, "is_fresh", return_value=False), \
+                mock.patch.object(
+                    RecreationClient, "_get", return_value=self.fakeResponse(304)
+                ) as get:
+            data = RecreationClient.get_availability(1, self.month)
+
+        self.assertEqual({"If-None-Match": '"abc"'}, get.call_args[0][2])
+        self.assertEqual({"campsites": {}}, data)
+        self.assertEqual(1, self.cache.stats["revalidated"])
+        self.assertGreater(self.cache.get(1, self.month)["fetched_at"], time.time() - 60)
+
+    def testGetAvailability_MissIsStoredWithValidators(self):
+        resp = self.fakeResponse(
+            200, {"campsites": {"1": {}}}, {"Last-Modified": "Fri, 01 Jul 2022"}
+        )
+        with mock.patch.object(RecreationClient, "_get", return_value=resp):
+            data = RecreationClient.get_availability(1, self.month)
+
+        entry = self.cache.get(1, self.month)
+        self.assertEqual({"campsites": {"1": {}}}, data)
+        self.assertEqual(data, entry["body"])
+        self.assertEqual("Fri, 01 Jul 2022", entry["last_modified"])
+        self.assertEqual(1, self.cache.stats["fetched"])
+
+    def testGetAvailability_StreamedMissIsCachedCompact(self):
+        site = {"campsite_id": "1", "loop": "A", "availabilities": {"2022-07-01": "Reserved"}}
+        resp = self.fakeResponse(200, headers={"ETag": '"abc"'})
+        resp.iter_content.return_value = [json.dumps({"campsites": {"1": site}}).encode()]
+        RecreationClient.configure(streaming_decode=True)
+        self.addCleanup(RecreationClient.configure, streaming_decode=False)
+        with mock.patch.object(RecreationClient, "_get", return_value=resp) as get:
+            data = RecreationClient.get_availability(1, self.month)
+
+        self.assertTrue(get.call_args[1]["stream"])
+        resp.json.assert_not_called()
+        self.assertEqual({"1": {"campsite_id": "1", "availabilities": {}}}, data["campsites"])
+        entry = self.cache.get(1, self.month)
+        self.assertEqual(data, entry["body"])
+        self.assertTrue(entry["compact"])
+
+    def testGetAvailability_CompactEntryRefetchedWithoutStreaming(self):
+        self.cache.put(1, self.month, {"campsites": {}}, etag='"abc"', compact=True)
+        resp = self.fakeResponse(200, {"campsites": {"1": {}}})
+        with mock.patch.object(ResponseCache, "is_fresh", return_value=True), \
+                mock.patch.object(RecreationClient, "_get", return_value=resp) as get:
+            data = RecreationClient.get_availability(1, self.month)
+
+        self.assertEqual({}, get.call_args[0][2])
+        self.assertEqual({"campsites": {"1": {}}}, data)
+        self.assertFalse(self.cache.get(1, self.month)["compact"])
+
+    def testPrune_DeletesPastMonthsAndOldEntries(self):
+        self.cache.put(1, datetime(2022, 6, 1), {})
+        self.cache.put(1, self.month, {})
+        self.cache.put(2, self.month, {})
+        self.cache.put(1, datetime(2022, 8, 1), {})
+        old = time.time() - response_cache.MAX_ENTRY_AGE.total_seconds() - 60
+        os.utime(self.cache._path(2, self.month), (old, old))
+
+        self.assertEqual(2, self.cache.prune(self.today))
+        self.assertIsNone(self.cache.get(1, datetime(2022, 6, 1)))
+        self.assertIsNone(self.cache.get(2, self.month))
+        self.assertIsNotNone(self.cache.get(1, self.month))
+        self.assertIsNotNone(self.cache.get(1, datetime(2022, 8, 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+from utils.scheduler import PollScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestPollScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def testRun_PollsDueParksTogetherThenOnTheirInterval(self):
+        scheduler = PollScheduler([1, 2], 60, jitter=0, clock=self.clock, sleep=self.clock.sleep)
+        scheduler.set_interval(2, 90)
+        polls = []
+
+        scheduler.run(lambda park_ids: polls.append((self.clock.now, park_ids)), max_rounds=4)
+
+        self.assertEqual(
+            [(0, [1, 2]), (60, [1]), (90, [2]), (120, [1])], polls
+        )
+
+    def testRun_JitterStaysWithinBounds(self):
+        scheduler = PollScheduler([1], 100, jitter=0.1, clock=self.clock, sleep=self.clock.sleep)
+        times = []
+
+        scheduler.run(lambda park_ids: times.append(self.clock.now), max_rounds=20)
+
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        self.assertTrue(all(90 <= gap <= 110 for gap in gaps))
+
+    def testRun_FailingPollIsRescheduled(self):
+        scheduler = PollScheduler([1], 10, jitter=0, clock=self.clock, sleep=self.clock.sleep)
+        calls = []
+
+        def poll(park_ids):
+            calls.append(self.clock.now)
+            raise RuntimeError("failedRequest")
+
+        scheduler.run(poll, max_rounds=2)
+        self.assertEqual([0, 10], calls)
+
+    def testRecordPoll_AdaptsIntervalWithinBounds(self):
+        scheduler = PollScheduler(
+            [1, 2], 100, jitter=0, min_interval=30, max_interval=150,
+            clock=self.clock, sleep=self.clock.sleep,
+        )
+        # Park 1 changes on every poll, park 2 never does
+        scheduler.run(lambda park_ids: [p for p in park_ids if p == 1], max_rounds=10)
+
+        self.assertEqual({1: 30, 2: 150}, scheduler.intervals)
+        schedule = {park["park_id"]: park for park in scheduler.schedule()}
+        # Every poll but the first, which has nothing to compare with
+        self.assertEqual(schedule[1]["polls"] - 1, schedule[1]["changes"])
+        self.assertEqual(0, schedule[2]["changes"])
+        self.assertGreater(schedule[1]["change_rate"], schedule[2]["change_rate"])
+        self.assertIn("change rate", scheduler.format_schedule())
+
+    def testRecordPoll_FirstPollKeepsInterval(self):
+        scheduler = PollScheduler(
+            [1], 100, min_interval=30, max_interval=150, clock=self.clock, sleep=self.clock.sleep,
+        )
+        scheduler.record_poll(1, True)
+        self.assertEqual({1: 100}, scheduler.intervals)
+        self.assertEqual(0, scheduler.parks[1]["changes"])
+        scheduler.record_poll(1, True)
+        self.assertEqual({1: 50}, scheduler.intervals)
+
+    def testRecordPoll_FixedIntervalWithoutBounds(self):
+        scheduler = PollScheduler([1], 100, clock=self.clock, sleep=self.clock.sleep)
+        scheduler.record_poll(1, True)
+        scheduler.record_poll(1, False)
+        self.assertEqual({1: 100}, scheduler.intervals)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from datetime import datetime
+
+import camping
+from utils import site_filter
+from utils.site_filter import SiteFilter
+
+
+def make_site(campsite_id, campsite_type="STANDARD NONELECTRIC", max_num_people=6, type_of_use="Overnight"):
+    return {
+        "campsite_id": campsite_id,
+        "campsite_type": campsite_type,
+        "max_num_people": max_num_people,
+        "type_of_use": type_of_use,
+        "availabilities": {
+            "2030-06-01T00:00:00Z": "Available",
+            "2030-06-02T00:00:00Z": "Reserved",
+        },
+    }
+
+
+class TestSiteFilter(unittest.TestCase):
+    def testRejectReason_InOrderOfFilters(self):
+        plan = SiteFilter("STANDARD NONELECTRIC", excluded_site_ids=[1])
+        self.assertEqual(site_filter.EXCLUDED, plan.reject_reason("1", make_site("1", max_num_people=1)))
+        self.assertEqual(site_filter.MAX_PEOPLE, plan.reject_reason("2", make_site("2", max_num_people=1)))
+        self.assertEqual(site_filter.TYPE_OF_USE, plan.reject_reason("3", make_site("3", type_of_use="Day")))
+        self.assertEqual(site_filter.CAMPSITE_TYPE, plan.reject_reason("4", make_site("4", "RV NONELECTRIC")))
+        self.assertEqual(
+            site_filter.UNWANTED_TYPE, SiteFilter().reject_reason("5", make_site("5", "WALK TO"))
+        )
+        self.assertIsNone(plan.reject_reason("6", make_site("6")))
+
+    def testWantsDates_OnlyRequestedCampsiteIds(self):
+        self.assertTrue(SiteFilter().wants_dates(make_site("7")))
+        plan = SiteFilter(campsite_ids=[7])
+        self.assertTrue(plan.wants_dates(make_site("7")))
+        self.assertFalse(plan.wants_dates(make_site("8")))
+
+    def testGetParkInformation_CountsRejectedSitesOncePerPark(self):
+        month = {
+            "campsites": {
+                "1": make_site("1"),
+                "2": make_site("2", "GROUP STANDARD NONELECTRIC"),
+                "3": make_site("3", max_num_people=1),
+                "4": make_site("4"),
+            }
+        }
+        with self.assertLogs(camping.LOG, "INFO") as logs:
+            data = camping.get_park_information(
+                1, datetime(2030, 6, 1), datetime(2030, 6, 30),
+                campsite_ids=[1], api_data=[month, month],
+            )
+        self.assertEqual({"1": ["2030-06-01T00:00:00Z"] * 2, "4": []}, data)
+        skipped = [line for line in logs.output if "Skipped" in line]
+        self.assertEqual(1, len(skipped))
+        self.assertIn("2 sites at park 1: 1 (group/walk-in/management), 1 (max people)", skipped[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from datetime import datetime
+
+import camping
+from benchmarks.payloads import generate_parks
+from utils.query_calendar import QueryCalendar
+from utils.site_model import AvailabilityWindow, Campsite, expand_info, intern_site_id
+
+
+class TestSiteModel(unittest.TestCase):
+    def testCampsite_FromRunStartsMatchesCalendarRanges(self):
+        calendar = QueryCalendar(datetime(2022, 6, 22), datetime(2022, 7, 2), nights=2)
+        starts = calendar.run_starts([
+            "2022-06-22T00:00:00Z", "2022-06-23T00:00:00Z", "2022-06-24T00:00:00Z",
+            "2022-06-30T00:00:00Z", "2022-07-01T00:00:00Z",
+        ])
+        campsite = Campsite.from_run_starts("3", calendar, starts)
+        self.assertEqual(calendar.ranges(starts), campsite.to_ranges())
+        self.assertEqual(
+            AvailabilityWindow(datetime(2022, 6, 22).toordinal(), datetime(2022, 6, 24).toordinal()),
+            campsite.windows[0],
+        )
+        self.assertEqual(Campsite("3", 2, campsite.starts), campsite)
+        self.assertNotEqual(Campsite("3", 3, campsite.starts), campsite)
+
+    def testInternSiteId_SharesOneCopy(self):
+        self.assertIs(intern_site_id("".join(["100", "01"])), intern_site_id(10001))
+
+    def testCheckPark_CompactExpandsToUsualResult(self):
+        months = [datetime(2030, 6, 1), datetime(2030, 7, 1)]
+        api_data = generate_parks(1, months, sites_per_park=40, density=0.5)[1]
+
+        def check(**kwargs):
+            return camping.check_park(
+                1, datetime(2030, 6, 10), datetime(2030, 7, 20), None,
+                nights=2, api_data=api_data, park_name="PARK", **kwargs,
+            )
+
+        info = check()
+        compact = check(compact=True)
+        self.assertTrue(all(isinstance(c, Campsite) for c in compact[2]))
+        self.assertEqual(info, expand_info(compact))
+        self.assertEqual(list(info[2]), list(expand_info(compact)[2]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+
+import notifier
+from utils import availability_diff, snapshot_store
+from utils.snapshot_store import SnapshotStore
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.now = 1000.0
+        self.store = SnapshotStore(
+            os.path.join(self.tmp_dir.name, "snapshot.db"),
+            ttl=timedelta(hours=1),
+            clock=lambda: self.now,
+        )
+        self.availability = {
+            "SOME PARK (1000)": {
+                "10": [("2022-06-22", "2022-06-23")],
+                "11": [("2022-06-24", "2022-06-26")],
+            }
+        }
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def storedRanges(self):
+        return {
+            (park, site): snapshot_store._decode_ranges(ranges)
+            for park, site, ranges in self.store._conn.execute(
+                "SELECT park, site, ranges FROM site_ranges"
+            )
+        }
+
+    def testUpdate_OnlyReportsChangedSites(self):
+        self.assertEqual(
+            {("SOME PARK (1000)", "10"): None, ("SOME PARK (1000)", "11"): None},
+            self.store.update(self.availability),
+        )
+        self.availability["SOME PARK (1000)"]["11"] = [("2022-06-25", "2022-06-26")]
+
+        changed = self.store.update(self.availability)
+
+        self.assertEqual(
+            {("SOME PARK (1000)", "11"): (("2022-06-24", "2022-06-26"),)}, changed
+        )
+        self.assertEqual(
+            (("2022-06-25", "2022-06-26"),),
+            self.storedRanges()[("SOME PARK (1000)", "11")],
+        )
+
+    def testUpdate_DeletesSitesThatAreGone(self):
+        self.store.update(self.availability)
+        del self.availability["SOME PARK (1000)"]["10"]
+
+        self.assertEqual(
+            {("SOME PARK (1000)", "10"): (("2022-06-22", "2022-06-23"),)},
+            self.store.update(self.availability),
+        )
+        self.assertEqual([("SOME PARK (1000)", "11")], list(self.storedRanges()))
+
+    def testUpdate_OnlyReplacesGivenParks(self):
+        self.store.update(self.availability)
+        other = {"OTHER PARK (2000)": {"20": [("2022-06-22", "2022-06-23")]}}
+
+        self.assertEqual({("OTHER PARK (2000)", "20"): None}, self.store.update(other))
+        self.assertEqual(
+            {"SOME PARK (1000)", "OTHER PARK (2000)"},
+            {park for park, _ in self.storedRanges()},
+        )
+        # A park without availability loses all of its sites
+        changed = self.store.update({"SOME PARK (1000)": {}})
+        self.assertEqual(
+            {("SOME PARK (1000)", "10"), ("SOME PARK (1000)", "11")}, set(changed)
+        )
+        self.assertEqual([("OTHER PARK (2000)", "20")], list(self.storedRanges()))
+
+    def testUpdate_ExpiredSitesCountAsNew(self):
+        self.store.update(self.availability)
+        self.now += timedelta(hours=2).total_seconds()
+
+        self.assertEqual(2, len(self.store.update(self.availability)))
+        self.assertEqual(0, self.store.expire())
+
+    def testGetChangedAvailability_OnlyChangedSites(self):
+        self.store.update(self.availability)
+        self.availability["SOME PARK (1000)"]["11"] = [
+            ("2022-06-24", "2022-06-26"),
+            ("2022-06-28", "2022-06-29"),
+        ]
+        changed = self.store.update(self.availability)
+
+        new_data, old_data = notifier.get_changed_availability(
+            self.availability, changed
+        )
+
+        self.assertEqual(["11"], list(new_data["SOME PARK (1000)"]))
+        opened, _ = availability_diff.diff(new_data, old_data)
+        self.assertEqual(1, len(opened))
+        opened, _ = availability_diff.diff(
+            *notifier.get_changed_availability(
+                self.availability, self.store.update(self.availability)
+            )
+        )
+        self.assertEqual([], list(opened))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+Availability as integer bitmasks over day offsets.
+
+Bit `i` of a mask stands for the night starting `i` days after the first
+day of the query, so filtering by weekends or excluded dates is a single
+`&`, and finding runs of N free nights is a handful of shifts and ANDs.
+Dates are only turned back into strings when the results are output.
+"""
+
+
+def full_mask(num_days):
+    return (1 << num_days) - 1
+
+
+def dates_to_mask(dates, first_day, num_days):
+    """
+    Build a mask from `date`s. Dates outside of the `num_days` days
+    starting at `first_day` are ignored.
+    """
+    first_ordinal = first_day.toordinal()
+    mask = 0
+    for day in dates:
+        offset = day.toordinal() - first_ordinal
+        if 0 <= offset < num_days:
+            mask |= 1 << offset
+    return mask
+
+
+def weekday_mask(first_day, num_days, weekdays):
+    """
+    Mask of the days whose `weekday()` is in `weekdays`.
+    """
+    first_weekday = first_day.weekday()
+    mask = 0
+    for offset in range(num_days):
+        if (first_weekday + offset) % 7 in weekdays:
+            mask |= 1 << offset
+    return mask
+
+
+def run_starts(mask, nights):
+    """
+    Mask of the offsets from which `nights` consecutive nights are all set
+    in `mask`.
+
+    The run length covered by `starts` doubles on every step, so this takes
+    O(log nights) big-integer operations rather than one per night.
+    """
+    if nights <= 0:
+        return 0
+    starts = mask
+    covered = 1
+    while covered * 2 <= nights:
+        starts &= starts >> covered
+        covered *= 2
+    if covered < nights:
+        # Overlap two runs of `covered` nights to cover the remainder
+        starts &= starts >> (nights - covered)
+    return starts
+
+
+def iter_offsets(mask):
+    """
+    Yield the offsets of the set bits of `mask`, lowest first.
+    """
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
@@ -0,0 +1,40 @@
+"""
+Diff two availability snapshots (park->site->[(start, end)]) into the exact
+date ranges that opened and closed, each as a (park, site, start, end)
+tuple.
+"""
+
+
+def to_ranges(availability_by_park):
+    """
+    Flatten park->site->[(start, end)] into a set of (park, site, start, end).
+    """
+    return {
+        (park, str(site), start, end)
+        for park, sites in availability_by_park.items()
+        for site, date_ranges in sites.items()
+        for start, end in date_ranges
+    }
+
+
+def diff(new_data, old_data):
+    """
+    Returns a tuple of sorted lists, (opened, closed): the ranges in
+    `new_data` but not `old_data`, and the ranges in `old_data` but not
+    `new_data`.
+    """
+    new_ranges = to_ranges(new_data)
+    old_ranges = to_ranges(old_data)
+    return sorted(new_ranges - old_ranges), sorted(old_ranges - new_ranges)
+
+
+def group_ranges(ranges):
+    """
+    Turn (park, site, start, end) tuples back into park->site->[(start, end)].
+    """
+    availability_by_park = {}
+    for park, site, start, end in ranges:
+        availability_by_park.setdefault(park, {}).setdefault(site, []).append(
+            (start, end)
+        )
+    return availability_by_park
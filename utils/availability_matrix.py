@@ -0,0 +1,243 @@
+"""
+Optional vectorized evaluation of many parks at once with NumPy.
+
+Every park's month payloads are decoded into one dense boolean matrix of
+sites x days, with parallel arrays holding each row's site ID, park and
+campsite details. Site filters, weekends and excluded dates then become
+array masks, and N-night windows come from a single cumulative sum.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from enums.date_format import DateFormat
+from utils import formatter
+from utils.query_calendar import WEEKEND_DAYS
+from utils.site_filter import EXCLUDED_CAMPSITE_TYPES
+
+
+class _DateOffsets(dict):
+    """
+    Maps API date keys to day offsets from `first_ordinal`, parsing each
+    key the first time it is looked up.
+    """
+
+    def __init__(self, first_ordinal):
+        super().__init__()
+        self.first_ordinal = first_ordinal
+
+    def __missing__(self, date_string):
+        offset = self[date_string] = (
+            date.fromisoformat(date_string[:10]).toordinal() - self.first_ordinal
+        )
+        return offset
+
+
+class AvailabilityMatrix:
+    def __init__(
+        self, available, site_ids, park_index, park_ids, campsite_types, max_num_people, type_of_use,
+        first_day,
+    ):
+        self.available = available
+        self.site_ids = site_ids
+        # Row -> position of its park in `park_ids`
+        self.park_index = park_index
+        self.park_ids = park_ids
+        self.campsite_types = campsite_types
+        self.max_num_people = max_num_people
+        self.type_of_use = type_of_use
+        self.first_day = first_day
+        self.sites = np.ones(len(site_ids), dtype=bool)
+
+    @property
+    def num_days(self):
+        return self.available.shape[1]
+
+    @classmethod
+    def from_month_data(
+        cls, api_data_by_park_id, first_day, num_days, campsites_by_park_id=None, site_filter=None,
+    ):
+        """
+        Decode `{park_id: [<month_data>, ...]}` into a matrix covering the
+        `num_days` nights starting at `first_day`. Stored campsite details
+        from `campsites_by_park_id` take precedence over the month payloads.
+
+        `site_filter` is called with the matrix once the site details are
+        known and returns a boolean mask of rows; the availability of the
+        other rows is never decoded and stays False.
+        """
+        if np is None:
+            raise RuntimeError("NumPy is required for vectorized evaluation, run `pip install numpy`")
+        campsites_by_park_id = campsites_by_park_id or {}
+
+        site_ids, park_index, campsite_types, max_num_people, type_of_use = [], [], [], [], []
+        rows_availabilities = []
+        park_ids = list(api_data_by_park_id)
+        for i, park_id in enumerate(park_ids):
+            stored = campsites_by_park_id.get(park_id) or {}
+            row_by_site = {}
+            for month_data in api_data_by_park_id[park_id]:
+                for campsite_id, campsite_data in month_data["campsites"].items():
+                    row = row_by_site.get(campsite_id)
+                    if row is None:
+                        row = row_by_site[campsite_id] = len(site_ids)
+                        site_metadata = stored.get(campsite_id, campsite_data)
+                        site_ids.append(campsite_id)
+                        park_index.append(i)
+                        campsite_types.append(site_metadata.get("campsite_type") or "")
+                        max_num_people.append(site_metadata.get("max_num_people", np.nan))
+                        type_of_use.append(site_metadata.get("type_of_use", "Overnight"))
+                    rows_availabilities.append((row, campsite_data["availabilities"]))
+
+        matrix = cls(
+            np.zeros((len(site_ids), num_days), dtype=bool),
+            np.array(site_ids, dtype=str),
+            np.array(park_index, dtype=np.intp),
+            park_ids,
+            np.array(campsite_types, dtype=str),
+            np.array(max_num_people, dtype=float),
+            np.array(type_of_use, dtype=str),
+            first_day,
+        )
+        keep = site_filter(matrix) if site_filter else np.ones(len(site_ids), dtype=bool)
+
+        # Date keys repeat for every site of a month, parse each one once
+        offset_by_date = _DateOffsets(first_day.toordinal())
+        keep = keep.tolist()
+        rows, counts, cell_cols = [], [], []
+        for row, availabilities in rows_availabilities:
+            if not keep[row]:
+                continue
+            cols = [
+                offset_by_date[date_string]
+                for date_string, availability_value in availabilities.items()
+                if availability_value == "Available"
+            ]
+            cell_cols += cols
+            rows.append(row)
+            counts.append(len(cols))
+
+        cell_rows = np.repeat(np.array(rows, dtype=np.intp), counts)
+        cell_cols = np.array(cell_cols, dtype=np.intp)
+        in_range = (cell_cols >= 0) & (cell_cols < num_days)
+        matrix.available[cell_rows[in_range], cell_cols[in_range]] = True
+        return matrix
+
+    def site_mask(self, campsite_type=None, excluded_site_ids=()):
+        """
+        Rows of the sites that pass the same site filters as
+        `camping.get_park_information`.
+        """
+        mask = ~(self.max_num_people < 2)
+        mask &= np.char.lower(self.type_of_use) == "overnight"
+        if campsite_type:
+            mask &= self.campsite_types == campsite_type
+        lower_types = np.char.lower(self.campsite_types)
+        for excluded_type in EXCLUDED_CAMPSITE_TYPES:
+            mask &= np.char.find(lower_types, excluded_type) < 0
+        if excluded_site_ids:
+            mask &= ~np.isin(self.site_ids, list(excluded_site_ids))
+        return mask
+
+    def day_mask(self, weekends_only=False, excluded_dates=()):
+        weekdays = (self.first_day.weekday() + np.arange(self.num_days)) % 7
+        mask = np.isin(weekdays, WEEKEND_DAYS) if weekends_only else np.ones(self.num_days, dtype=bool)
+        first_ordinal = self.first_day.toordinal()
+        for excluded_date in excluded_dates:
+            offset = excluded_date.toordinal() - first_ordinal
+            if 0 <= offset < self.num_days:
+                mask[offset] = False
+        return mask
+
+    def window_starts(self, available, nights):
+        """
+        Boolean matrix whose cell (site, i) is set when the `nights` nights
+        from offset i are all available.
+        """
+        if nights <= 0:
+            return np.zeros((available.shape[0], 0), dtype=bool)
+        sums = np.zeros((available.shape[0], available.shape[1] + 1), dtype=np.int32)
+        np.cumsum(available, axis=1, out=sums[:, 1:])
+        return (sums[:, nights:] - sums[:, :-nights]) == nights
+
+
+def decode_parks(
+    api_data_by_park_id, start_date, end_date, campsite_type=None, excluded_site_ids=(), campsites_by_park_id=None,
+):
+    """
+    Decode the month payloads of every park into one matrix covering the
+    nights from `start_date` to `end_date`. Only the sites that pass the
+    site filters have their availability decoded; their mask is kept in
+    `matrix.sites`.
+    """
+    num_days = (end_date - start_date).days
+    first_day = (end_date - timedelta(days=num_days)).date()
+
+    def site_filter(matrix):
+        matrix.sites = matrix.site_mask(campsite_type, excluded_site_ids)
+        return matrix.sites
+
+    return AvailabilityMatrix.from_month_data(
+        api_data_by_park_id, first_day, num_days, campsites_by_park_id, site_filter
+    )
+
+
+def evaluate_matrix(matrix, nights=None, weekends_only=False, campsite_ids=(), excluded_dates=()):
+    """
+    Find the N-night windows of every site of a decoded matrix. Returns
+
+    {<park_id>: (<current>, <maximum>, <available_dates_by_campsite_id>)}
+    """
+    num_days = matrix.num_days
+    if nights not in range(1, num_days + 1):
+        nights = num_days
+
+    available = matrix.available & matrix.day_mask(weekends_only, excluded_dates)[None, :]
+    if campsite_ids:
+        available &= np.isin(matrix.site_ids.astype(np.int64), list(campsite_ids))[:, None]
+    starts = matrix.window_starts(available, nights)
+
+    day_strs = [
+        formatter.format_date(
+            matrix.first_day + timedelta(days=i),
+            format_string=DateFormat.INPUT_DATE_FORMAT.value,
+        )
+        for i in range(num_days + 1)
+    ]
+
+    # Count the candidate sites of each park, then walk only the windows found
+    maximum_by_park = np.bincount(matrix.park_index[matrix.sites], minlength=len(matrix.park_ids))
+    results = {
+        park_id: (0, int(maximum_by_park[i]), defaultdict(list))
+        for i, park_id in enumerate(matrix.park_ids)
+    }
+    site_rows, offsets = np.nonzero(starts)
+    for site_row, offset in zip(site_rows.tolist(), offsets.tolist()):
+        park_id = matrix.park_ids[matrix.park_index[site_row]]
+        results[park_id][2][int(matrix.site_ids[site_row])].append(
+            {"start": day_strs[offset], "end": day_strs[offset + nights]}
+        )
+    return {
+        park_id: (len(available_dates), maximum, available_dates)
+        for park_id, (_, maximum, available_dates) in results.items()
+    }
+
+
+def evaluate_parks(
+    api_data_by_park_id, start_date, end_date, campsite_type=None, campsite_ids=(), excluded_site_ids=(),
+    nights=None, weekends_only=False, excluded_dates=(), campsites_by_park_id=None,
+):
+    """
+    Vectorized equivalent of running `get_park_information` and
+    `get_num_available_sites` for every park. Returns
+
+    {<park_id>: (<current>, <maximum>, <available_dates_by_campsite_id>)}
+    """
+    matrix = decode_parks(
+        api_data_by_park_id, start_date, end_date, campsite_type, excluded_site_ids, campsites_by_park_id
+    )
+    return evaluate_matrix(matrix, nights, weekends_only, campsite_ids, excluded_dates)
@@ -4,6 +4,7 @@ import sys
 from datetime import datetime
 
 from enums.date_format import DateFormat
+from utils import pipe_format
 
 
 class CampingArgumentParser(argparse.ArgumentParser):
@@ -58,6 +59,36 @@ class CampingArgumentParser(argparse.ArgumentParser):
                 "available dates and which sites are available."
             ),
         )
+        self.add_argument(
+            "--profile",
+            action="store_true",
+            help=(
+                "Print how long each stage took, per park, and counters such "
+                "as sites scanned and filtered to stderr at the end"
+            ),
+        )
+        self.add_argument(
+            "--profile-output",
+            metavar="FILE",
+            help="Dump cProfile stats of the run (main thread) to FILE",
+        )
+        self.add_argument(
+            "--stream",
+            action="store_true",
+            help=(
+                "Print each park as soon as it has been checked, with the "
+                "summary line last instead of first"
+            ),
+        )
+        self.add_argument(
+            "--pipe-format",
+            choices=pipe_format.FORMATS,
+            help=(
+                "Output a machine-readable record per park as soon as it is "
+                "checked, for piping into notifier.py: NDJSON, or "
+                "length-prefixed binary frames (pass --binary to the notifier)"
+            ),
+        )
         self.add_argument(
             "--weekends-only",
             action="store_true",
@@ -71,6 +102,66 @@ class CampingArgumentParser(argparse.ArgumentParser):
                 "File with site IDs to exclude"
             ),
         )
+        self.add_client_arguments(self)
+        self.add_argument(
+            "--vectorized",
+            action="store_true",
+            help=(
+                "Evaluate all parks at once with NumPy, faster for large "
+                "sweeps (requires numpy)"
+            ),
+        )
+        self.add_argument(
+            "--watch",
+            action="store_true",
+            help=(
+                "Keep running and re-poll each park every --poll-interval "
+                "seconds, reporting only when availability changes"
+            ),
+        )
+        self.add_argument(
+            "--poll-interval",
+            default=300,
+            help="Seconds between polls of a park in --watch mode (default is 300)",
+            type=self.TypeConverter.positive_float,
+        )
+        self.add_argument(
+            "--min-poll-interval",
+            help=(
+                "In --watch mode, let the interval of parks whose availability "
+                "changes often shrink down to this many seconds"
+            ),
+            type=self.TypeConverter.positive_float,
+        )
+        self.add_argument(
+            "--max-poll-interval",
+            help=(
+                "In --watch mode, let the interval of parks whose availability "
+                "rarely changes grow up to this many seconds"
+            ),
+            type=self.TypeConverter.positive_float,
+        )
+        self.add_argument(
+            "--notify",
+            metavar="users",
+            help=(
+                "In --watch mode, tweet these comma separated users (or email "
+                "this address with --email) instead of printing the output"
+            ),
+        )
+        self.add_argument(
+            "--email",
+            action="store_true",
+            help="Notify by email instead of Twitter",
+        )
+        self.add_argument(
+            "--metrics-port",
+            type=self.TypeConverter.positive_int,
+            help=(
+                "In --watch mode, serve Prometheus metrics on "
+                "http://127.0.0.1:<port>/metrics"
+            ),
+        )
         parks_group = self.add_mutually_exclusive_group(required=True)
         parks_group.add_argument(
             "--parks",
@@ -87,6 +178,116 @@ class CampingArgumentParser(argparse.ArgumentParser):
             help="Read list of park ID(s) from stdin instead",
         )
 
+    @classmethod
+    def add_client_arguments(cls, parser):
+        """
+        Options for how recreation.gov is queried, shared with the batch
+        runner.
+        """
+        parser.add_argument(
+            "--max-workers",
+            help=(
+                "Maximum number of concurrent requests to recreation.gov "
+                "(default is 8)"
+            ),
+            type=cls.TypeConverter.positive_int,
+        )
+        parser.add_argument(
+            "--request-timeout",
+            help=(
+                "Seconds to wait for a response to each request to "
+                "recreation.gov (default is 30)"
+            ),
+            type=cls.TypeConverter.positive_float,
+        )
+        parser.add_argument(
+            "--requests-per-second",
+            help=(
+                "Limit the rate of requests to recreation.gov across all "
+                "workers (default is unlimited)"
+            ),
+            type=cls.TypeConverter.positive_float,
+        )
+        parser.add_argument(
+            "--api-url",
+            help=(
+                "Base URL of the recreation.gov API, e.g. a local fake server "
+                "for load testing (default is https://www.recreation.gov)"
+            ),
+        )
+        parser.add_argument(
+            "--deadline",
+            help=(
+                "Give up on requests still outstanding after this many "
+                "seconds and report the partial results"
+            ),
+            type=cls.TypeConverter.positive_float,
+        )
+        parser.add_argument(
+            "--cache-dir",
+            help=(
+                "Directory for cached month availability responses and "
+                "campground details (default is ~/recreation-gov-bot/cache/)"
+            ),
+        )
+        cache = parser.add_mutually_exclusive_group()
+        cache.add_argument(
+            "--cache",
+            action="store_true",
+            help=(
+                "Reuse month availability fetched within the last minute "
+                "(current month) to hour (later months) instead of always "
+                "fetching it"
+            ),
+        )
+        cache.add_argument(
+            "--no-cache",
+            action="store_true",
+            help=(
+                "Also fetch campground names and campsite details from "
+                "recreation.gov on every run"
+            ),
+        )
+        parser.add_argument(
+            "--streaming-decode",
+            action="store_true",
+            help=(
+                "Decode month availability as it is downloaded, keeping only "
+                "available nights, to use less memory on big parks. Not "
+                "used with --record or --record-history"
+            ),
+        )
+        archive = parser.add_mutually_exclusive_group()
+        archive.add_argument(
+            "--record",
+            metavar="ARCHIVE",
+            help=(
+                "Record every response from recreation.gov to this archive, "
+                "to replay the run later"
+            ),
+        )
+        archive.add_argument(
+            "--replay",
+            metavar="ARCHIVE",
+            help=(
+                "Answer requests from an archive made with --record instead "
+                "of recreation.gov"
+            ),
+        )
+        parser.add_argument(
+            "--replay-timing",
+            action="store_true",
+            help="With --replay, make each response take as long as it originally did",
+        )
+        parser.add_argument(
+            "--record-history",
+            action="store_true",
+            help=(
+                "Record every change in a site's availability to history.db "
+                "in the cache directory"
+            ),
+        )
+
     def parse_args(self, args=None, namespace=None):
         args = super().parse_args(args, namespace)
         args.parks = args.parks or [p.strip() for p in sys.stdin]
@@ -99,6 +300,27 @@ class CampingArgumentParser(argparse.ArgumentParser):
             raise cls.ArgumentCombinationError(
                 "--campsite-ids can only be used with a single park ID."
             )
+        if args.pipe_format and (args.json_output or args.watch):
+            raise cls.ArgumentCombinationError(
+                "--pipe-format can't be used with --json-output or --watch."
+            )
+        if args.stream and args.watch:
+            raise cls.ArgumentCombinationError(
+                "--stream can't be used with --watch."
+            )
+        if args.metrics_port and not args.watch:
+            raise cls.ArgumentCombinationError(
+                "--metrics-port can only be used with --watch."
+            )
+        if args.streaming_decode and (args.record or args.record_history):
+            raise cls.ArgumentCombinationError(
+                "--streaming-decode can't be used with --record or --record-history."
+            )
+        if args.notify and not args.watch:
+            raise cls.ArgumentCombinationError(
+                "--notify can only be used with --watch, otherwise pipe the "
+                "output into notifier.py."
+            )
 
     class TypeConverter:
         @classmethod
@@ -116,9 +338,17 @@ class CampingArgumentParser(argparse.ArgumentParser):
         def positive_int(cls, i):
             i = int(i)
             if i <= 0:
-                msg = "Not a valid number of nights: {0}".format(i)
+                msg = "Not a valid positive number: {0}".format(i)
                 raise argparse.ArgumentTypeError(msg)
             return i
 
+        @classmethod
+        def positive_float(cls, f):
+            f = float(f)
+            if f <= 0:
+                msg = "Not a valid positive number: {0}".format(f)
+                raise argparse.ArgumentTypeError(msg)
+            return f
+
     class ArgumentCombinationError(Exception):
         pass
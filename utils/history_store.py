@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import time
+from datetime import date, datetime
+
+# One character per site-day state, so a site's month fits in a short string
+STATE_CODES = {
+    "Available": "A",
+    "Reserved": "R",
+    "Not Available": "N",
+    "Not Reservable": "X",
+    "Not Reservable Management": "M",
+    "Open": "O",
+    "Lottery": "L",
+}
+STATES_BY_CODE = {code: state for state, code in STATE_CODES.items()}
+UNKNOWN_STATE = "?"
+NO_STATE = "."
+AVAILABLE = STATE_CODES["Available"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS site_states (
+    park INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    site INTEGER NOT NULL,
+    states TEXT NOT NULL,
+    PRIMARY KEY (park, month, site)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state_changes (
+    observed_at INTEGER NOT NULL,
+    park INTEGER NOT NULL,
+    site INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    old_state TEXT NOT NULL,
+    new_state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS state_changes_park ON state_changes (park, observed_at);
+CREATE INDEX IF NOT EXISTS state_changes_site ON state_changes (site, day);
+CREATE INDEX IF NOT EXISTS state_changes_day ON state_changes (day);
+"""
+
+
+class HistoryStore:
+    """
+    Append-only history of every observed change in a site-day's state, e.g.
+    a Reserved night becoming Available when someone cancels.
+
+    The latest state of each site's month is kept as one character per day,
+    so recording a month only compares short strings and appends a row per
+    site-day that actually changed. Changes are stored as integers (day
+    ordinals, epoch seconds, numeric IDs) plus one-character states, and are
+    indexed by park, by site and day, and by day.
+    """
+
+    def __init__(self, db_path, clock=time.time):
+        self.db_path = db_path
+        self.clock = clock
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def record_month(self, park_id, month_data):
+        """
+        Compare a month of availability from the API with the last one
+        recorded for the park and append its site-day changes. Days seen for
+        the first time are not changes. Returns the number of changes.
+        """
+        states_by_month = {}
+        for site_id, site in month_data.get("campsites", {}).items():
+            for date_str, state in site.get("availabilities", {}).items():
+                month = int(date_str[0:4] + date_str[5:7])
+                states = states_by_month.setdefault(month, {}).setdefault(
+                    int(site_id), [NO_STATE] * 31
+                )
+                states[int(date_str[8:10]) - 1] = STATE_CODES.get(state, UNKNOWN_STATE)
+
+        park_id = int(park_id)
+        observed_at = int(self.clock())
+        num_changes = 0
+        with self._conn:
+            for month, states_by_site in states_by_month.items():
+                previous_by_site = dict(
+                    self._conn.execute(
+                        "SELECT site, states FROM site_states "
+                        "WHERE park = ? AND month = ?",
+                        (park_id, month),
+                    )
+                )
+                changes = []
+                updates = []
+                for site_id, states in states_by_site.items():
+                    states = "".join(states)
+                    previous = previous_by_site.get(site_id)
+                    if previous == states:
+                        continue
+                    updates.append((park_id, month, site_id, states))
+                    if previous is None:
+                        continue
+                    first_day = date(month // 100, month % 100, 1).toordinal()
+                    for i, (old, new) in enumerate(zip(previous, states)):
+                        if old != new and NO_STATE not in (old, new):
+                            changes.append(
+                                (observed_at, park_id, site_id, first_day + i, old, new)
+                            )
+                self._conn.executemany(
+                    "INSERT INTO state_changes VALUES (?, ?, ?, ?, ?, ?)", changes
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO site_states VALUES (?, ?, ?, ?)", updates
+                )
+                num_changes += len(changes)
+        return num_changes
+
+    def get_changes(self, park_id=None, site_id=None, start_date=None, end_date=None):
+        """
+        Recorded changes, optionally for one park and/or site and for nights
+        from `start_date` up to but excluding `end_date`. Yields
+        (observed_at, park_id, site_id, date, old_state, new_state) tuples
+        with datetimes, dates and state names, oldest first.
+        """
+        conditions = []
+        params = []
+        if park_id is not None:
+            conditions.append("park = ?")
+            params.append(int(park_id))
+        if site_id is not None:
+            conditions.append("site = ?")
+            params.append(int(site_id))
+        if start_date is not None:
+            conditions.append("day >= ?")
+            params.append(start_date.toordinal())
+        if end_date is not None:
+            conditions.append("day < ?")
+            params.append(end_date.toordinal())
+        query = "SELECT * FROM state_changes"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY observed_at"
+        for observed_at, park, site, day, old, new in self._conn.execute(query, params):
+            yield (
+                datetime.fromtimestamp(observed_at),
+                park,
+                site,
+                date.fromordinal(day),
+                STATES_BY_CODE.get(old, old),
+                STATES_BY_CODE.get(new, new),
+            )
+
+    def cancellation_hours(self, park_id):
+        """
+        How many site-days of a park became Available in each hour of the
+        day (local time), as a list of 24 counts.
+        """
+        counts = [0] * 24
+        for hour, count in self._conn.execute(
+            "SELECT strftime('%H', observed_at, 'unixepoch', 'localtime'), "
+            "COUNT(*) FROM state_changes "
+            "WHERE park = ? AND new_state = ? GROUP BY 1",
+            (int(park_id), AVAILABLE),
+        ):
+            counts[int(hour)] = count
+        return counts
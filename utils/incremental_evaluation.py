@@ -0,0 +1,105 @@
+from utils.metrics import SITES_EVALUATED
+from utils.profiler import PROFILER
+from utils.site_model import intern_site_id
+
+
+def site_fingerprints(api_data, campsites=None):
+    """
+    {campsite_id: fingerprint} of everything the evaluation of a site
+    depends on, across all of a park's months: its availabilities and the
+    fields the site filters look at. Sites are in order of first appearance,
+    like `get_park_information` returns them.
+    """
+    campsites = campsites or {}
+    fingerprints = {}
+    for month_data in api_data:
+        for campsite_id, campsite_data in month_data["campsites"].items():
+            campsite_id = intern_site_id(campsite_id)
+            site_metadata = campsites.get(campsite_id, campsite_data)
+            fingerprints[campsite_id] = hash((
+                fingerprints.get(campsite_id),
+                tuple(campsite_data["availabilities"].items()),
+                campsite_data.get("campsite_id"),
+                site_metadata.get("max_num_people"),
+                site_metadata.get("type_of_use"),
+                site_metadata.get("campsite_type"),
+            ))
+    return fingerprints
+
+
+class IncrementalEvaluator:
+    """
+    Keeps the result of each site of each park between polls, and only
+    evaluates the sites whose fingerprint changed (see `site_fingerprints`)
+    again, so the work per poll grows with how much availability changed
+    rather than with the size of the parks.
+
+    Results are only reused for the same query, e.g. the keys of its
+    `QueryCalendar` and `SiteFilter`.
+    """
+
+    def __init__(self):
+        # park_id -> (query, {campsite_id: (fingerprint, included, Campsite or None)})
+        self._parks = {}
+        self.stats = {"recomputed": 0, "reused": 0}
+
+    def evaluate(self, park_id, api_data, query, evaluate_sites, campsites=None):
+        """
+        Same result as `get_num_available_sites` on the whole park, with the
+        available sites as a list of `site_model.Campsite` records.
+
+        `evaluate_sites(api_data)` evaluates month payloads restricted to
+        the changed sites, returning the `get_park_information` dict and the
+        `get_available_campsites` list for them.
+        """
+        fingerprints = site_fingerprints(api_data, campsites)
+        previous_query, previous = self._parks.get(park_id, (None, {}))
+        if previous_query != query:
+            previous = {}
+
+        changed = {
+            campsite_id
+            for campsite_id, fingerprint in fingerprints.items()
+            if campsite_id not in previous or previous[campsite_id][0] != fingerprint
+        }
+        if changed:
+            park_information, available_campsites = evaluate_sites([
+                {
+                    "campsites": {
+                        campsite_id: campsite_data
+                        for campsite_id, campsite_data in month_data["campsites"].items()
+                        if campsite_id in changed
+                    }
+                }
+                for month_data in api_data
+            ])
+            available_by_campsite_id = {
+                campsite.campsite_id: campsite for campsite in available_campsites
+            }
+
+        results = {}
+        maximum = 0
+        available = []
+        for campsite_id, fingerprint in fingerprints.items():
+            if campsite_id in changed:
+                result = results[campsite_id] = (
+                    fingerprint,
+                    campsite_id in park_information,
+                    available_by_campsite_id.get(campsite_id),
+                )
+            else:
+                result = results[campsite_id] = previous[campsite_id]
+            _, included, campsite = result
+            maximum += included
+            if campsite is not None:
+                available.append(campsite)
+        self._parks[park_id] = (query, results)
+
+        reused = len(fingerprints) - len(changed)
+        self.stats["recomputed"] += len(changed)
+        self.stats["reused"] += reused
+        PROFILER.count("sites recomputed", len(changed))
+        PROFILER.count("sites reused", reused)
+        SITES_EVALUATED.inc(len(changed), outcome="recomputed")
+        SITES_EVALUATED.inc(reused, outcome="reused")
+        return len(available), maximum, available
@@ -0,0 +1,210 @@
+"""
+Counters, gauges and histograms exposed in the Prometheus text format, so a
+long-running checker (--watch) can be monitored like any other service.
+
+Like the profiler, metrics are disabled until `METRICS.enable()` is called,
+so the instrumented hot paths only pay for a flag check otherwise.
+"""
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, registry, name, help_text):
+        self.registry = registry
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        # tuple of sorted (label, value) pairs -> value
+        self._values = {}
+
+    def _render_values(self):
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        with self._lock:
+            lines += self._render_values()
+        return lines
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not self.registry.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, registry, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # One count per bucket, the +Inf count, then the sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[i] += 1
+            counts[-1] += value
+
+    def _render_values(self):
+        for labels, counts in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                bucket_labels = labels + (("le", _format_value(bound)),)
+                yield f"{self.name}_bucket{_format_labels(bucket_labels)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(counts[-1])}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self, prefix="campsite_checker_"):
+        self.prefix = prefix
+        self.enabled = False
+        self.metrics = []
+
+    def enable(self):
+        self.enabled = True
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text):
+        return self._add(Counter(self, self.prefix + name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._add(Gauge(self, self.prefix + name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self, self.prefix + name, help_text, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Serve the metrics on http://<host>:<port>/metrics from a daemon
+        thread. Returns the server; call `shutdown()` on it to stop.
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                LOG.debug("Metrics request: " + format % args)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        LOG.info(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+        return server
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels
+    ) + "}"
+
+
+def _format_value(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+METRICS = MetricsRegistry()
+
+REQUESTS = METRICS.counter(
+    "requests_total", "Requests sent to recreation.gov, by endpoint and status code"
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "request_duration_seconds", "Latency of each request to recreation.gov"
+)
+REQUEST_ERRORS = METRICS.counter(
+    "request_errors_total", "Failed requests to recreation.gov, by endpoint and reason"
+)
+THROTTLED = METRICS.counter(
+    "throttled_total", "Responses from recreation.gov asking us to slow down"
+)
+CACHE_LOOKUPS = METRICS.counter(
+    "cache_lookups_total",
+    'Month availability lookups by how they were served: "fresh" and '
+    '"revalidated" are cache hits, "fetched" is a miss',
+)
+POLL_LAG = METRICS.histogram(
+    "poll_lag_seconds", "How late each poll started after it was due"
+)
+PARK_EVALUATION_SECONDS = METRICS.gauge(
+    "park_evaluation_seconds", "Time the last check of each park took"
+)
+PARK_SITES_AVAILABLE = METRICS.gauge(
+    "park_sites_available", "Sites available at each park in the last check"
+)
+PARK_SITES_TOTAL = METRICS.gauge(
+    "park_sites_total", "Sites considered at each park in the last check"
+)
+SITES_EVALUATED = METRICS.counter(
+    "sites_evaluated_total",
+    'Sites checked in each poll, by whether they were "recomputed" or '
+    '"reused" from the previous poll because their data was unchanged',
+)
+NOTIFICATION_SECONDS = METRICS.histogram(
+    "notification_send_duration_seconds", "Time taken to send each notification"
+)
+NOTIFICATION_FAILURES = METRICS.counter(
+    "notification_failures_total", "Notifications that could not be sent"
+)
@@ -0,0 +1,113 @@
+"""
+Machine-readable records that camping.py can write for notifier.py, instead
+of the notifier parsing the human readable output back apart.
+
+A run is a stream of records, one per park as soon as it has been checked,
+followed by a single summary record once every park is done:
+
+{"type": "park", "park_id": ..., "name": ..., "available": 2, "total": 30,
+ "sites": {"<site_id>": [["2023-07-21", "2023-07-23"], ...]}}
+{"type": "summary", "has_availabilities": true, "message": "There are..."}
+
+Records are encoded either as NDJSON (one JSON object per line) or, with
+the binary encoding, as compact JSON prefixed by its length as a 4-byte
+big-endian integer, so a reader can consume a frame without scanning for
+newlines.
+"""
+import json
+import struct
+
+NDJSON = "ndjson"
+BINARY = "binary"
+FORMATS = (NDJSON, BINARY)
+
+PARK_RECORD = "park"
+SUMMARY_RECORD = "summary"
+
+_LENGTH = struct.Struct(">I")
+
+
+def park_record(park_id, info):
+    """
+    Build the record for one park from its `check_park` result.
+    """
+    current, maximum, available_dates_by_site_id, park_name = info
+    return {
+        "type": PARK_RECORD,
+        "park_id": park_id,
+        "name": park_name,
+        "available": current,
+        "total": maximum,
+        "sites": {
+            str(site_id): [[d["start"], d["end"]] for d in dates]
+            for site_id, dates in available_dates_by_site_id.items()
+        },
+    }
+
+
+def summary_record(has_availabilities, message):
+    return {
+        "type": SUMMARY_RECORD,
+        "has_availabilities": has_availabilities,
+        "message": message,
+    }
+
+
+def encode(record, fmt=NDJSON):
+    """
+    Encode a record as a line of text for NDJSON, or a frame of bytes for the
+    binary encoding.
+    """
+    payload = json.dumps(record, separators=(",", ":"))
+    if fmt == BINARY:
+        payload = payload.encode("utf-8")
+        return _LENGTH.pack(len(payload)) + payload
+    return payload + "\n"
+
+
+def write_record(stream, record, fmt=NDJSON):
+    """
+    Write a record to `stream` and flush it so the reader gets it right away.
+    Binary records are written to the underlying byte stream if `stream` is
+    a text stream such as sys.stdout.
+    """
+    if fmt == BINARY:
+        stream.flush()
+        stream = getattr(stream, "buffer", stream)
+    stream.write(encode(record, fmt))
+    stream.flush()
+
+
+def read_ndjson(lines):
+    """
+    Decode records from an iterable of NDJSON lines, one at a time. Blank
+    lines are skipped.
+    """
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_binary(stream):
+    """
+    Decode records from a byte stream of length-prefixed frames, one at a
+    time. Raises ValueError if the stream ends in the middle of a frame.
+    """
+    while True:
+        header = stream.read(_LENGTH.size)
+        if not header:
+            return
+        if len(header) < _LENGTH.size:
+            raise ValueError("Truncated record length")
+        (length,) = _LENGTH.unpack(header)
+        payload = stream.read(length)
+        if len(payload) < length:
+            raise ValueError("Truncated record")
+        yield json.loads(payload)
+
+
+def read_records(stream, fmt=NDJSON):
+    if fmt == BINARY:
+        return read_binary(getattr(stream, "buffer", stream))
+    return read_ndjson(stream)
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Profiler:
+    """
+    Wall-clock time spent in each stage of a run, per stage and per park,
+    plus counters such as the number of sites scanned. Stages can nest, e.g.
+    "decode" is part of "fetch".
+
+    Disabled by default, in which case `stage` and `count` do nothing, so the
+    instrumented code pays next to nothing for it.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # name -> [calls, seconds]
+        self.stages = defaultdict(lambda: [0, 0.0])
+        # park_id -> name -> seconds
+        self.park_stages = defaultdict(lambda: defaultdict(float))
+        self.counters = defaultdict(int)
+
+    def enable(self):
+        self.enabled = True
+
+    @contextmanager
+    def stage(self, name, park_id=None):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start, park_id)
+
+    def add_time(self, name, seconds, park_id=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            stage = self.stages[name]
+            stage[0] += 1
+            stage[1] += seconds
+            if park_id is not None:
+                self.park_stages[park_id][name] += seconds
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += n
+
+    def report(self):
+        lines = ["Stage                          calls    total (s)   mean (ms)"]
+        for name, (calls, seconds) in sorted(
+            self.stages.items(), key=lambda item: -item[1][1]
+        ):
+            lines.append(
+                f"{name:<30} {calls:>5} {seconds:>12.4f} {seconds / calls * 1000:>11.3f}"
+            )
+
+        if self.park_stages:
+            lines.append("")
+            lines.append("Per park (s)")
+            for park_id, seconds_by_name in self.park_stages.items():
+                lines.append(
+                    f"  {park_id}: "
+                    + ", ".join(
+                        f"{name} {seconds:.4f}"
+                        for name, seconds in seconds_by_name.items()
+                    )
+                )
+
+        if self.counters:
+            lines.append("")
+            lines.append("Counters")
+            for name, n in sorted(self.counters.items()):
+                lines.append(f"  {name}: {n}")
+        return "\n".join(lines)
+
+
+PROFILER = Profiler()
@@ -0,0 +1,98 @@
+import logging
+from datetime import timedelta
+
+from enums.date_format import DateFormat
+from utils import availability_bitset
+
+LOG = logging.getLogger(__name__)
+
+# Friday and Saturday nights, as `date.weekday()`
+WEEKEND_DAYS = (4, 5)
+
+
+class QueryCalendar:
+    """
+    The nights of a query, compiled once and shared by every park and site
+    it is evaluated against.
+
+    Night `i` is `first_day + i`, as in `utils.availability_bitset`. API
+    date keys ("2022-06-22T00:00:00Z", or plain "2022-06-22") map straight
+    to their bit, so building a site's mask is one dict lookup per date with
+    no parsing, and the weekend and excluded-date masks are already folded
+    into `allowed`. Dates are only formatted once, for output.
+    """
+
+    def __init__(self, start_date, end_date, nights=None, weekends_only=False, excluded_dates=()):
+        self.num_days = (end_date - start_date).days
+        first_day = (end_date - timedelta(days=self.num_days)).date()
+        self.first_day = first_day
+
+        if nights not in range(1, self.num_days + 1):
+            nights = self.num_days
+            LOG.debug("Setting number of nights to {}.".format(nights))
+        self.nights = nights
+        self.weekends_only = weekends_only
+        self.excluded_dates = frozenset(excluded_dates)
+
+        self.allowed = availability_bitset.full_mask(self.num_days)
+        if self.excluded_dates:
+            self.allowed &= ~availability_bitset.dates_to_mask(
+                self.excluded_dates, first_day, self.num_days
+            )
+        if weekends_only:
+            self.allowed &= availability_bitset.weekday_mask(
+                first_day, self.num_days, WEEKEND_DAYS
+            )
+
+        days = [first_day + timedelta(days=i) for i in range(self.num_days + 1)]
+        self.day_strs = [
+            d.strftime(DateFormat.INPUT_DATE_FORMAT.value) for d in days
+        ]
+        self._bits = {}
+        for offset, d in enumerate(days[:self.num_days]):
+            bit = 1 << offset
+            self._bits[self.day_strs[offset]] = bit
+            self._bits[d.strftime(DateFormat.ISO_DATE_FORMAT_RESPONSE.value)] = bit
+
+    @property
+    def key(self):
+        """
+        Identifies the nights and masks, e.g. to tell whether results computed
+        with another calendar still hold.
+        """
+        return (
+            self.first_day,
+            self.num_days,
+            self.nights,
+            self.weekends_only,
+            self.excluded_dates,
+        )
+
+    def mask(self, date_strings):
+        """
+        Mask of the dates that fall in the query. Others are ignored.
+        """
+        bits = self._bits
+        mask = 0
+        for date_string in date_strings:
+            mask |= bits.get(date_string, 0)
+        return mask
+
+    def run_starts(self, date_strings):
+        """
+        Mask of the allowed nights from which `nights` consecutive allowed
+        nights are in `date_strings`.
+        """
+        desired = self.allowed & self.mask(date_strings)
+        if not desired:
+            return 0
+        return availability_bitset.run_starts(desired, self.nights)
+
+    def ranges(self, starts):
+        """
+        {"start": ..., "end": ...} date ranges of the runs starting at `starts`.
+        """
+        return [
+            {"start": self.day_strs[offset], "end": self.day_strs[offset + self.nights]}
+            for offset in availability_bitset.iter_offsets(starts)
+        ]
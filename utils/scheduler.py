@@ -0,0 +1,167 @@
+import heapq
+import logging
+import random
+import time
+
+from utils.metrics import POLL_LAG
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_JITTER = 0.1
+# How the interval of a park adapts after each poll, within its bounds
+SPEED_UP_FACTOR = 0.5
+SLOW_DOWN_FACTOR = 1.25
+# Weight of the latest poll in a park's smoothed change rate
+CHANGE_RATE_WEIGHT = 0.3
+
+
+class PollScheduler:
+    """
+    Re-polls each park on its own interval. Parks are kept in a heap by the
+    time they are next due; after a poll each park is rescheduled
+    `interval` seconds later, give or take `jitter` (a fraction of the
+    interval) so polls don't line up into bursts.
+
+    When `min_interval` and `max_interval` differ, the interval of each
+    park adapts to how often its availability actually changes: it halves
+    when a poll sees a change and grows by a quarter when it doesn't, so
+    the request budget goes to the parks where new availability appears.
+    A park's first poll is not counted as a change.
+    """
+
+    def __init__(
+        self, park_ids, interval, jitter=DEFAULT_JITTER, min_interval=None, max_interval=None,
+        clock=time.monotonic, sleep=time.sleep,
+    ):
+        self.min_interval = min(min_interval or interval, interval)
+        self.max_interval = max(max_interval or interval, interval)
+        self.jitter = jitter
+        self.clock = clock
+        self.sleep = sleep
+        self.parks = {
+            park_id: {
+                "interval": interval,
+                "polls": 0,
+                "changes": 0,
+                "change_rate": 0.0,
+                "last_change": None,
+                "next_due": None,
+            }
+            for park_id in park_ids
+        }
+        now = clock()
+        self._queue = []
+        self._counter = 0
+        for park_id in park_ids:
+            self._push(park_id, now)
+
+    @property
+    def intervals(self):
+        return {park_id: park["interval"] for park_id, park in self.parks.items()}
+
+    def set_interval(self, park_id, interval):
+        self.parks[park_id]["interval"] = interval
+
+    def record_poll(self, park_id, changed, now=None):
+        """
+        Update a park's churn statistics after a poll and adapt its interval.
+        The first poll of a park only sets the baseline: there was nothing
+        to compare it with, so it always looks changed.
+        """
+        park = self.parks[park_id]
+        park["polls"] += 1
+        if park["polls"] == 1:
+            return
+        park["change_rate"] += CHANGE_RATE_WEIGHT * (int(changed) - park["change_rate"])
+        if changed:
+            park["changes"] += 1
+            park["last_change"] = self.clock() if now is None else now
+        if self.min_interval == self.max_interval:
+            return
+
+        if changed:
+            interval = max(park["interval"] * SPEED_UP_FACTOR, self.min_interval)
+        else:
+            interval = min(park["interval"] * SLOW_DOWN_FACTOR, self.max_interval)
+        if interval != park["interval"]:
+            LOG.info(
+                "Park {}: {}, polling every {:.1f}s instead of {:.1f}s (change rate {:.2f})".format(
+                    park_id,
+                    "changed" if changed else "unchanged",
+                    interval,
+                    park["interval"],
+                    park["change_rate"],
+                )
+            )
+            park["interval"] = interval
+
+    def reschedule(self, park_id, now=None):
+        now = self.clock() if now is None else now
+        interval = self.parks[park_id]["interval"]
+        self._push(park_id, now + interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    def schedule(self):
+        """
+        The current schedule, soonest first: for each park its interval,
+        when it is next due, and the churn that led to that interval.
+        """
+        now = self.clock()
+        return [
+            dict(park_id=park_id, next_in=park["next_due"] - now, **{
+                k: v for k, v in park.items() if k != "next_due"
+            })
+            for park_id, park in sorted(self.parks.items(), key=lambda p: p[1]["next_due"])
+        ]
+
+    def format_schedule(self):
+        lines = ["park        interval  next in  polls  changes  change rate"]
+        for park in self.schedule():
+            lines.append(
+                "{park_id:<10} {interval:>8.0f}s {next_in:>7.0f}s {polls:>6} {changes:>8} {change_rate:>12.2f}".format(
+                    **park
+                )
+            )
+        return "\n".join(lines)
+
+    def pop_due(self):
+        """
+        Wait until the next park is due, then return every park that is due
+        by then so they can be polled together.
+        """
+        due_time = self._queue[0][0]
+        wait = due_time - self.clock()
+        if wait > 0:
+            self.sleep(wait)
+        now = self.clock()
+        POLL_LAG.observe(max(now - due_time, 0.0))
+        due = []
+        while self._queue and self._queue[0][0] <= now:
+            due.append(heapq.heappop(self._queue)[2])
+        return due, now
+
+    def run(self, poll, max_rounds=None):
+        """
+        Call `poll(park_ids)` with the parks that are due, forever or for
+        `max_rounds` rounds. `poll` returns the IDs of the parks whose
+        availability changed, which drives the adaptive intervals. A failing
+        poll is logged and the parks are polled again on their next turn.
+        """
+        rounds = 0
+        while self._queue and (max_rounds is None or rounds < max_rounds):
+            park_ids, now = self.pop_due()
+            try:
+                changed = poll(park_ids) or ()
+            except Exception:
+                LOG.exception(f"Polling {park_ids} failed")
+            else:
+                for park_id in park_ids:
+                    self.record_poll(park_id, park_id in changed, now)
+            for park_id in park_ids:
+                self.reschedule(park_id, now)
+            LOG.debug("Poll schedule:\n" + self.format_schedule())
+            rounds += 1
+
+    def _push(self, park_id, due):
+        self.parks[park_id]["next_due"] = due
+        self._counter += 1
+        heapq.heappush(self._queue, (due, self._counter, park_id))
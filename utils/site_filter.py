@@ -0,0 +1,56 @@
+# Campsite types that are never wanted: group, management, walk-in and
+# hike-in sites
+EXCLUDED_CAMPSITE_TYPES = ("group", "management", "walk", "hike")
+
+EXCLUDED = "excluded"
+MAX_PEOPLE = "max people"
+TYPE_OF_USE = "type of use"
+CAMPSITE_TYPE = "campsite type"
+UNWANTED_TYPE = "group/walk-in/management"
+
+
+class SiteFilter:
+    """
+    The site filters of a query, compiled once: excluded and requested
+    campsite IDs become sets, and each site is judged on its details once
+    per park rather than once per month.
+    """
+
+    def __init__(self, campsite_type=None, campsite_ids=(), excluded_site_ids=()):
+        self.campsite_type = campsite_type
+        self.campsite_ids = frozenset(int(i) for i in campsite_ids)
+        self.excluded_site_ids = frozenset(str(i) for i in excluded_site_ids)
+
+    @property
+    def key(self):
+        return (self.campsite_type, self.campsite_ids, self.excluded_site_ids)
+
+    def reject_reason(self, campsite_id, site_metadata):
+        """
+        Why a site is filtered out, or None if it isn't.
+        """
+        if campsite_id in self.excluded_site_ids:
+            return EXCLUDED
+        # Sites that don't accept enough people
+        max_num_people = site_metadata.get("max_num_people")
+        if max_num_people is not None and max_num_people < 2:
+            return MAX_PEOPLE
+        # Day use only sites
+        type_of_use = site_metadata.get("type_of_use")
+        if type_of_use is not None and type_of_use.lower() != "overnight":
+            return TYPE_OF_USE
+        site_type = site_metadata.get("campsite_type")
+        if self.campsite_type and self.campsite_type != site_type:
+            return CAMPSITE_TYPE
+        if site_type:
+            site_type = site_type.lower()
+            if any(excluded in site_type for excluded in EXCLUDED_CAMPSITE_TYPES):
+                return UNWANTED_TYPE
+        return None
+
+    def wants_dates(self, campsite_data):
+        """
+        Whether the dates of a site that passed the filters are wanted, i.e.
+        it is one of the requested --campsite-ids, if any.
+        """
+        return not self.campsite_ids or int(campsite_data["campsite_id"]) in self.campsite_ids
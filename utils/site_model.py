@@ -0,0 +1,127 @@
+"""
+Compact records for the available sites of a park.
+
+The output formats describe a site's availability as a list of
+`{"start": "2022-06-22", "end": "2022-06-24"}` dicts, which costs a dict
+and two strings per window. A `Campsite` instead keeps the start days of its
+windows as day ordinals in an `array`, with one shared `nights`, and an
+interned site ID, so keeping many parks' results resident in `--watch` is
+cheap. Results are only turned back into the output formats (see
+`ranges_by_site_id` and `expand_info`) when they are output.
+"""
+import sys
+from array import array
+from collections import defaultdict
+from datetime import date
+from functools import lru_cache
+
+from enums.date_format import DateFormat
+from utils import availability_bitset
+
+
+def intern_site_id(campsite_id):
+    """
+    The one shared copy of a campsite ID, rather than the new string every
+    decoded month payload carries.
+    """
+    return sys.intern(str(campsite_id))
+
+
+@lru_cache(maxsize=4096)
+def format_day(ordinal):
+    return date.fromordinal(ordinal).strftime(DateFormat.INPUT_DATE_FORMAT.value)
+
+
+class AvailabilityWindow:
+    """
+    A stay from day `start` to day `end` (day ordinals), `end` being the
+    day you leave.
+    """
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+    def to_dict(self):
+        return {"start": format_day(self.start), "end": format_day(self.end)}
+
+    def __eq__(self, other):
+        if not isinstance(other, AvailabilityWindow):
+            return NotImplemented
+        return (self.start, self.end) == (other.start, other.end)
+
+    def __repr__(self):
+        return f"AvailabilityWindow({format_day(self.start)}, {format_day(self.end)})"
+
+
+class Campsite:
+    """
+    An available site: its ID and the start days (day ordinals) of its
+    windows, each `nights` long.
+    """
+
+    __slots__ = ("campsite_id", "nights", "starts")
+
+    def __init__(self, campsite_id, nights, starts=()):
+        self.campsite_id = intern_site_id(campsite_id)
+        self.nights = nights
+        self.starts = array("i", starts)
+
+    @classmethod
+    def from_run_starts(cls, campsite_id, calendar, starts):
+        """
+        Build a site from a `QueryCalendar.run_starts` mask.
+        """
+        first_ordinal = calendar.first_day.toordinal()
+        return cls(
+            campsite_id,
+            calendar.nights,
+            [first_ordinal + offset for offset in availability_bitset.iter_offsets(starts)],
+        )
+
+    @property
+    def windows(self):
+        return [AvailabilityWindow(start, start + self.nights) for start in self.starts]
+
+    def to_ranges(self):
+        """
+        The site's windows as output, e.g. by `get_num_available_sites`.
+        """
+        nights = self.nights
+        return [
+            {"start": format_day(start), "end": format_day(start + nights)}
+            for start in self.starts
+        ]
+
+    def __eq__(self, other):
+        if not isinstance(other, Campsite):
+            return NotImplemented
+        return (
+            self.campsite_id == other.campsite_id
+            and self.nights == other.nights
+            and self.starts == other.starts
+        )
+
+    def __repr__(self):
+        return f"Campsite({self.campsite_id}, {self.windows})"
+
+
+def ranges_by_site_id(campsites):
+    """
+    {<campsite_id>: [{"start": ..., "end": ...}, ...]} for a list of
+    `Campsite`s, in their order, as `get_num_available_sites` returns it.
+    """
+    available_dates_by_campsite_id = defaultdict(list)
+    for campsite in campsites:
+        available_dates_by_campsite_id[int(campsite.campsite_id)] = campsite.to_ranges()
+    return available_dates_by_campsite_id
+
+
+def expand_info(info):
+    """
+    Turn a compact `check_park` result back into the usual one for output.
+    """
+    current, maximum, campsites, park_name = info
+    return current, maximum, ranges_by_site_id(campsites), park_name
@@ -0,0 +1,112 @@
+import json
+import sqlite3
+import time
+from datetime import timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS site_ranges (
+    park TEXT NOT NULL,
+    site TEXT NOT NULL,
+    ranges TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (park, site)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS site_ranges_updated_at ON site_ranges (updated_at);
+"""
+
+
+class SnapshotStore:
+    """
+    The last notified availability, as one SQLite row per (park, site) with
+    its date ranges. Updating a snapshot only writes the rows whose ranges
+    changed, one park at a time, and rows not updated within `ttl` are
+    treated as missing, so availability that has been around that long is
+    notified again.
+    """
+
+    def __init__(self, db_path, ttl=timedelta(hours=12), clock=time.time):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.clock = clock
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _cutoff(self):
+        return self.clock() - self.ttl.total_seconds()
+
+    def update(self, availability_by_park):
+        """
+        Replace the snapshot of each park in park->site->[(start, end)],
+        writing only the sites whose ranges changed and deleting the sites
+        that are gone. Parks that aren't in `availability_by_park` are left
+        alone, so a park without availability should map to an empty dict.
+
+        Returns {(park, site): <previous ranges or None>} for every site that
+        is new, whose ranges changed, or that is gone (unless it had expired).
+        """
+        now = self.clock()
+        cutoff = now - self.ttl.total_seconds()
+        changed = {}
+        with self._conn:
+            for park, sites in availability_by_park.items():
+                # One lookup per park; the primary key starts with the park
+                stored = {
+                    site: (ranges, updated_at)
+                    for site, ranges, updated_at in self._conn.execute(
+                        "SELECT site, ranges, updated_at FROM site_ranges "
+                        "WHERE park = ?",
+                        (park,),
+                    )
+                }
+                current = [str(site) for site in sites]
+                rows = []
+                for site, date_ranges in zip(current, sites.values()):
+                    ranges = _encode_ranges(date_ranges)
+                    previous = stored.pop(site, None)
+                    if previous is not None and previous[1] >= cutoff:
+                        if previous[0] == ranges:
+                            continue
+                        changed[(park, site)] = _decode_ranges(previous[0])
+                    else:
+                        changed[(park, site)] = None
+                    rows.append((park, site, ranges, now))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO site_ranges "
+                    "(park, site, ranges, updated_at) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+
+                # The stored sites that are left are gone
+                if not stored:
+                    continue
+                for site, (ranges, updated_at) in stored.items():
+                    if updated_at >= cutoff:
+                        changed[(park, site)] = _decode_ranges(ranges)
+                self._conn.execute(
+                    "DELETE FROM site_ranges WHERE park = ? AND site NOT IN ({})".format(
+                        ", ".join("?" * len(current))
+                    ),
+                    (park, *current),
+                )
+        return changed
+
+    def expire(self):
+        """
+        Delete the rows that have expired. Returns how many were deleted.
+        """
+        with self._conn:
+            return self._conn.execute(
+                "DELETE FROM site_ranges WHERE updated_at < ?", (self._cutoff(),)
+            ).rowcount
+
+
+def _encode_ranges(date_ranges):
+    return json.dumps(sorted(list(r) for r in date_ranges))
+
+
+def _decode_ranges(ranges):
+    # Tuples so the ranges are hashable, like the rest of the notifier expects
+    return tuple(tuple(r) for r in json.loads(ranges))